@@ -1,20 +1,41 @@
 import os
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import func
-from typing import List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy import func, select
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import date, datetime, time, timedelta
 from app.db.connection import get_db
+from app.db.async_connection import get_async_db
+from app.db.date_filters import between_days, on_day
+from app.models.doctor import Doctor
+from app.models.hospital import Hospital
 from app.models.hospital_doctor import HospitalDoctor
 from app.models.appointment import Appointment
 from app.schemas.appointment_schema import (
     AvailableTimeSlotsResponse,
     AppointmentCreateRequest,
     AppointmentResponse,
+    DoctorCalendarResponse,
+    NextAvailableSlotResponse,
 )
 from app.core.jwt_auth import JWTBearer
 from app.models.user import User
+from app.services.appointment_numbers import appointment_numbers
+from app.services.appointment_slots import (
+    CALENDAR_MAX_DAYS,
+    NEXT_AVAILABLE_DAYS,
+    SLOT_FREE,
+    SLOT_MINUTES,
+    day_slots,
+    earliest_free_slots,
+    free_slot_times,
+    is_slot_conflict,
+    slot_matrix,
+    slot_taken_error,
+)
 from app.services.pdf_service import PDFService
 import logging
 
@@ -66,6 +87,9 @@ def calculate_detailed_time_slots(
 
     booked_slots = {}
     for appointment in appointments:
+        # Cancelled appointments free their slot
+        if appointment.status == "Cancelled":
+            continue
         time_key = appointment.appointment_time.strftime("%H:%M:%S")
         booked_slots[time_key] = {
             "appointment_number": appointment.appointment_number,
@@ -104,40 +128,32 @@ async def get_doctor_appointments(
     doctor_id: int,
     hospital_id: int,
     selected_date: date,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Retrieve all appointments and calculate available time slots for a specific doctor 
     at a specific hospital for a selected date.
     """
     try:
-        availability = (
-            db.query(HospitalDoctor)
-            .filter(
-                HospitalDoctor.doctorID == doctor_id,
-                HospitalDoctor.hospitalID == hospital_id
-            )
-            .first()
-        )
+        availability = await db.get(HospitalDoctor, (hospital_id, doctor_id))
 
         if not availability:
             raise HTTPException(status_code=404, detail="Doctor availability not found")
 
-        appointments = (
-            db.query(Appointment)
+        appointments = (await db.execute(
+            select(Appointment)
             .options(
                 joinedload(Appointment.user),
                 joinedload(Appointment.hospital),
                 joinedload(Appointment.doctor),
                 joinedload(Appointment.payment)
             )
-            .filter(
+            .where(
                 Appointment.doctor_id == doctor_id,
                 Appointment.hospital_id == hospital_id,
-                func.date(Appointment.appointment_date) == selected_date
+                on_day(Appointment.appointment_date, selected_date)
             )
-            .all()
-        )
+        )).scalars().all()
 
         available_slots, unavailable_slots = calculate_detailed_time_slots(
             availability.availability_start_time,
@@ -158,6 +174,145 @@ async def get_doctor_appointments(
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Could not retrieve appointments")
 
+@router.get("/doctors/{doctor_id}/calendar", response_model=DoctorCalendarResponse)
+async def get_doctor_calendar(
+    doctor_id: int,
+    hospital_id: int,
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a doctor's free and booked slots at a hospital for every day of a range (both inclusive).
+    """
+    days = (to_date - from_date).days + 1
+    if days < 1:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if days > CALENDAR_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"The range can span at most {CALENDAR_MAX_DAYS} days")
+
+    try:
+        availability = await db.get(HospitalDoctor, (hospital_id, doctor_id))
+
+        if not availability:
+            raise HTTPException(status_code=404, detail="Doctor availability not found")
+
+        # Booked times only: one query over the slot index, no joined entities
+        booked = (await db.execute(
+            select(Appointment.appointment_date, Appointment.appointment_time)
+            .where(
+                Appointment.doctor_id == doctor_id,
+                Appointment.hospital_id == hospital_id,
+                Appointment.status != "Cancelled",
+                between_days(Appointment.appointment_date, from_date, to_date)
+            )
+        )).all()
+
+        slots = day_slots(availability.availability_start_time, availability.availability_end_time)
+        matrix = slot_matrix(from_date, days, slots, booked, datetime.now())
+
+        return {
+            "doctor_id": doctor_id,
+            "hospital_id": hospital_id,
+            "slot_minutes": SLOT_MINUTES,
+            "days": [from_date + timedelta(days=offset) for offset in range(days)],
+            "slots": [slot.strftime("%I:%M %p") for slot in slots],
+            "matrix": [row.tobytes().decode("ascii") for row in matrix + ord("0")],
+            "free_slots": int((matrix == SLOT_FREE).sum())
+        }
+
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Could not retrieve doctor calendar")
+
+@router.get("/next-available", response_model=List[NextAvailableSlotResponse])
+async def get_next_available_slots(
+    specialization: str,
+    after: Optional[datetime] = None,
+    limit: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the earliest free slots of any doctor with a specialization, at any of their hospitals.
+    """
+    try:
+        if after and after.tzinfo:
+            # Slots are stored in server-local time
+            after = after.astimezone().replace(tzinfo=None)
+        earliest = max(after, datetime.now()) if after else datetime.now()
+        first_day = earliest.date()
+        last_day = first_day + timedelta(days=NEXT_AVAILABLE_DAYS - 1)
+
+        # Every (doctor, hospital) availability window of the specialization
+        windows = (await db.execute(
+            select(
+                HospitalDoctor.doctorID,
+                HospitalDoctor.hospitalID,
+                HospitalDoctor.availability_start_time,
+                HospitalDoctor.availability_end_time,
+                Doctor.title,
+                Doctor.name,
+                Doctor.specialization,
+                Hospital.name.label("hospital_name")
+            )
+            .join(Doctor, Doctor.doctor_id == HospitalDoctor.doctorID)
+            .join(Hospital, Hospital.hospital_id == HospitalDoctor.hospitalID)
+            .where(Doctor.specialization == specialization, Doctor.is_active.isnot(False))
+        )).all()
+        if not windows:
+            return []
+
+        # Booked slots of all those doctors in the search window, in one set-based query
+        booked: Dict[Tuple[int, int], Set[Tuple[date, time]]] = defaultdict(set)
+        for doctor_id, hospital_id, appointment_date, appointment_time in await db.execute(
+            select(
+                Appointment.doctor_id,
+                Appointment.hospital_id,
+                Appointment.appointment_date,
+                Appointment.appointment_time
+            )
+            .join(Doctor, Doctor.doctor_id == Appointment.doctor_id)
+            .where(
+                Doctor.specialization == specialization,
+                Appointment.status != "Cancelled",
+                between_days(Appointment.appointment_date, first_day, last_day)
+            )
+        ):
+            booked[(doctor_id, hospital_id)].add((appointment_date.date(), appointment_time))
+
+        earliest_slots = earliest_free_slots(
+            (
+                ((window.doctorID, window.hospitalID), free_slot_times(
+                    first_day,
+                    NEXT_AVAILABLE_DAYS,
+                    day_slots(window.availability_start_time, window.availability_end_time),
+                    booked[(window.doctorID, window.hospitalID)],
+                    earliest
+                ))
+                for window in windows
+            ),
+            limit
+        )
+
+        windows_by_key = {(window.doctorID, window.hospitalID): window for window in windows}
+        next_available = []
+        for start, key in earliest_slots:
+            window = windows_by_key[key]
+            next_available.append({
+                "doctor_id": window.doctorID,
+                "doctor_name": f"{window.title} {window.name}",
+                "specialization": window.specialization,
+                "hospital_id": window.hospitalID,
+                "hospital_name": window.hospital_name,
+                "appointment_date": start.date(),
+                "appointment_time": start.strftime("%I:%M %p")
+            })
+        return next_available
+
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Could not retrieve available slots")
+
 @router.post("/book")
 async def create_appointment(
     appointment_data: AppointmentCreateRequest,
@@ -168,15 +323,6 @@ async def create_appointment(
     Create a new appointment.
     """
     try:
-        last_appointment = db.query(Appointment).order_by(Appointment.appointment_id.desc()).first()
-        if last_appointment:
-            last_number = int(last_appointment.appointment_number.split("-")[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-
-        appointment_number = f"APPT-NO-{new_number}"
-
         current_timestamp = datetime.now()
 
         try:
@@ -187,6 +333,9 @@ async def create_appointment(
                 detail="Invalid time format. Use 'HH:MM AM/PM'."
             )
 
+        # Numbers come from the atomic counter, so concurrent bookings never share one
+        appointment_number = appointment_numbers.next_number()
+
         new_appointment = Appointment(
             user_id=current_user.user_id,
             doctor_id=appointment_data.doctor_id,
@@ -200,31 +349,28 @@ async def create_appointment(
             updated_at=current_timestamp
         )
 
-        existing_appointment = (
-            db.query(Appointment)
-            .filter(
-                Appointment.doctor_id == appointment_data.doctor_id,
-                Appointment.hospital_id == appointment_data.hospital_id,
-                Appointment.appointment_date == appointment_data.appointment_date,
-                Appointment.appointment_time == appointment_time
-            )
-            .first()
-        )
-
-        if existing_appointment:
-            raise HTTPException(
-                status_code=400, 
-                detail="Selected time slot is already booked"
-            )
-
+        # The unique key on active slots rejects a double booking, so no check query is needed
+        # and concurrent requests for one slot cannot both succeed
         db.add(new_appointment)
+        try:
+            db.flush()
+        except IntegrityError as e:
+            db.rollback()
+            if not is_slot_conflict(e):
+                raise
+            raise slot_taken_error(
+                db,
+                appointment_data.doctor_id,
+                appointment_data.hospital_id,
+                datetime.combine(appointment_data.appointment_date, appointment_time)
+            )
+        appointment_id = new_appointment.appointment_id
         db.commit()
-        db.refresh(new_appointment)
 
         return {
             "message": "Appointment booked successfully",
             "appointment_number": appointment_number,
-            "appointment_id": new_appointment.appointment_id
+            "appointment_id": appointment_id
         }
 
     except SQLAlchemyError as e:
@@ -244,22 +390,21 @@ async def create_appointment(
 @router.get("/history", response_model=List[AppointmentResponse])
 async def get_appointment_history(
     current_user: User = Depends(JWTBearer()),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Retrieve the appointment history for the authenticated user.
     """
     try:
-        appointments = (
-            db.query(Appointment)
+        appointments = (await db.execute(
+            select(Appointment)
             .options(
                 joinedload(Appointment.doctor),
                 joinedload(Appointment.hospital),
                 joinedload(Appointment.payment)
             )
-            .filter(Appointment.user_id == current_user.user_id)
-            .all()
-        )
+            .where(Appointment.user_id == current_user.user_id)
+        )).scalars().all()
 
         if not appointments:
             logger.debug("No appointments found for user_id: %s", current_user.user_id)
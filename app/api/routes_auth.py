@@ -1,4 +1,3 @@
-import os
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from app.db.connection import get_db
@@ -15,20 +14,26 @@ from app.schemas.auth_schema import (
     TwoFactorResponse,
     TwoFactorVerifyResponse
 )
-from app.services.supabase_service import SupabaseService
-from app.core.jwt_auth import JWTBearer
+from app.services.supabase_service import get_supabase_service
+from app.services.supabase_client import SupabaseUnavailableError, get_supabase_gateway
+from app.core.jwt_auth import JWTBearer, user_cache
 from typing import List
 import logging
-from supabase import create_client
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+supabase_gateway = get_supabase_gateway()
+supabase = supabase_gateway.anon
 
-supabase_service = SupabaseService()
+supabase_service = get_supabase_service()
+
+def supabase_unavailable(e: SupabaseUnavailableError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": "30"}
+    )
 
 @router.post("/register", response_model=AuthResponse)
 async def register(request: RegisterRequest, db: Session = Depends(get_db)):
@@ -87,6 +92,8 @@ async def register(request: RegisterRequest, db: Session = Depends(get_db)):
                 logger.error(f"Failed to delete Supabase user during rollback: {str(supabase_error)}")
         if isinstance(e, HTTPException):
             raise e
+        if isinstance(e, SupabaseUnavailableError):
+            raise supabase_unavailable(e)
         logger.error(f"Registration error: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -102,7 +109,7 @@ async def login(
     Step 1: Verify email and password, then send 2FA code if enabled.
     """
     try:
-        auth_response = supabase.auth.sign_in_with_password({
+        auth_response = await supabase_gateway.run(supabase.auth.sign_in_with_password, {
             "email": request.email,
             "password": request.password
         })
@@ -118,7 +125,7 @@ async def login(
                 detail="User not found in database"
             )
         if user.two_factor_enabled:
-            otp_response = supabase.auth.sign_in_with_otp({
+            otp_response = await supabase_gateway.run(supabase.auth.sign_in_with_otp, {
                 "email": request.email,
                 "options": {
                     "should_create_user": False
@@ -149,6 +156,8 @@ async def login(
             )
     except HTTPException as he:
         raise he
+    except SupabaseUnavailableError as e:
+        raise supabase_unavailable(e)
     except Exception as e:
         logger.error(f"Error during login: {str(e)}")
         raise HTTPException(
@@ -165,7 +174,7 @@ async def verify_2fa(
     Step 2: Verify the 2FA code and create a session.
     """
     try:
-        verification_result = supabase.auth.verify_otp({
+        verification_result = await supabase_gateway.run(supabase.auth.verify_otp, {
             "email": request.email,
             "token": request.token,
             "type": "email"
@@ -194,6 +203,8 @@ async def verify_2fa(
         )
     except HTTPException as he:
         raise he
+    except SupabaseUnavailableError as e:
+        raise supabase_unavailable(e)
     except Exception as e:
         logger.error(f"Error verifying 2FA code: {str(e)}")
         raise HTTPException(
@@ -204,7 +215,7 @@ async def verify_2fa(
 @router.post("/toggle-2fa", response_model=TwoFactorResponse)
 async def toggle_2fa(
     request: TwoFactorToggleRequest,
-    current_user: User = Depends(JWTBearer()),
+    current_user: User = Depends(JWTBearer(load_user=True)),
     db: Session = Depends(get_db)
 ):
     """
@@ -229,12 +240,15 @@ async def toggle_2fa(
         )
 
 @router.post("/logout")
-async def logout():
+async def logout(request: Request):
     """
     Log out the authenticated user.
     """
     try:
         await supabase_service.sign_out()
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            user_cache.invalidate_token(token)
         return {"message": "Logout successful"}
     except Exception as e:
         logger.error(f"Logout error: {str(e)}")
@@ -272,7 +286,7 @@ async def get_active_sessions(
     Retrieve active sessions for the authenticated user.
     """
     try:
-        sessions = supabase_service.get_active_sessions(current_user.supabase_uid)
+        sessions = await supabase_service.get_active_sessions(current_user.supabase_uid)
         if not sessions:
             return []
         user_sessions = []
@@ -309,7 +323,8 @@ async def revoke_sessions(
         if request.session_id:
             logger.warning("Specific session revocation not yet implemented")
         if request.revoke_all:
-            result = supabase_service.revoke_user_sessions(current_user.supabase_uid)
+            result = await supabase_service.revoke_user_sessions(current_user.supabase_uid)
+            user_cache.invalidate_user(current_user.supabase_uid)
         return {"message": "Sessions revoked successfully"}
     except Exception as e:
         logger.error(f"Session revocation error: {str(e)}")
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from datetime import datetime, timedelta
 from typing import List
-from app.db.connection import get_db
+from app.db.async_connection import get_async_read_db
+from app.db.date_filters import on_day
 from app.models.appointment import Appointment
 from app.models.doctor import Doctor
 from app.models.user import User
@@ -14,10 +15,16 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+async def count_rows(db: AsyncSession, model, *criteria) -> int:
+    """
+    Count the rows of a model matching the given criteria
+    """
+    return await db.scalar(select(func.count()).select_from(model).where(*criteria))
+
 @router.get("/dashboard")
 async def get_dashboard_data(
     current_user: User = Depends(JWTBearer()),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get comprehensive dashboard data including:
@@ -28,18 +35,17 @@ async def get_dashboard_data(
     """
     try:
         # Get total counts
-        total_appointments = db.query(Appointment).count()
-        active_doctors = db.query(Doctor).filter(Doctor.is_active == True).count()
-        total_patients = db.query(User).filter(User.role == "Patient").count()
+        total_appointments = await count_rows(db, Appointment)
+        active_doctors = await count_rows(db, Doctor, Doctor.is_active == True)
+        total_patients = await count_rows(db, User, User.role == "Patient")
 
         # Get recent patients based on account creation timestamp
-        recent_patients_query = (
-            db.query(User)
-            .filter(User.role == "Patient")
+        recent_patients_query = (await db.execute(
+            select(User)
+            .where(User.role == "Patient")
             .order_by(User.created_at.desc())  # This will now sort by full timestamp
             .limit(5)
-            .all()
-        )
+        )).scalars().all()
 
         recent_patients = []
         for patient in recent_patients_query:
@@ -57,16 +63,15 @@ async def get_dashboard_data(
             })
 
         # Get department distribution
-        department_stats = (
-            db.query(
+        department_stats = (await db.execute(
+            select(
                 Doctor.specialization,
                 func.count(User.user_id).label('patients')
             )
             .join(Appointment, Doctor.doctor_id == Appointment.doctor_id)
             .join(User, Appointment.user_id == User.user_id)
             .group_by(Doctor.specialization)
-            .all()
-        )
+        )).all()
 
         # Define colors for departments
         department_colors = {
@@ -97,17 +102,20 @@ async def get_dashboard_data(
             try:
                 day_stats = {
                     "day": current_date.strftime("%A"),
-                    "appointments": db.query(Appointment).filter(
-                        func.date(Appointment.appointment_date) == current_date
-                    ).count(),
-                    "visits": db.query(Appointment).filter(
-                        func.date(Appointment.appointment_date) == current_date,
+                    "appointments": await count_rows(
+                        db, Appointment,
+                        on_day(Appointment.appointment_date, current_date)
+                    ),
+                    "visits": await count_rows(
+                        db, Appointment,
+                        on_day(Appointment.appointment_date, current_date),
                         Appointment.status == "Completed"
-                    ).count(),
-                    "emergency": db.query(Appointment).filter(
-                        func.date(Appointment.appointment_date) == current_date,
+                    ),
+                    "emergency": await count_rows(
+                        db, Appointment,
+                        on_day(Appointment.appointment_date, current_date),
                         Appointment.note.ilike("%emergency%")
-                    ).count()
+                    )
                 }
                 appointment_stats.append(day_stats)
             except Exception as e:
@@ -138,7 +146,7 @@ async def get_dashboard_data(
 @router.get("/admin-dashboard")
 async def get_admin_dashboard_data(
     current_user: User = Depends(JWTBearer()),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get comprehensive data for the Admin Dashboard, including:
@@ -151,10 +159,10 @@ async def get_admin_dashboard_data(
     """
     try:
         # 1. Total Users
-        total_users = db.query(User).count()
-        total_patients = db.query(User).filter(User.role == "Patient").count()
-        total_staff = db.query(User).filter(User.role == "Staff").count()
-        total_admins = db.query(User).filter(User.role == "Admin").count()
+        total_users = await count_rows(db, User)
+        total_patients = await count_rows(db, User, User.role == "Patient")
+        total_staff = await count_rows(db, User, User.role == "Staff")
+        total_admins = await count_rows(db, User, User.role == "Admin")
 
         # 2. Active Alerts (dummy data)
         active_alerts = 24  # Dummy value for active alerts
@@ -167,8 +175,8 @@ async def get_admin_dashboard_data(
         today = datetime.now().date()
         for i in range(7):
             date = today - timedelta(days=i)
-            users_count = db.query(User).filter(func.date(User.created_at) == date).count()
-            staff_count = db.query(User).filter(User.role == "Staff", func.date(User.created_at) == date).count()
+            users_count = await count_rows(db, User, on_day(User.created_at, date))
+            staff_count = await count_rows(db, User, User.role == "Staff", on_day(User.created_at, date))
             user_growth.append({
                 "day": date.strftime("%a"),
                 "users": users_count,
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy import func
 from typing import List, Optional, Tuple
 from datetime import date, datetime, time, timedelta
-from app.db.connection import get_db
+from app.db.connection import get_db, get_read_db
+from app.db.date_filters import between_days, on_day
 from app.models.doctor import Doctor
 from app.models.hospital import Hospital
 from app.models.hospital_doctor import HospitalDoctor
@@ -18,6 +19,8 @@ from app.schemas.appointment_schema import (
 )
 from app.core.jwt_auth import JWTBearer
 from app.models.user import User
+from app.services.appointment_numbers import appointment_numbers
+from app.services.appointment_slots import is_slot_conflict, slot_taken_error
 from app.services.pdf_service import PDFService
 import logging
 
@@ -73,6 +76,9 @@ def calculate_detailed_time_slots(
     # Create a mapping of booked appointments
     booked_slots = {}
     for appointment in appointments:
+        # Cancelled appointments free their slot
+        if appointment.status == "Cancelled":
+            continue
         time_key = appointment.appointment_time.strftime("%H:%M:%S")
         booked_slots[time_key] = {
             "appointment_number": appointment.appointment_number,
@@ -120,7 +126,7 @@ async def get_all_appointments(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     current_user: User = Depends(JWTBearer()),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Retrieve all appointments with optional filtering.
@@ -152,10 +158,8 @@ async def get_all_appointments(
             query = query.filter(Appointment.doctor_id == doctor_id)
         if hospital_id:
             query = query.filter(Appointment.hospital_id == hospital_id)
-        if start_date:
-            query = query.filter(func.date(Appointment.appointment_date) >= start_date)
-        if end_date:
-            query = query.filter(func.date(Appointment.appointment_date) <= end_date)
+        if start_date or end_date:
+            query = query.filter(between_days(Appointment.appointment_date, start_date, end_date))
 
         # Order by date and time
         query = query.order_by(
@@ -212,7 +216,7 @@ async def get_doctor_appointments(
             .filter(
                 Appointment.doctor_id == doctor_id,
                 Appointment.hospital_id == hospital_id,
-                func.date(Appointment.appointment_date) == selected_date
+                on_day(Appointment.appointment_date, selected_date)
             )
         )
 
@@ -258,11 +262,6 @@ async def create_appointment(
                 detail="Not authorized to book appointments for other users"
             )
 
-        # Generate appointment number
-        last_appointment = db.query(Appointment).order_by(Appointment.appointment_id.desc()).first()
-        new_number = int(last_appointment.appointment_number.split("-")[-1]) + 1 if last_appointment else 1
-        appointment_number = f"APPT-NO-{new_number}"
-
         # Parse appointment time
         try:
             appointment_time = datetime.strptime(appointment_data.appointment_time, "%I:%M %p").time()
@@ -272,23 +271,8 @@ async def create_appointment(
                 detail="Invalid time format. Use 'HH:MM AM/PM'."
             )
 
-        # Check for existing appointment
-        existing_appointment = (
-            db.query(Appointment)
-            .filter(
-                Appointment.doctor_id == appointment_data.doctor_id,
-                Appointment.hospital_id == appointment_data.hospital_id,
-                Appointment.appointment_date == appointment_data.appointment_date,
-                Appointment.appointment_time == appointment_time
-            )
-            .first()
-        )
-
-        if existing_appointment:
-            raise HTTPException(
-                status_code=400,
-                detail="Selected time slot is already booked"
-            )
+        # Generate appointment number (atomic counter, so concurrent bookings never share one)
+        appointment_number = appointment_numbers.next_number()
 
         # Create appointment
         new_appointment = Appointment(
@@ -304,14 +288,28 @@ async def create_appointment(
             updated_at=datetime.now()
         )
 
+        # The unique key on active slots rejects a double booking, so no check query is needed
+        # and concurrent requests for one slot cannot both succeed
         db.add(new_appointment)
+        try:
+            db.flush()
+        except IntegrityError as e:
+            db.rollback()
+            if not is_slot_conflict(e):
+                raise
+            raise slot_taken_error(
+                db,
+                appointment_data.doctor_id,
+                appointment_data.hospital_id,
+                datetime.combine(appointment_data.appointment_date, appointment_time)
+            )
+        appointment_id = new_appointment.appointment_id
         db.commit()
-        db.refresh(new_appointment)
 
         return {
             "message": "Appointment booked successfully",
             "appointment_number": appointment_number,
-            "appointment_id": new_appointment.appointment_id
+            "appointment_id": appointment_id
         }
 
     except SQLAlchemyError as e:
@@ -640,7 +638,17 @@ async def update_appointment_status(
         appointment.status = status
         appointment.updated_at = datetime.now()
 
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if not is_slot_conflict(e):
+                raise
+            # Reactivating a cancelled appointment whose slot has been booked again
+            raise HTTPException(
+                status_code=409,
+                detail="The appointment's time slot has been booked by another appointment"
+            )
 
         return {
             "message": "Appointment status updated successfully",
@@ -655,6 +663,8 @@ async def update_appointment_status(
             }
         }
 
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Database error during status update: {str(e)}")
@@ -6,7 +6,7 @@ from datetime import datetime, time, timedelta, date
 import logging
 from sqlalchemy import func
 
-from app.db.connection import get_db
+from app.db.connection import get_db, get_read_db
 from app.models.appointment import Appointment
 from app.models.hospital_doctor import HospitalDoctor
 from app.models.doctor import Doctor
@@ -90,7 +90,7 @@ async def get_doctor_details(
 async def get_all_doctors(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(JWTBearer())
 ):
     """
@@ -3,10 +3,10 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timedelta
 from typing import List
-from app.db.connection import get_db
+from app.db.connection import get_db, get_read_db
 from app.models.user import User
 from app.schemas.user_schema import UserResponse, UserCreate, UserUpdateDashBoard
-from app.core.jwt_auth import JWTBearer
+from app.core.jwt_auth import JWTBearer, user_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,7 +15,7 @@ router = APIRouter()
 @router.get("/users", response_model=List[UserResponse])
 async def get_users(
     current_user: User = Depends(JWTBearer()),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Fetch all users from the database for the dashboard.
@@ -72,6 +72,7 @@ async def update_user(
 
         db.commit()
         db.refresh(user)
+        user_cache.invalidate_user(user.supabase_uid)
         return user
     except HTTPException as http_error:
         raise http_error
@@ -99,8 +100,10 @@ async def delete_user(
                 detail="User not found"
             )
 
+        supabase_uid = user.supabase_uid
         db.delete(user)
         db.commit()
+        user_cache.invalidate_user(supabase_uid)
         return {"message": "User deleted successfully"}
     except HTTPException as http_error:
         raise http_error
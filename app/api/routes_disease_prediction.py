@@ -1,14 +1,36 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from app.schemas.disease_schema import SymptomsInput, PredictionResponse
-from app.utils.ml_utils import clean_symptoms, format_predictions
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from app.schemas.disease_schema import (
+    Prediction,
+    SymptomsInput,
+    BatchSymptomsInput,
+    PredictionResponse,
+    BatchPredictionResponse,
+    SymptomSuggestion,
+    SymptomSuggestionResponse,
+)
 from app.core.jwt_auth import JWTBearer
 from app.models.user import User
 from sqlalchemy.orm import Session
 from app.db.connection import get_db
-import joblib
+from app.services.model_loader import (
+    ModelLoader,
+    ModelNotReadyError,
+    ML_COMPACT_FOREST,
+    ML_COMPILED_FOREST,
+    discover_model_versions,
+    prepare_symptoms,
+    predict_cleaned_in_worker,
+    warm_up_worker,
+)
+from app.services.prediction_batcher import PredictionBatcher
+from app.services.inference_executor import InferenceExecutor, ExecutorSaturatedError
+from app.utils.ml_utils import canonicalize_symptoms
+from app.utils.prediction_cache import PredictionCache
+from app.utils.symptom_index import MAX_SUGGESTIONS
+from typing import Dict, List, Optional
+import asyncio
 import os
 import logging
-from typing import Dict
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,76 +38,182 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 jwt_bearer = JWTBearer()
 
-class ModelLoader:
-    _instance = None
-
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(ModelLoader, cls).__new__(cls)
-            cls._instance.initialized = False
-        return cls._instance
-
-    def __init__(self):
-        if not self.initialized:
-            self.model = None
-            self.vectorizer = None
-            self.label_encoder = None
-            self.disease_specialty_map = None
-            self.load_components()
-            self.initialized = True
-
-    def load_components(self) -> None:
-        """Load ML model components."""
-        try:
-            base_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'app', 'mlmodels')
-            model_path = os.path.join(base_dir, 'random_forest_model.joblib')
-            vectorizer_path = os.path.join(base_dir, 'tfidf_vectorizer.joblib')
-            encoder_path = os.path.join(base_dir, 'label_encoder.joblib')
-            specialty_map_path = os.path.join(base_dir, 'disease_specialty_map.joblib')
-
-            required_files = [model_path, vectorizer_path, encoder_path, specialty_map_path]
-            missing_files = [p for p in required_files if not os.path.exists(p)]
-            if missing_files:
-                raise FileNotFoundError(f"Missing required files: {', '.join(missing_files)}")
-
-            self.model = joblib.load(model_path)
-            self.vectorizer = joblib.load(vectorizer_path)
-            self.label_encoder = joblib.load(encoder_path)
-            self.disease_specialty_map = joblib.load(specialty_map_path)
-            logger.info("ML components loaded successfully.")
-        except Exception as e:
-            logger.error(f"Error loading ML components: {str(e)}")
-            raise RuntimeError(f"Failed to load ML components: {str(e)}")
-
-    def get_components_status(self) -> Dict[str, bool]:
-        """Get the loading status of ML components."""
-        return {
-            "model_loaded": self.model is not None,
-            "vectorizer_loaded": self.vectorizer is not None,
-            "label_encoder_loaded": self.label_encoder is not None,
-            "specialty_map_loaded": self.disease_specialty_map is not None
-        }
+# Concurrent single predictions are gathered for up to ML_BATCH_MAX_WAIT_MS into one model call
+ML_BATCH_MAX_SIZE = int(os.getenv("ML_BATCH_MAX_SIZE", "32"))
+ML_BATCH_MAX_WAIT_MS = float(os.getenv("ML_BATCH_MAX_WAIT_MS", "5"))
 
-    def predict(self, symptoms: str) -> PredictionResponse:
-        """Predict diseases based on symptoms."""
-        try:
-            cleaned_symptoms = clean_symptoms(symptoms)
-            if not cleaned_symptoms:
-                raise ValueError("No valid symptoms after cleaning.")
-
-            symptoms_vector = self.vectorizer.transform([cleaned_symptoms])
-            probabilities = self.model.predict_proba(symptoms_vector)[0]
-            predictions = format_predictions(
-                probabilities=probabilities,
-                classes=self.label_encoder.classes_,
-                specialty_map=self.disease_specialty_map
-            )
-            return PredictionResponse(predictions=predictions, input_symptoms=symptoms)
-        except Exception as e:
-            logger.error(f"Prediction error: {str(e)}")
-            raise RuntimeError(f"Error making prediction: {str(e)}")
+# Inference runs on a dedicated pool ("thread" or "process") so it never blocks the event loop
+ML_EXECUTOR_MODE = os.getenv("ML_EXECUTOR_MODE", "thread")
+ML_EXECUTOR_WORKERS = int(os.getenv("ML_EXECUTOR_WORKERS", "2"))
+ML_EXECUTOR_MAX_QUEUE = int(os.getenv("ML_EXECUTOR_MAX_QUEUE", "64"))
+
+# Predictions are cached per canonical symptom set; the cache clears itself when a model is activated
+ML_CACHE_SIZE = int(os.getenv("ML_CACHE_SIZE", "1024"))
+ML_CACHE_TTL_SECONDS = float(os.getenv("ML_CACHE_TTL_SECONDS", "3600"))
+
+# Inputs of at most this many symptoms, all known to the symptom-to-disease index, skip the forest (0 disables)
+ML_INDEX_FAST_PATH_MAX_SYMPTOMS = int(os.getenv("ML_INDEX_FAST_PATH_MAX_SYMPTOMS", "2"))
+# Answer from the index while the forest is loading (or failed to load) instead of with 503
+ML_INDEX_FALLBACK = os.getenv("ML_INDEX_FALLBACK", "true").lower() in ("1", "true", "yes")
+
+# How long a retired model version may keep serving in-flight predictions after a swap
+ML_SWAP_DRAIN_TIMEOUT_SECONDS = float(os.getenv("ML_SWAP_DRAIN_TIMEOUT_SECONDS", "30"))
 
 model_loader = ModelLoader()
+# Process workers each load the forest: the API process only keeps the vectorizer, encoders and indexes
+model_loader.load_forest = ML_EXECUTOR_MODE != "process"
+if ML_EXECUTOR_MODE == "process" and not (ML_COMPILED_FOREST or ML_COMPACT_FOREST):
+    logger.warning(
+        "ML_EXECUTOR_MODE=process without ML_COMPILED_FOREST or ML_COMPACT_FOREST: each inference worker "
+        "process holds a private copy of the sklearn forest."
+    )
+prediction_cache = PredictionCache(max_size=ML_CACHE_SIZE, ttl_seconds=ML_CACHE_TTL_SECONDS)
+inference_executor = InferenceExecutor(
+    mode=ML_EXECUTOR_MODE,
+    max_workers=ML_EXECUTOR_WORKERS,
+    max_queue=ML_EXECUTOR_MAX_QUEUE,
+    initializer=warm_up_worker
+)
+
+index_stats = {"fast_path": 0, "fallback": 0}
+
+def predict_from_index(keys: List[str]) -> Dict[str, List[Prediction]]:
+    """Answer short inputs from the disease index, and all inputs while the forest is not ready."""
+    if not model_loader.is_ready:
+        if not ML_INDEX_FALLBACK:
+            return {}
+        try:
+            predictions = model_loader.predict_from_index(keys)
+        except ValueError:
+            # No indexed symptom: the input is valid, only the forest can answer it
+            raise model_not_ready_error()
+        index_stats["fallback"] += len(predictions)
+    elif ML_INDEX_FAST_PATH_MAX_SYMPTOMS > 0:
+        predictions = model_loader.predict_from_index(keys, max_symptoms=ML_INDEX_FAST_PATH_MAX_SYMPTOMS)
+        index_stats["fast_path"] += len(predictions)
+    else:
+        return {}
+    return predictions
+
+def get_index_prediction(symptoms: str) -> Optional[PredictionResponse]:
+    """Answer a prediction from the disease index without queueing for the forest, if possible."""
+    key = canonicalize_symptoms(prepare_symptoms([symptoms])[0])
+    predictions = predict_from_index([key]).get(key)
+    if predictions is None:
+        return None
+    return PredictionResponse(predictions=predictions, input_symptoms=symptoms)
+
+def get_cached_prediction(symptoms: str) -> Optional[PredictionResponse]:
+    """Answer a prediction from the cache without touching the model, if possible."""
+    try:
+        key = canonicalize_symptoms(prepare_symptoms([symptoms])[0])
+    except ValueError:
+        return None
+    predictions = prediction_cache.get(key, model_loader.generation)
+    if predictions is None:
+        return None
+    return PredictionResponse(predictions=predictions, input_symptoms=symptoms)
+
+async def run_predict_batch(symptoms_list: List[str]) -> List[PredictionResponse]:
+    """Predict a batch on the inference executor, reusing cached results where possible."""
+    cleaned_list = prepare_symptoms(symptoms_list)
+    keys = [canonicalize_symptoms(cleaned) for cleaned in cleaned_list]
+    generation = model_loader.generation
+    predictions = {}
+    for key in keys:
+        cached = prediction_cache.get(key, generation, count=False)
+        if cached is not None:
+            predictions[key] = cached
+
+    missing = list(dict.fromkeys(key for key in keys if key not in predictions))
+    if missing:
+        predictions.update(predict_from_index(missing))
+        missing = [key for key in missing if key not in predictions]
+    if missing:
+        # The forest sees the symptoms in the order of the first input with each key
+        inputs = {}
+        for key, cleaned in zip(keys, cleaned_list):
+            inputs.setdefault(key, cleaned)
+        computed = await inference_executor.run(predict_cleaned_in_worker, [inputs[key] for key in missing])
+        for key, result in zip(missing, computed):
+            # Results computed while a swap happened may come from the old model: don't cache them
+            if model_loader.generation == generation:
+                prediction_cache.set(key, result, generation)
+            predictions[key] = result
+
+    return [
+        PredictionResponse(predictions=predictions[key], input_symptoms=symptoms)
+        for symptoms, key in zip(symptoms_list, keys)
+    ]
+
+prediction_batcher = PredictionBatcher(
+    run_predict_batch,
+    max_batch_size=ML_BATCH_MAX_SIZE,
+    max_wait_ms=ML_BATCH_MAX_WAIT_MS
+)
+
+_loading_task: Optional[asyncio.Task] = None
+_swap_task: Optional[asyncio.Task] = None
+
+async def load_ml_components() -> None:
+    """Load the model off the event loop, then pre-warm the inference workers."""
+    loop = asyncio.get_running_loop()
+    if await loop.run_in_executor(None, model_loader.ensure_loaded):
+        await inference_executor.warm_up()
+
+async def start_ml_components():
+    """
+    Start loading the ML components in the background (registered as an app startup handler).
+
+    The API starts serving immediately; prediction routes answer 503 until the model is ready.
+    """
+    global _loading_task
+    if _loading_task is None:
+        _loading_task = asyncio.create_task(load_ml_components())
+
+def require_admin(current_user: User) -> None:
+    if current_user.role != "Admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can manage ML model versions."
+        )
+
+async def swap_model_version(version: str) -> None:
+    """Load a model version in the background and switch predictions over to it."""
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, model_loader.swap_version, version, ML_SWAP_DRAIN_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.error(f"Swapping to model version {version} failed: {str(e)}")
+        return
+    if inference_executor.mode == "process":
+        # Worker processes hold their own copy of the model: spawn fresh ones that load the new version.
+        # Until they replace the old workers, predictions may still come from the old model, so the
+        # generation the cache keys on only moves to the new model once the restart is done
+        await inference_executor.restart(initargs=(version,))
+        model_loader.advance_generation()
+
+def model_not_ready_error() -> HTTPException:
+    """503 response, with the loading state, for predictions that need the forest before it is ready."""
+    loading_status = model_loader.get_loading_status()
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Disease prediction model is not ready (state: {loading_status['state']}, "
+               f"progress: {loading_status['progress']:.0%}).",
+        headers={"Retry-After": "10"}
+    )
+
+def require_model_ready() -> None:
+    """Reject prediction requests with 503 until the ML components (or the index fallback) are loaded."""
+    if not model_loader.is_ready and not (ML_INDEX_FALLBACK and model_loader.get_disease_index() is not None):
+        raise model_not_ready_error()
+
+async def stop_ml_components():
+    """Stop background loading and the inference workers (registered as an app shutdown handler)."""
+    for task in (_loading_task, _swap_task):
+        if task is not None and not task.done():
+            task.cancel()
+    inference_executor.shutdown()
 
 @router.post("/predict", response_model=PredictionResponse, status_code=status.HTTP_200_OK)
 async def predict_diseases(
@@ -98,16 +226,73 @@ async def predict_diseases(
         if not symptoms_input.symptoms.strip():
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Symptoms cannot be empty.")
 
+        require_model_ready()
         logger.info(f"Prediction request from user {current_user.supabase_uid}.")
-        prediction_response = model_loader.predict(symptoms_input.symptoms)
+        prediction_response = (
+            get_cached_prediction(symptoms_input.symptoms)
+            or get_index_prediction(symptoms_input.symptoms)
+            or await prediction_batcher.submit(symptoms_input.symptoms)
+        )
         logger.info(f"Prediction successful for user {current_user.supabase_uid}.")
         return prediction_response
+    except HTTPException:
+        raise
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except ExecutorSaturatedError as e:
+        logger.warning(f"Shedding prediction request from user {current_user.supabase_uid}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error in predict_diseases for user {current_user.supabase_uid}: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+@router.post("/predict/batch", response_model=BatchPredictionResponse, status_code=status.HTTP_200_OK)
+async def predict_diseases_batch(
+    batch_input: BatchSymptomsInput,
+    current_user: User = Depends(jwt_bearer)
+):
+    """Predict diseases for many symptom strings in a single model call."""
+    try:
+        require_model_ready()
+        logger.info(
+            f"Batch prediction request of {len(batch_input.symptoms_list)} items from user {current_user.supabase_uid}."
+        )
+        results = await run_predict_batch(batch_input.symptoms_list)
+        return BatchPredictionResponse(results=results)
+    except HTTPException:
+        raise
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except ExecutorSaturatedError as e:
+        logger.warning(f"Shedding batch prediction request from user {current_user.supabase_uid}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in predict_diseases_batch for user {current_user.supabase_uid}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.get("/symptoms/suggest", response_model=SymptomSuggestionResponse)
+async def suggest_symptoms(
+    q: str = Query(..., min_length=1, max_length=100, description="Typed prefix"),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)
+):
+    """Suggest valid symptom terms for a typed prefix (no database or model access)."""
+    symptom_index = model_loader.get_symptom_index()
+    if symptom_index is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Symptom suggestions are not available yet.",
+            headers={"Retry-After": "10"}
+        )
+    suggestions = [
+        SymptomSuggestion(term=term, symptom=symptom, frequency=frequency)
+        for term, symptom, frequency in symptom_index.suggest(q, limit)
+    ]
+    return SymptomSuggestionResponse(query=q, suggestions=suggestions)
+
 @router.get("/health")
 async def health_check(
     db: Session = Depends(get_db),
@@ -118,7 +303,42 @@ async def health_check(
         logger.info(f"Health check requested by user {current_user.supabase_uid}.")
         status_info = model_loader.get_components_status()
         status_info["status"] = "healthy" if all(status_info.values()) else "unhealthy"
+        status_info["loading"] = model_loader.get_loading_status()
+        status_info["batching"] = prediction_batcher.get_stats()
+        status_info["executor"] = inference_executor.get_stats()
+        status_info["cache"] = prediction_cache.get_stats()
+        status_info["disease_index"] = {
+            "loaded": model_loader.get_disease_index() is not None,
+            "fast_path_max_symptoms": ML_INDEX_FAST_PATH_MAX_SYMPTOMS,
+            "fallback_enabled": ML_INDEX_FALLBACK,
+            **index_stats,
+        }
         return status_info
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Health check failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Health check failed: {str(e)}")
+
+@router.get("/models")
+async def list_model_versions(current_user: User = Depends(jwt_bearer)):
+    """List the available ML model versions (admin only)."""
+    require_admin(current_user)
+    return {
+        "active_version": model_loader.active_version,
+        "swap_in_progress": _swap_task is not None and not _swap_task.done(),
+        "last_swap": model_loader.last_swap,
+        "versions": model_loader.list_versions(),
+    }
+
+@router.post("/models/{version}/activate", status_code=status.HTTP_202_ACCEPTED)
+async def activate_model_version(version: str, current_user: User = Depends(jwt_bearer)):
+    """Load a model version in the background and hot-swap it in (admin only)."""
+    global _swap_task
+    require_admin(current_user)
+    if version not in discover_model_versions():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown model version: {version}")
+    if _swap_task is not None and not _swap_task.done():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A model swap is already in progress.")
+
+    logger.info(f"User {current_user.supabase_uid} requested a swap to model version {version}.")
+    _swap_task = asyncio.create_task(swap_model_version(version))
+    return {"message": f"Loading model version {version}.", "version": version}
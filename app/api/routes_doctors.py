@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, and_, select
 from sqlalchemy.exc import SQLAlchemyError
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.db.connection import get_db
+from app.db.async_connection import get_async_db, get_async_read_db
 from app.models.doctor import Doctor
 from app.schemas.doctor_schema import DoctorCreate, DoctorUpdate, DoctorResponse
 from app.models.hospital_doctor import HospitalDoctor
@@ -14,11 +16,72 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+async def fetch_doctor_hospitals(db: AsyncSession, doctor_ids: List[int]) -> Dict[int, List[dict]]:
+    """
+    Get the hospitals of several doctors, with their availability times, in one query.
+
+    Args:
+        db: Async database session
+        doctor_ids: Doctors to look up
+
+    Returns:
+        Dict mapping each doctor ID to its list of hospitals
+    """
+    hospitals_by_doctor = {doctor_id: [] for doctor_id in doctor_ids}
+    if not doctor_ids:
+        return hospitals_by_doctor
+
+    result = await db.execute(
+        select(
+            HospitalDoctor.doctorID,
+            Hospital,
+            HospitalDoctor.availability_start_time,
+            HospitalDoctor.availability_end_time
+        ).join(
+            HospitalDoctor,
+            Hospital.hospital_id == HospitalDoctor.hospitalID
+        ).where(
+            HospitalDoctor.doctorID.in_(doctor_ids)
+        )
+    )
+    for doctor_id, hospital, start_time, end_time in result.all():
+        hospitals_by_doctor[doctor_id].append({
+            "hospital_id": hospital.hospital_id,
+            "name": hospital.name,
+            "logo_url": hospital.logo_url,
+            "address": hospital.address,
+            "availability": {
+                "start": start_time.strftime("%H:%M"),
+                "end": end_time.strftime("%H:%M")
+            },
+            "emergency_services_available": hospital.emergency_services_available
+        })
+    return hospitals_by_doctor
+
+def format_doctor(doctor: Doctor, hospitals: List[dict]) -> dict:
+    """
+    Format a doctor and its hospitals for the response
+    """
+    return {
+        "doctor_id": doctor.doctor_id,
+        "title": doctor.title,
+        "name": doctor.name,
+        "specialization": doctor.specialization,
+        "profile_picture_url": doctor.profile_picture_url,
+        "created_at": doctor.created_at,
+        "updated_at": doctor.updated_at,
+        "hospitals": hospitals
+    }
+
+async def format_doctors(db: AsyncSession, doctors: List[Doctor]) -> List[dict]:
+    hospitals_by_doctor = await fetch_doctor_hospitals(db, [doctor.doctor_id for doctor in doctors])
+    return [format_doctor(doctor, hospitals_by_doctor[doctor.doctor_id]) for doctor in doctors]
+
 @router.get("/", response_model=List[DoctorResponse])
 async def get_doctors_with_hospitals(
     specialization: Optional[str] = Query(None, description="Filter by specialization"),
     hospital_id: Optional[int] = Query(None, description="Filter by hospital ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Retrieve all doctors with optional filtering by specialization and hospital ID.
@@ -26,62 +89,19 @@ async def get_doctors_with_hospitals(
     """
     try:
         # Base query to fetch doctors
-        query = db.query(Doctor)
+        query = select(Doctor)
 
         # Apply specialization filter if provided
         if specialization:
-            query = query.filter(Doctor.specialization == specialization)
+            query = query.where(Doctor.specialization == specialization)
 
         # Apply hospital filter if provided
         if hospital_id:
-            query = query.join(HospitalDoctor).filter(HospitalDoctor.hospitalID == hospital_id)
-
-        # Execute the query and fetch doctors
-        doctors = query.all()
-
-        # Fetch associated hospitals and availability for each doctor
-        doctors_with_hospitals = []
-        for doctor in doctors:
-            # Query to get hospitals with availability times
-            hospitals_data = db.query(
-                Hospital,
-                HospitalDoctor.availability_start_time,
-                HospitalDoctor.availability_end_time
-            ).join(
-                HospitalDoctor,
-                Hospital.hospital_id == HospitalDoctor.hospitalID
-            ).filter(
-                HospitalDoctor.doctorID == doctor.doctor_id
-            ).all()
-
-            # Format hospital data with actual availability times
-            hospital_list = []
-            for hospital, start_time, end_time in hospitals_data:
-                hospital_list.append({
-                    "hospital_id": hospital.hospital_id,
-                    "name": hospital.name,
-                    "logo_url": hospital.logo_url,
-                    "address": hospital.address,
-                    "availability": {
-                        "start": start_time.strftime("%H:%M"),
-                        "end": end_time.strftime("%H:%M")
-                    },
-                    "emergency_services_available": hospital.emergency_services_available
-                })
-
-            # Format doctor data with hospital list
-            doctors_with_hospitals.append({
-                "doctor_id": doctor.doctor_id,
-                "title": doctor.title,
-                "name": doctor.name,
-                "specialization": doctor.specialization,
-                "profile_picture_url": doctor.profile_picture_url,
-                "created_at": doctor.created_at,
-                "updated_at": doctor.updated_at,
-                "hospitals": hospital_list
-            })
-
-        return doctors_with_hospitals
+            query = query.join(HospitalDoctor).where(HospitalDoctor.hospitalID == hospital_id)
+
+        # Execute the query, then fetch the hospitals of all doctors at once
+        doctors = (await db.execute(query)).scalars().all()
+        return await format_doctors(db, doctors)
 
     except Exception as e:
         logger.error(f"Error fetching doctors with hospitals: {str(e)}")
@@ -92,20 +112,20 @@ async def get_all_doctors(
     specialization: Optional[str] = Query(None, description="Filter doctors by specialization"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     _: dict = Depends(JWTBearer())
 ):
     """
     Retrieve all doctors with optional filtering by specialization.
     """
     try:
-        query = db.query(Doctor)
+        query = select(Doctor)
         
         if specialization:
-            query = query.filter(Doctor.specialization == specialization)
+            query = query.where(Doctor.specialization == specialization)
         
-        doctors = query.offset(skip).limit(limit).all()
-        return doctors
+        doctors = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+        return await format_doctors(db, doctors)
     except SQLAlchemyError as e:
         logger.error(f"Database error retrieving doctors: {str(e)}")
         raise HTTPException(
@@ -116,20 +136,21 @@ async def get_all_doctors(
 @router.get("/{doctor_id}", response_model=DoctorResponse)
 async def get_doctor(
     doctor_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(JWTBearer())
 ):
     """
     Retrieve a specific doctor by ID.
     """
     try:
-        doctor = db.query(Doctor).filter(Doctor.doctor_id == doctor_id).first()
+        doctor = await db.get(Doctor, doctor_id)
         if not doctor:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Doctor with ID {doctor_id} not found"
             )
-        return doctor
+        hospitals_by_doctor = await fetch_doctor_hospitals(db, [doctor_id])
+        return format_doctor(doctor, hospitals_by_doctor[doctor_id])
     except SQLAlchemyError as e:
         logger.error(f"Database error retrieving doctor: {str(e)}")
         raise HTTPException(
@@ -222,7 +243,7 @@ async def search_doctors(
     hospital_id: Optional[int] = Query(None, description="Filter by hospital ID"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Search for doctors with multiple filter options.
@@ -236,7 +257,7 @@ async def search_doctors(
             )
 
         # Start with base query
-        base_query = db.query(Doctor).distinct()
+        base_query = select(Doctor).distinct()
 
         # Join with hospitals if we need to search by hospital name or hospital ID
         if hospital_name or hospital_id:
@@ -281,53 +302,11 @@ async def search_doctors(
 
         # Apply all filters
         if filters:
-            base_query = base_query.filter(and_(*filters))
-
-        # Apply pagination
-        doctors = base_query.offset(skip).limit(limit).all()
-
-        # Format response with hospitals and availability
-        doctors_with_details = []
-        for doctor in doctors:
-            # Get associated hospitals with availability
-            hospitals_data = db.query(
-                Hospital,
-                HospitalDoctor.availability_start_time,
-                HospitalDoctor.availability_end_time
-            ).join(
-                HospitalDoctor,
-                Hospital.hospital_id == HospitalDoctor.hospitalID
-            ).filter(
-                HospitalDoctor.doctorID == doctor.doctor_id
-            ).all()
-
-            # Format hospital list
-            hospital_list = []
-            for hospital, start_time, end_time in hospitals_data:
-                hospital_list.append({
-                    "hospital_id": hospital.hospital_id,
-                    "name": hospital.name,
-                    "logo_url": hospital.logo_url,
-                    "address": hospital.address,
-                    "availability": {
-                        "start": start_time.strftime("%H:%M"),
-                        "end": end_time.strftime("%H:%M")
-                    },
-                    "emergency_services_available": hospital.emergency_services_available
-                })
-
-            doctors_with_details.append({
-                "doctor_id": doctor.doctor_id,
-                "title": doctor.title,
-                "name": doctor.name,
-                "specialization": doctor.specialization,
-                "profile_picture_url": doctor.profile_picture_url,
-                "created_at": doctor.created_at,
-                "updated_at": doctor.updated_at,
-                "hospitals": hospital_list
-            })
-
-        return doctors_with_details
+            base_query = base_query.where(and_(*filters))
+
+        # Apply pagination, then fetch the hospitals of all doctors at once
+        doctors = (await db.execute(base_query.offset(skip).limit(limit))).scalars().all()
+        return await format_doctors(db, doctors)
 
     except SQLAlchemyError as e:
         logger.error(f"Database error searching doctors: {str(e)}")
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from typing import List, Optional
 import logging
 
 from app.db.connection import get_db
+from app.db.async_connection import get_async_db
 from app.models.hospital_doctor import HospitalDoctor
 from app.models.doctor import Doctor
 from app.schemas.hospital_doctor_schema import (
@@ -51,18 +54,17 @@ async def create_hospital_doctor(
 async def get_hospital_doctors(
     hospital_id: int,
     current_user: dict = Depends(JWTBearer()),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Retrieve all doctors associated with a specific hospital.
     """
     try:
-        hospital_doctors = (
-            db.query(HospitalDoctor)
+        hospital_doctors = (await db.execute(
+            select(HospitalDoctor)
             .options(joinedload(HospitalDoctor.doctor))
-            .filter(HospitalDoctor.hospitalID == hospital_id)
-            .all()
-        )
+            .where(HospitalDoctor.hospitalID == hospital_id)
+        )).scalars().all()
 
         response = []
         for hd in hospital_doctors:
@@ -87,18 +89,17 @@ async def get_hospital_doctors(
 async def get_doctor_hospitals(
     doctor_id: int,
     current_user: dict = Depends(JWTBearer()),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Retrieve all hospitals associated with a specific doctor.
     """
     try:
-        doctor_hospitals = (
-            db.query(HospitalDoctor)
-            .options(joinedload(HospitalDoctor.hospital))
-            .filter(HospitalDoctor.doctorID == doctor_id)
-            .all()
-        )
+        doctor_hospitals = (await db.execute(
+            select(HospitalDoctor)
+            .options(joinedload(HospitalDoctor.hospital), joinedload(HospitalDoctor.doctor))
+            .where(HospitalDoctor.doctorID == doctor_id)
+        )).scalars().all()
 
         response = []
         for dh in doctor_hospitals:
@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from typing import List
-from app.db.connection import get_db
+from app.db.connection import get_db, get_read_db
 from app.models.hospital import Hospital
 from app.schemas.hospital_schema import HospitalCreate, HospitalUpdate, HospitalResponse
 from app.core.jwt_auth import JWTBearer
@@ -38,7 +38,7 @@ async def create_hospital(
 @router.get("/all", response_model=List[HospitalResponse])
 async def get_all_hospitals(
     current_user: dict = Depends(JWTBearer()),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         hospitals = db.query(Hospital).all()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from typing import List, Optional
@@ -9,8 +9,16 @@ from app.schemas.patient_schema import (
     PatientUpdate,
     PatientResponse,
     PatientStatus,
+    PatientImportReport,
 )
-from app.services.supabase_service import SupabaseService
+from app.services.patient_import import (
+    PATIENT_IMPORT_MAX_ROWS,
+    PatientImportError,
+    PatientImporter,
+    parse_patient_file,
+)
+from app.services.supabase_service import SupabaseService, get_supabase_service
+from app.services.supabase_client import SupabaseUnavailableError
 from app.core.jwt_auth import JWTBearer
 import logging
 
@@ -33,7 +41,7 @@ async def get_patients(db: Session = Depends(get_db)):
 async def add_patient(
     patient: PatientCreate,
     db: Session = Depends(get_db),
-    supabase_service: SupabaseService = Depends(SupabaseService),  # Inject SupabaseService
+    supabase_service: SupabaseService = Depends(get_supabase_service),  # Shared SupabaseService
 ):
     """
     Add a new patient to the database.
@@ -92,10 +100,45 @@ async def add_patient(
         db.rollback()
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error occurred")
+    except SupabaseUnavailableError as e:
+        logger.error(f"Supabase unavailable: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
     except Exception as e:
         logger.error(f"Supabase error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create user in Supabase")
 
+@router.post("/import", response_model=PatientImportReport)
+async def import_patients(
+    file: UploadFile = File(...),
+    current_user: User = Depends(JWTBearer()),
+    db: Session = Depends(get_db),
+    supabase_service: SupabaseService = Depends(get_supabase_service),
+):
+    """
+    Bulk-create patients from a CSV or JSON file and report the outcome of every row.
+    """
+    if current_user.role not in ["Admin", "Staff"]:
+        raise HTTPException(status_code=403, detail="Not authorized to import patients")
+
+    try:
+        records = parse_patient_file(await file.read(), file.filename, file.content_type)
+    except PatientImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not records:
+        raise HTTPException(status_code=400, detail="The file contains no patients")
+    if len(records) > PATIENT_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {PATIENT_IMPORT_MAX_ROWS} patients can be imported at once"
+        )
+
+    try:
+        return await PatientImporter(db, supabase_service).run(records)
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error occurred")
+
 # Update a patient
 @router.put("/{patient_id}", response_model=PatientResponse)
 async def update_patient(
@@ -15,7 +15,7 @@ router = APIRouter()
 @router.post("/user/profile-picture")
 async def upload_user_profile_picture(
     file: UploadFile = File(...),
-    current_user: User = Depends(JWTBearer()),  # Note: This returns a User object, not dict
+    current_user: User = Depends(JWTBearer(load_user=True)),  # Note: This returns a User object, not dict
     db: Session = Depends(get_db)
 ):
     """Upload a user's profile picture to Cloudinary"""
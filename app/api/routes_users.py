@@ -5,7 +5,7 @@ from typing import List
 from app.db.connection import get_db
 from app.models.user import User
 from app.schemas.user_schema import UserCreate, UserUpdate, UserResponse
-from app.core.jwt_auth import JWTBearer
+from app.core.jwt_auth import JWTBearer, user_cache
 import hashlib
 import logging
 
@@ -49,6 +49,7 @@ async def update_profile(
             setattr(user, field, value)
         db.commit()
         db.refresh(user)
+        user_cache.invalidate_user(user.supabase_uid)
         return user
     except SQLAlchemyError as e:
         db.rollback()
@@ -1,22 +1,79 @@
 from fastapi.security import HTTPBearer
 from fastapi import HTTPException, Request, Depends, status
-from supabase import create_client
+import asyncio
+import logging
 import os
-from typing import Optional
+import jwt
+from typing import Optional, Tuple, Union
 from sqlalchemy.orm import Session
 from app.db.connection import get_db
 from app.models.user import User
+from app.core.jwt_verifier import LocalJWTVerifier, InvalidTokenError, JWT_LOCAL_VERIFICATION
+from app.core.user_cache import AuthenticatedUserCache, UserSnapshot
+from app.services.supabase_client import SupabaseUnavailableError, get_supabase_gateway
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+logger = logging.getLogger(__name__)
+
+# Shared Supabase client (thread-offloaded, with timeouts and a circuit breaker)
+supabase_gateway = get_supabase_gateway()
+supabase = supabase_gateway.anon
+
+# Authenticated users are cached per token for at most this long (and never past the token's exp);
+# role and profile changes made through this API invalidate the cache right away
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "4096"))
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "300"))
+
+jwt_verifier = LocalJWTVerifier()
+user_cache = AuthenticatedUserCache(max_size=AUTH_USER_CACHE_SIZE, ttl_seconds=AUTH_USER_CACHE_TTL_SECONDS)
+
+def _unverified_expiry(token: str) -> Optional[float]:
+    # Only used once Supabase has accepted the token
+    try:
+        return jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.InvalidTokenError:
+        return None
+
+async def get_token_identity(token: str) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Get the Supabase user id and expiry of an access token.
+
+    The token is verified locally when possible; Supabase is only asked (off
+    the event loop) when local verification is disabled or undecided.
+    Raises SupabaseUnavailableError if Supabase is needed but cannot be reached.
+
+    Returns:
+        The user id (None if Supabase rejects the token) and the token's exp
+
+    Raises:
+        InvalidTokenError: if the token is definitely invalid
+    """
+    if JWT_LOCAL_VERIFICATION:
+        if jwt_verifier.needs_refresh(token):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, jwt_verifier.refresh_keys)
+        claims = jwt_verifier.verify(token)
+        if claims is not None:
+            return claims["sub"], claims["exp"]
+
+    supabase_user = await supabase_gateway.run(supabase.auth.get_user, token, idempotent=True)
+    if not supabase_user or not supabase_user.user:
+        return None, None
+    return supabase_user.user.id, _unverified_expiry(token)
 
 class JWTBearer(HTTPBearer):
+    def __init__(self, load_user: bool = False, **kwargs):
+        """
+        Args:
+            load_user: Return the User row instead of a cached UserSnapshot
+                (for routes that modify the authenticated user)
+        """
+        super().__init__(**kwargs)
+        self.load_user = load_user
+
     async def __call__(self, request: Request, db: Session = Depends(get_db)):
         credentials = await super().__call__(request)
         token = credentials.credentials
-        user = await self.verify_jwt(token, db)
+        user = await self.verify_jwt(token, db, load_user=self.load_user)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -25,29 +82,47 @@ class JWTBearer(HTTPBearer):
         return user
 
     @staticmethod
-    async def verify_jwt(token: str, db: Session) -> Optional[User]:
-        """Verify the Supabase JWT and retrieve the corresponding User object."""
+    async def verify_jwt(token: str, db: Session, load_user: bool = False) -> Optional[Union[User, UserSnapshot]]:
+        """
+        Verify the Supabase JWT and retrieve the corresponding user.
+
+        Returns a detached UserSnapshot, served from the per-token cache when
+        possible, or the User object itself when load_user is set.
+        """
         try:
-            # Verify the JWT and get the Supabase user
-            supabase_user = supabase.auth.get_user(token)
-            if not supabase_user or not supabase_user.user:
+            if not load_user:
+                snapshot = user_cache.get(token)
+                if snapshot is not None:
+                    return snapshot
+
+            # Verify the JWT and get the Supabase user id
+            supabase_uid, expires_at = await get_token_identity(token)
+            if not supabase_uid:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid authentication credentials"
                 )
 
             # Fetch the corresponding User object from your database
-            user = db.query(User).filter(User.supabase_uid == supabase_user.user.id).first()
+            user = db.query(User).filter(User.supabase_uid == supabase_uid).first()
             if not user:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="User not found in database"
                 )
 
-            return user  # Return the SQLAlchemy User object
+            snapshot = UserSnapshot.from_user(user)
+            user_cache.set(token, snapshot, expires_at)
+            return user if load_user else snapshot
+        except SupabaseUnavailableError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers={"Retry-After": "30"}
+            )
         except Exception as e:
             # Handle any exceptions (e.g., invalid token, network errors)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials"
-            )
\ No newline at end of file
+            )
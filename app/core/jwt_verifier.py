@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, Optional
+import jwt
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+# Legacy HS256 projects sign access tokens with the project's JWT secret
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+# Projects with asymmetric signing keys publish them as a JWKS
+SUPABASE_JWKS_URL = os.getenv(
+    "SUPABASE_JWKS_URL",
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else ""
+)
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWT_ISSUER = os.getenv(
+    "SUPABASE_JWT_ISSUER", f"{SUPABASE_URL.rstrip('/')}/auth/v1" if SUPABASE_URL else ""
+)
+# Verify access tokens in-process; tokens that cannot be verified locally go to Supabase
+JWT_LOCAL_VERIFICATION = os.getenv("JWT_LOCAL_VERIFICATION", "true").lower() in ("1", "true", "yes")
+JWT_JWKS_REFRESH_SECONDS = float(os.getenv("JWT_JWKS_REFRESH_SECONDS", "600"))
+JWT_LEEWAY_SECONDS = float(os.getenv("JWT_LEEWAY_SECONDS", "10"))
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256", "EdDSA")
+# Stale keys or an unknown key id trigger a JWKS fetch at most this often
+JWKS_MIN_REFRESH_SECONDS = 60
+JWKS_TIMEOUT_SECONDS = 5
+
+class InvalidTokenError(Exception):
+    """The token is definitely not valid (malformed, expired, wrong audience or issuer, forged)."""
+    pass
+
+class LocalJWTVerifier:
+    """
+    Verifies Supabase access tokens without a round-trip to Supabase.
+
+    Signature, expiry, audience and issuer are checked against the project's
+    JWT secret (HS256) or its published signing keys (JWKS), which are cached
+    and refreshed every refresh_seconds. verify() returns the claims of a
+    valid token, raises InvalidTokenError for a token that is definitely
+    invalid, and returns None when it cannot decide locally (no key for its
+    algorithm, unknown key id); the caller then asks Supabase. An HS256
+    token that fails the configured secret is rejected, not sent to
+    Supabase, so forged tokens cannot each cost a remote call (update
+    SUPABASE_JWT_SECRET when the project secret is rotated).
+    """
+
+    def __init__(
+        self,
+        jwt_secret: Optional[str] = SUPABASE_JWT_SECRET,
+        jwks_url: Optional[str] = SUPABASE_JWKS_URL,
+        audience: str = SUPABASE_JWT_AUDIENCE,
+        issuer: Optional[str] = SUPABASE_JWT_ISSUER,
+        refresh_seconds: float = JWT_JWKS_REFRESH_SECONDS,
+        leeway_seconds: float = JWT_LEEWAY_SECONDS
+    ):
+        self.jwt_secret = jwt_secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.issuer = issuer or None
+        self.refresh_seconds = refresh_seconds
+        self.leeway_seconds = leeway_seconds
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at: Optional[float] = None
+        self._last_attempt_at: Optional[float] = None
+        self._refresh_lock = threading.Lock()
+        self.stats = {"local": 0, "invalid": 0, "ambiguous": 0, "jwks_refreshes": 0, "jwks_errors": 0}
+
+    @property
+    def keys_stale(self) -> bool:
+        if not self.jwks_url:
+            return False
+        return self._fetched_at is None or time.time() - self._fetched_at > self.refresh_seconds
+
+    def _attempted_recently(self, min_interval: float) -> bool:
+        return self._last_attempt_at is not None and time.time() - self._last_attempt_at < min_interval
+
+    def refresh_keys(self, min_interval: float = JWKS_MIN_REFRESH_SECONDS) -> None:
+        """
+        Fetch the JWKS (blocking; run it off the event loop).
+
+        Failures keep the previous keys. Concurrent callers share one fetch, and
+        a fetch is skipped if one was attempted less than min_interval seconds ago.
+        """
+        if not self.jwks_url:
+            return
+        with self._refresh_lock:
+            if self._attempted_recently(min_interval):
+                return
+            self._last_attempt_at = time.time()
+            try:
+                with urllib.request.urlopen(self.jwks_url, timeout=JWKS_TIMEOUT_SECONDS) as response:
+                    jwks = json.load(response)
+                keys = {}
+                for key_data in jwks.get("keys", []):
+                    try:
+                        key = jwt.PyJWK(key_data)
+                    except jwt.PyJWKError as e:
+                        logger.warning(f"Skipping unusable JWKS key {key_data.get('kid')}: {str(e)}")
+                        continue
+                    if key.key_id:
+                        keys[key.key_id] = key
+                self._keys = keys
+                self._fetched_at = time.time()
+                self.stats["jwks_refreshes"] += 1
+                logger.info(f"Fetched {len(keys)} JWT signing keys from {self.jwks_url}.")
+            except Exception as e:
+                self.stats["jwks_errors"] += 1
+                logger.warning(f"Could not refresh JWT signing keys: {str(e)}")
+
+    def needs_refresh(self, token: str) -> bool:
+        """Whether verifying this token should wait for a JWKS refresh (stale keys or unknown key id)."""
+        if not self.jwks_url or self._attempted_recently(JWKS_MIN_REFRESH_SECONDS):
+            return False
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError:
+            return False
+        if header.get("alg") not in ASYMMETRIC_ALGORITHMS:
+            return False
+        return self.keys_stale or header.get("kid") not in self._keys
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Verify a token locally (CPU only, no I/O).
+
+        Returns:
+            The token's claims, or None if it cannot be verified locally
+
+        Raises:
+            InvalidTokenError: if the token is definitely invalid
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError as e:
+            self.stats["invalid"] += 1
+            raise InvalidTokenError(str(e))
+
+        algorithm = header.get("alg")
+        if algorithm == "HS256" and self.jwt_secret:
+            key = self.jwt_secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS and header.get("kid") in self._keys:
+            key = self._keys[header["kid"]]
+        else:
+            self.stats["ambiguous"] += 1
+            return None
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.leeway_seconds,
+                options={"require": ["exp", "sub"]}
+            )
+        except jwt.InvalidTokenError as e:
+            self.stats["invalid"] += 1
+            raise InvalidTokenError(str(e))
+
+        self.stats["local"] += 1
+        return claims
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": JWT_LOCAL_VERIFICATION,
+            "hs256_secret_configured": bool(self.jwt_secret),
+            "signing_keys": len(self._keys),
+            "keys_fetched_at": self._fetched_at,
+        }
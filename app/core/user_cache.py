@@ -0,0 +1,125 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Detached copy of the fields routes read from the authenticated user."""
+    user_id: int
+    supabase_uid: str
+    role: str
+    email: str
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(user_id=user.user_id, supabase_uid=user.supabase_uid, role=user.role, email=user.email)
+
+def token_key(token: str) -> str:
+    """Hash a bearer token so the cache never holds the token itself."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class AuthenticatedUserCache:
+    """
+    Bounded LRU cache from access token to the authenticated user's snapshot.
+
+    An entry never outlives its token (expires_at is the token's exp) nor
+    ttl_seconds. Entries are also indexed by Supabase user id, so a role or
+    profile change can drop every cached token of that user at once.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl_seconds: float = 300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, UserSnapshot]]" = OrderedDict()
+        self._keys_by_uid: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _remove(self, key: str) -> None:
+        _, snapshot = self._entries.pop(key)
+        keys = self._keys_by_uid.get(snapshot.supabase_uid)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_uid[snapshot.supabase_uid]
+
+    def get(self, token: str) -> Optional[UserSnapshot]:
+        """Get the cached user of a token, or None when missing or expired."""
+        if self.max_size <= 0:
+            return None
+        key = token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token: str, snapshot: UserSnapshot, expires_at: Optional[float] = None) -> None:
+        """
+        Cache the user of a token.
+
+        Args:
+            token: Bearer token
+            snapshot: The token's user
+            expires_at: The token's exp (epoch seconds); unknown expiry is not cached
+        """
+        if self.max_size <= 0 or expires_at is None:
+            return
+        expires_at = min(expires_at, time.time() + self.ttl_seconds)
+        if expires_at <= time.time():
+            return
+        key = token_key(token)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, snapshot)
+            self._keys_by_uid.setdefault(snapshot.supabase_uid, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_user(self, supabase_uid: str) -> None:
+        """Drop every cached token of a user (after a role or profile change, or deletion)."""
+        with self._lock:
+            for key in list(self._keys_by_uid.get(supabase_uid, ())):
+                self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_token(self, token: str) -> None:
+        """Drop every cached token of the user a token belongs to (after that user logs out)."""
+        with self._lock:
+            entry = self._entries.get(token_key(token))
+        if entry is not None:
+            self.invalidate_user(entry[1].supabase_uid)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_uid.clear()
+            self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
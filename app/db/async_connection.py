@@ -0,0 +1,100 @@
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from typing import Any, AsyncIterator, Dict
+import asyncio
+import os
+import logging
+from app.db.connection import (
+    DB_CONNECT_TIMEOUT,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_TIMEOUT,
+    engine,
+    pool_stats,
+    replica_router,
+    track_pool,
+)
+
+logger = logging.getLogger(__name__)
+
+# Async driver for the read paths served without blocking the event loop.
+# Defaults to the database the sync engine connected to, through aiomysql.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+# Pool of each async engine, on top of the sync engine's: per worker process, a server receives up to
+# DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW connections
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "5"))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "5"))
+
+def to_async_url(url: URL) -> URL:
+    if url.get_backend_name() == "mysql":
+        return url.set(drivername="mysql+aiomysql")
+    return url
+
+def get_async_database_url() -> URL:
+    if ASYNC_DATABASE_URL:
+        return make_url(ASYNC_DATABASE_URL)
+    return to_async_url(engine.url)
+
+def build_async_engine(url: URL) -> AsyncEngine:
+    """Create an async engine with its own pool (timeouts and recycling as for the sync engines)."""
+    return create_async_engine(
+        url,
+        pool_size=DB_ASYNC_POOL_SIZE,
+        max_overflow=DB_ASYNC_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={"connect_timeout": DB_CONNECT_TIMEOUT} if url.get_backend_name() == "mysql" else {}
+    )
+
+try:
+    async_database_url = get_async_database_url()
+    async_engine = build_async_engine(async_database_url)
+    async_pool_counters = track_pool(async_engine.sync_engine)
+
+    # Async engines of the read replicas, by replica index
+    async_replica_engines = []
+    for replica in replica_router.replicas:
+        replica_engine = build_async_engine(to_async_url(replica.engine.url))
+        replica_router.watch(replica_engine.sync_engine, replica)
+        async_replica_engines.append(replica_engine)
+
+    # Objects stay usable after commit (no implicit refresh, which would need an await)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+except Exception as e:
+    logger.error(f"Failed to initialize async database engine: {str(e)}")
+    raise
+
+def get_async_pool_stats() -> Dict[str, Any]:
+    """Get the async engine's pool size, utilization and event counters."""
+    return pool_stats(async_engine.sync_engine, async_pool_counters, DB_ASYNC_POOL_SIZE, DB_ASYNC_MAX_OVERFLOW)
+
+# Dependency for async database sessions (relationships must be loaded eagerly)
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Error during async database session: {str(e)}")
+            await db.rollback()
+            raise
+
+# Async dependency for read-only routes that can tolerate DB_REPLICA_MAX_LAG_SECONDS of staleness
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    if replica_router.needs_check():
+        await asyncio.to_thread(replica_router.check)
+    replica = replica_router.choose()
+    bind = async_replica_engines[replica.index] if replica else async_engine
+    async with AsyncSessionLocal(bind=bind) as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Error during async read-only database session: {str(e)}")
+            await db.rollback()
+            raise
+
+async def dispose_async_engines() -> None:
+    """Close the pooled connections of every async engine."""
+    for async_db_engine in [async_engine, *async_replica_engines]:
+        await async_db_engine.dispose()
@@ -1,8 +1,13 @@
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.exc import OperationalError, ArgumentError
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional
+import itertools
 import os
+import threading
+import time
 import logging
 
 # Configure logging
@@ -12,55 +17,282 @@ logger = logging.getLogger(__name__)
 # Load .env file
 load_dotenv()
 
-def get_database_url():
-    # Try primary MySQL connection first
-    primary_url = os.getenv("DATABASE_URL")
-    
-    try:
-        # Test primary connection
-        engine = create_engine(primary_url)
-        with engine.connect() as conn:
-            inspector = inspect(conn)
-            print("Connected to primary MySQL database. Tables:", inspector.get_table_names())
-        return primary_url
-        
-    except OperationalError as e:
-        logger.warning(f"Primary MySQL connection failed: {str(e)}")
-        logger.info("Attempting to connect to phpMyAdmin...")
-        
-        # phpMyAdmin connection without password
-        phpmyadmin_url = "mysql+pymysql://root@localhost/onehealthportal"
-        
+DATABASE_URL = os.getenv("DATABASE_URL")
+# Local phpMyAdmin database (without password), used when the primary database is unreachable
+FALLBACK_DATABASE_URL = os.getenv("FALLBACK_DATABASE_URL", "mysql+pymysql://root@localhost/onehealthportal")
+
+# Connections kept open, and extra connections opened under load (closed again when returned);
+# the defaults are SQLAlchemy's. Every engine (primary and each replica) gets its own pool in every
+# worker process, so a server can receive up to workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# connections from the sync engines; keep the total below MySQL's max_connections (151 by default)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Connections are replaced after this many seconds (below MySQL's wait_timeout)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Test connections on checkout so ones dropped by the server are replaced transparently
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Driver timeouts in seconds; read/write timeouts are only set when configured
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+DB_READ_TIMEOUT = os.getenv("DB_READ_TIMEOUT")
+DB_WRITE_TIMEOUT = os.getenv("DB_WRITE_TIMEOUT")
+
+# Read replicas (comma-separated URLs) for dashboards and admin listings; without them those reads use the primary
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Replicas further behind than this (or with replication stopped) are skipped until they catch up
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("DB_REPLICA_CHECK_INTERVAL_SECONDS", "10"))
+
+def build_engine(url: str) -> Engine:
+    """Create an engine with the configured pool and driver timeouts."""
+    connect_args = {"connect_timeout": DB_CONNECT_TIMEOUT}
+    if DB_READ_TIMEOUT:
+        connect_args["read_timeout"] = int(DB_READ_TIMEOUT)
+    if DB_WRITE_TIMEOUT:
+        connect_args["write_timeout"] = int(DB_WRITE_TIMEOUT)
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args
+    )
+
+def probe(engine: Engine) -> None:
+    """Run a trivial query; raises OperationalError if the database is unreachable."""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+def create_database_engine() -> Engine:
+    """
+    Create the application's engine.
+
+    The primary database is tried first and the phpMyAdmin database second;
+    each candidate is probed with one SELECT 1, and the engine that answers is
+    the one the application uses (its probe connection stays in the pool).
+    """
+    candidates = [("primary MySQL", DATABASE_URL), ("phpMyAdmin", FALLBACK_DATABASE_URL)]
+    for name, url in candidates:
+        if not url:
+            continue
+        engine = build_engine(url)
         try:
-            # Test phpMyAdmin connection
-            engine = create_engine(phpmyadmin_url)
-            with engine.connect() as conn:
-                inspector = inspect(conn)
-                print("Connected to phpMyAdmin database. Tables:", inspector.get_table_names())
-            return phpmyadmin_url
-            
+            probe(engine)
         except OperationalError as e:
-            logger.error(f"Both MySQL and phpMyAdmin connections failed: {str(e)}")
-            raise RuntimeError("Could not establish database connection. Please check your configuration.")
+            logger.warning(f"Could not connect to the {name} database: {str(e)}")
+            engine.dispose()
+            continue
+        logger.info(f"Connected to the {name} database at {engine.url.render_as_string(hide_password=True)}.")
+        return engine
+
+    logger.error("Both MySQL and phpMyAdmin connections failed.")
+    raise RuntimeError("Could not establish database connection. Please check your configuration.")
+
+def track_pool(engine: Engine) -> Dict[str, int]:
+    """Count connection-pool events of an engine; returns the live counters for pool_stats()."""
+    counters = {"connects": 0, "checkouts": 0, "invalidations": 0, "peak_checked_out": 0}
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        counters["connects"] += 1
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters["checkouts"] += 1
+        counters["peak_checked_out"] = max(counters["peak_checked_out"], engine.pool.checkedout())
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        counters["invalidations"] += 1
+
+    return counters
+
+def pool_stats(
+    engine: Engine,
+    counters: Dict[str, int],
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW
+) -> Dict[str, Any]:
+    """Get an engine's pool size, utilization and event counters."""
+    pool = engine.pool
+    checked_out = pool.checkedout()
+    capacity = pool_size + max_overflow
+    return {
+        **counters,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "utilization": checked_out / capacity if capacity else 0.0,
+        "timeout_seconds": DB_POOL_TIMEOUT,
+    }
+
+def replica_lag(engine: Engine) -> Optional[float]:
+    """
+    Get how many seconds a replica is behind its source.
+
+    Returns:
+        The lag, 0 for a server that is not replicating, or None if replication is stopped
+    """
+    with engine.connect() as conn:
+        try:
+            status = conn.exec_driver_sql("SHOW REPLICA STATUS").mappings().first()
+        except ProgrammingError:
+            # MySQL before 8.0.22
+            status = conn.exec_driver_sql("SHOW SLAVE STATUS").mappings().first()
+    if status is None:
+        return 0.0
+    lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+    return None if lag is None else float(lag)
+
+class Replica:
+    """A read replica's engine and its last known lag."""
+
+    def __init__(self, index: int, url: str):
+        self.index = index
+        self.engine = build_engine(url)
+        self.pool_counters = track_pool(self.engine)
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+class ReplicaRouter:
+    """
+    Routes read-only sessions to replicas that are within the allowed lag.
+
+    Each replica's lag is checked at most every check_interval seconds (by
+    whichever request finds it stale; others carry on with the last result).
+    Reads go round-robin to the healthy replicas and fall back to the primary
+    when none is healthy. A replica that drops a connection is taken out of
+    rotation until its next check.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        max_lag_seconds: float = DB_REPLICA_MAX_LAG_SECONDS,
+        check_interval: float = DB_REPLICA_CHECK_INTERVAL_SECONDS
+    ):
+        self.replicas = [Replica(index, url) for index, url in enumerate(urls)]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._round_robin = itertools.count()
+        self._check_lock = threading.Lock()
+        self.stats = {"replica_reads": 0, "primary_fallbacks": 0}
+        for replica in self.replicas:
+            self.watch(replica.engine, replica)
+
+    def watch(self, engine: Engine, replica: Replica) -> None:
+        """Take `replica` out of rotation when `engine` (one of its engines) loses a connection."""
+        @event.listens_for(engine, "handle_error")
+        def on_error(context):
+            if context.is_disconnect:
+                self.mark_unhealthy(replica, str(context.original_exception))
+
+    def mark_unhealthy(self, replica: Replica, error: str) -> None:
+        if replica.healthy:
+            logger.warning(f"Read replica {replica.index} taken out of rotation: {error}")
+        replica.healthy = False
+        replica.error = error
+        replica.checked_at = time.monotonic()
+
+    def needs_check(self) -> bool:
+        now = time.monotonic()
+        return any(
+            replica.checked_at is None or now - replica.checked_at >= self.check_interval
+            for replica in self.replicas
+        )
+
+    def check(self) -> None:
+        """Re-check the lag of stale replicas (blocking; concurrent callers skip it)."""
+        if not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            for replica in self.replicas:
+                if replica.checked_at is not None and now - replica.checked_at < self.check_interval:
+                    continue
+                was_healthy = replica.healthy
+                try:
+                    replica.lag_seconds = replica_lag(replica.engine)
+                    replica.error = None if replica.lag_seconds is not None else "Replication is stopped"
+                except Exception as e:
+                    replica.lag_seconds = None
+                    replica.error = str(e)
+                replica.healthy = replica.lag_seconds is not None and replica.lag_seconds <= self.max_lag_seconds
+                replica.checked_at = time.monotonic()
+                if was_healthy and not replica.healthy:
+                    logger.warning(
+                        f"Read replica {replica.index} taken out of rotation "
+                        f"(lag: {replica.lag_seconds}, error: {replica.error})."
+                    )
+                elif replica.healthy and not was_healthy:
+                    logger.info(f"Read replica {replica.index} in rotation (lag: {replica.lag_seconds}s).")
+        finally:
+            self._check_lock.release()
+
+    def choose(self) -> Optional[Replica]:
+        """Pick a healthy replica, or None to read from the primary."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            if self.replicas:
+                self.stats["primary_fallbacks"] += 1
+            return None
+        self.stats["replica_reads"] += 1
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "max_lag_seconds": self.max_lag_seconds,
+            "replicas": [
+                {
+                    "url": replica.engine.url.render_as_string(hide_password=True),
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag_seconds,
+                    "error": replica.error,
+                    "pool": pool_stats(replica.engine, replica.pool_counters),
+                }
+                for replica in self.replicas
+            ],
+        }
 
 try:
-    # Get working database URL
-    DATABASE_URL = get_database_url()
-    print(f"Using database URL: {DATABASE_URL}")
-    
     # Initialize database engine
-    engine = create_engine(DATABASE_URL)
-    
+    engine = create_database_engine()
+    pool_counters = track_pool(engine)
+
     # Create SessionLocal class
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    
+
+    # Read replicas (none unless DATABASE_REPLICA_URLS is set)
+    replica_router = ReplicaRouter(DATABASE_REPLICA_URLS)
+
     # Declare Base
     Base = declarative_base()
-    
+
 except Exception as e:
     logger.error(f"Failed to initialize database connection: {str(e)}")
     raise
 
+def check_database() -> bool:
+    """Whether the database answers, using a pooled connection."""
+    try:
+        probe(engine)
+        return True
+    except Exception as e:
+        logger.error(f"Database health check failed: {str(e)}")
+        return False
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Get the connection pool's size, utilization and event counters."""
+    return pool_stats(engine, pool_counters)
+
 # Dependency for database sessions
 def get_db():
     db = SessionLocal()
@@ -71,4 +303,19 @@ def get_db():
         db.rollback()
         raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency for read-only routes that can tolerate DB_REPLICA_MAX_LAG_SECONDS of staleness
+def get_read_db():
+    if replica_router.needs_check():
+        replica_router.check()
+    replica = replica_router.choose()
+    db = SessionLocal(bind=replica.engine) if replica else SessionLocal()
+    try:
+        yield db
+    except Exception as e:
+        logger.error(f"Error during read-only database session: {str(e)}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
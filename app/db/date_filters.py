@@ -0,0 +1,39 @@
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from sqlalchemy import and_, true
+from sqlalchemy.sql.elements import ColumnElement
+
+# Filters on DATETIME/TIMESTAMP columns by calendar day.
+# `DATE(column) = day` hides the column inside a function, so MySQL cannot use an
+# index on it and scans every candidate row; the half-open range
+# `column >= day AND column < day + 1` selects the same rows and can use the index.
+
+def start_of_day(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+def on_day(column, day: date) -> ColumnElement:
+    """
+    Rows whose datetime falls on `day`: [day 00:00, next day 00:00).
+
+    Args:
+        column: DateTime column, e.g. Appointment.appointment_date
+        day: Calendar day
+    """
+    start = start_of_day(day)
+    return and_(column >= start, column < start + timedelta(days=1))
+
+def between_days(column, start_date: Optional[date] = None, end_date: Optional[date] = None) -> ColumnElement:
+    """
+    Rows whose datetime falls between two calendar days, both inclusive.
+
+    Args:
+        column: DateTime column
+        start_date: First day (unbounded if None)
+        end_date: Last day (unbounded if None)
+    """
+    criteria = []
+    if start_date:
+        criteria.append(column >= start_of_day(start_date))
+    if end_date:
+        criteria.append(column < start_of_day(end_date) + timedelta(days=1))
+    return and_(*criteria) if criteria else true()
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.connection import engine, Base
+from app.db.connection import engine, Base, check_database, get_pool_stats, replica_router
+from app.db.async_connection import dispose_async_engines, get_async_pool_stats
 from datetime import datetime
 
 # Import all routers
@@ -13,8 +14,15 @@ from app.api.routes_payments import router as payments_router
 from app.api.routes_hospital_doctor import router as hospital_doctor_router
 from app.api.routes_doctors import router as doctors_router
 from app.api.routes_upload import router as upload_router
-from app.api.routes_disease_prediction import router as disease_prediction_router
+from app.api.routes_disease_prediction import (
+    router as disease_prediction_router,
+    model_loader,
+    start_ml_components,
+    stop_ml_components,
+)
 from app.api.routes_auth import router as auth_router
+from app.core.jwt_auth import jwt_verifier, user_cache
+from app.services.supabase_client import get_supabase_gateway
 from app.api.routes_dashboard import router as dashboard_router
 from app.api.routes_patients import router as patients_router
 from app.api.routes_dashboard_appointments import router as dashboard_appointments_router
@@ -30,6 +38,7 @@ from app.models.doctor import Doctor
 from app.models.payment import Payment
 from app.models.lab_test import LabTest
 from app.models.hospital_doctor import HospitalDoctor
+from app.models.counter import Counter
 
 import logging
 import os
@@ -90,6 +99,16 @@ app.include_router(dashboard_appointments_router, prefix="/api/dashboard/appoint
 app.include_router(dashboard_doctor_router, prefix="/api/dashboard/doctors", tags=["Dashboard Doctors"])
 app.include_router(dashboard_user_router, prefix="/api/dashboard", tags=["Dashboard Users"])  # Add the new router
 
+@app.on_event("startup")
+async def startup_event():
+    await start_ml_components()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_ml_components()
+    get_supabase_gateway().close()
+    await dispose_async_engines()
+
 @app.get("/")
 async def root():
     """
@@ -110,7 +129,7 @@ async def health_check():
     """
     try:
         # Check database connection
-        db_status = "connected" if engine.connect() else "disconnected"
+        db_status = "connected" if check_database() else "disconnected"
         
         # Check ML models
         required_ml_models = [
@@ -137,7 +156,13 @@ async def health_check():
         return {
             "status": "healthy",
             "database": db_status,
+            "database_pool": get_pool_stats(),
+            "database_async_pool": get_async_pool_stats(),
+            "database_replicas": replica_router.get_stats(),
             "ml_models": "loaded" if ml_models_status else "missing",
+            "ml_model_loading": model_loader.get_loading_status(),
+            "auth": {**jwt_verifier.get_stats(), "user_cache": user_cache.get_stats()},
+            "supabase": get_supabase_gateway().get_stats(),
             "missing_files": missing_files if missing_files else None,
             "timestamp": datetime.now().isoformat()
         }
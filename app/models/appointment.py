@@ -1,10 +1,23 @@
-from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime, String, Text, Time
+from sqlalchemy import Column, Computed, Integer, ForeignKey, Enum, DateTime, Index, String, Text, Time, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.connection import Base
 
+# Unique key that allows one active (not cancelled) appointment per doctor, hospital and slot
+ACTIVE_SLOT_CONSTRAINT = "uq_appointments_active_slot"
+
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Appointments in a date range (listings and dashboard analytics)
+        Index("ix_appointments_appointment_date", "appointment_date"),
+        # One booking per slot; NULLs never collide, so cancelled appointments (active_slot NULL)
+        # free their slot. Also the index of a doctor's appointments at a hospital on a day
+        UniqueConstraint(
+            "doctor_id", "hospital_id", "appointment_date", "appointment_time", "active_slot",
+            name=ACTIVE_SLOT_CONSTRAINT
+        ),
+    )
 
     # Primary key
     appointment_id = Column(Integer, primary_key=True, index=True)
@@ -24,6 +37,8 @@ class Appointment(Base):
     )  # Enum for appointment status
     note = Column(Text)
     appointment_number = Column(String(20), unique=True, nullable=False)
+    # 1 while the appointment holds its slot, NULL once cancelled (maintained by the database)
+    active_slot = Column(Integer, Computed("CASE WHEN status = 'Cancelled' THEN NULL ELSE 1 END", persisted=True))
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, BigInteger, String
+from app.db.connection import Base
+
+class Counter(Base):
+    __tablename__ = "counters"
+
+    # Counter name, e.g. "appointment_number"
+    name = Column(String(50), primary_key=True)
+    # Last number handed out
+    value = Column(BigInteger, nullable=False, default=0)
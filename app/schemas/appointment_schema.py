@@ -93,6 +93,30 @@ class AvailableTimeSlotsResponse(BaseModel):
     unavailable_slots: List[TimeSlotResponse]  # List of unavailable time slots
     appointments: List[AppointmentResponse]  # List of formatted appointments
 
+class DoctorCalendarResponse(BaseModel):
+    """
+    Slot states of a doctor at a hospital over a date range.
+
+    matrix[i] describes days[i] with one character per entry of slots:
+    "0" free, "1" booked, "2" past.
+    """
+    doctor_id: int
+    hospital_id: int
+    slot_minutes: int
+    days: List[date]
+    slots: List[str]  # Slot start times (e.g., "09:00 AM")
+    matrix: List[str]
+    free_slots: int  # Free slots in the whole range
+
+class NextAvailableSlotResponse(BaseModel):
+    doctor_id: int
+    doctor_name: str
+    specialization: Optional[str] = None
+    hospital_id: int
+    hospital_name: str
+    appointment_date: date
+    appointment_time: str  # Format as string (e.g., "09:00 AM")
+
 # Doctor Hospitals Response Schema
 class DoctorHospitalsResponse(BaseModel):
     hospital_id: int
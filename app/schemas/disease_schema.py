@@ -2,6 +2,17 @@ from pydantic import BaseModel, Field, validator
 from typing import List, Tuple
 from datetime import datetime
 
+MAX_SYMPTOMS = 20  # Reasonable limit for number of symptoms
+MAX_BATCH_SIZE = 100
+
+def validate_symptoms_text(v: str) -> str:
+    """Validate a comma-separated symptoms string."""
+    if not v.strip():
+        raise ValueError("Symptoms cannot be empty")
+    if len(v.split(',')) > MAX_SYMPTOMS:
+        raise ValueError(f"Too many symptoms provided. Maximum {MAX_SYMPTOMS} symptoms allowed.")
+    return v.strip()
+
 class SymptomsInput(BaseModel):
     """Schema for input symptoms request."""
     symptoms: str = Field(
@@ -15,11 +26,24 @@ class SymptomsInput(BaseModel):
     @validator('symptoms')
     def validate_symptoms(cls, v):
         """Validate symptoms input."""
-        if not v.strip():
-            raise ValueError("Symptoms cannot be empty")
-        if len(v.split(',')) > 20:  # Reasonable limit for number of symptoms
-            raise ValueError("Too many symptoms provided. Maximum 20 symptoms allowed.")
-        return v.strip()
+        return validate_symptoms_text(v)
+
+class BatchSymptomsInput(BaseModel):
+    """Schema for batch symptoms request."""
+    symptoms_list: List[str] = Field(
+        ...,
+        description="List of comma-separated symptom strings, one per patient",
+        example=["fever, cough, headache", "chest pain, shortness of breath"],
+        min_items=1,
+        max_items=MAX_BATCH_SIZE
+    )
+
+    @validator('symptoms_list', each_item=True)
+    def validate_symptoms(cls, v):
+        """Validate each symptoms string."""
+        if len(v) > 1000:
+            raise ValueError("Symptoms text is too long. Maximum 1000 characters allowed.")
+        return validate_symptoms_text(v)
 
 class Prediction(BaseModel):
     """Schema for individual disease prediction."""
@@ -82,4 +106,51 @@ class PredictionResponse(BaseModel):
                 "input_symptoms": "fever, cough, headache",
                 "timestamp": "2024-01-19T10:30:00"
             }
-        }
\ No newline at end of file
+        }
+
+class BatchPredictionResponse(BaseModel):
+    """Schema for batch prediction response."""
+    results: List[PredictionResponse] = Field(
+        ...,
+        description="Predictions in the same order as the submitted symptom strings"
+    )
+    timestamp: datetime = Field(
+        default_factory=datetime.now,
+        description="Prediction timestamp"
+    )
+
+class SymptomSuggestion(BaseModel):
+    """Schema for a symptom autocomplete suggestion."""
+    term: str = Field(
+        ...,
+        description="Suggested symptom term"
+    )
+    symptom: str = Field(
+        ...,
+        description="Normalized symptom the model receives for this term"
+    )
+    frequency: int = Field(
+        ...,
+        description="Occurrences of the symptom in the training data"
+    )
+
+class SymptomSuggestionResponse(BaseModel):
+    """Schema for symptom autocomplete response."""
+    query: str = Field(
+        ...,
+        description="Typed prefix"
+    )
+    suggestions: List[SymptomSuggestion] = Field(
+        ...,
+        description="Ranked completions, best first"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "query": "che",
+                "suggestions": [
+                    {"term": "chest pain", "symptom": "chest_pain", "frequency": 52}
+                ]
+            }
+        }
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, Literal
+from pydantic import BaseModel, EmailStr, Field
+from typing import Dict, List, Optional, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -47,4 +47,35 @@ class PatientResponse(PatientBase):
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PatientImportRow(PatientBase):
+    """One row of a bulk patient import, checked against the users table's column sizes."""
+    first_name: str = Field(..., min_length=1, max_length=50)
+    last_name: str = Field(..., min_length=1, max_length=50)
+    phone: str = Field(..., min_length=1, max_length=15)
+    emergency_contact: Optional[str] = Field(None, max_length=15)
+    nic_passport: str = Field(..., min_length=1, max_length=50)
+    email: EmailStr = Field(..., max_length=100)
+    profile_picture_url: Optional[str] = Field(None, max_length=255)
+
+class PatientImportStatus(str, Enum):
+    CREATED = "created"
+    INVALID = "invalid"      # The row failed validation
+    DUPLICATE = "duplicate"  # Same email, phone or NIC/Passport as an earlier row of the file
+    CONFLICT = "conflict"    # Email, phone or NIC/Passport already registered
+    FAILED = "failed"        # Supabase or the database rejected the row
+
+class PatientImportRowResult(BaseModel):
+    row: int  # 1-based position in the file
+    email: Optional[str] = None
+    status: PatientImportStatus
+    user_id: Optional[int] = None
+    detail: Optional[str] = None
+    # For rows whose Supabase user was created but not the database row: whether it was deleted again
+    compensated: Optional[bool] = None
+
+class PatientImportReport(BaseModel):
+    total: int
+    counts: Dict[str, int]
+    results: List[PatientImportRowResult]
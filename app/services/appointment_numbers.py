@@ -0,0 +1,97 @@
+import logging
+import os
+import threading
+from typing import Optional, Tuple
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from app.db.connection import engine
+from app.models.appointment import Appointment
+from app.models.counter import Counter
+
+logger = logging.getLogger(__name__)
+
+# Appointment numbers each process reserves per counter update. 1 keeps numbers gapless and in
+# booking order; larger blocks save a round-trip per booking but leave gaps when a process stops
+# and interleave numbers across processes
+APPOINTMENT_NUMBER_BLOCK_SIZE = int(os.getenv("APPOINTMENT_NUMBER_BLOCK_SIZE", "1"))
+
+APPOINTMENT_NUMBER_COUNTER = "appointment_number"
+APPOINTMENT_NUMBER_PREFIX = "APPT-NO-"
+
+def highest_appointment_number(conn) -> int:
+    """Get the highest APPT-NO-N already issued (only read once, when the counter is created)."""
+    numbers = conn.execute(
+        select(Appointment.appointment_number)
+        .where(Appointment.appointment_number.like(f"{APPOINTMENT_NUMBER_PREFIX}%"))
+    ).scalars()
+    highest = 0
+    for number in numbers:
+        suffix = number[len(APPOINTMENT_NUMBER_PREFIX):]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+def reserve_block(db_engine: Engine, name: str, size: int) -> Tuple[int, int]:
+    """
+    Atomically advance a counter by `size`.
+
+    Runs in its own short transaction, so the counter row is locked only for
+    the UPDATE and the SELECT that follows it, not for the whole booking. A
+    counter that does not exist yet is created from the highest appointment
+    number already issued.
+
+    Args:
+        db_engine: Engine of the primary database
+        name: Counter name
+        size: Numbers to reserve
+
+    Returns:
+        The first and last reserved number
+    """
+    for _ in range(2):
+        with db_engine.begin() as conn:
+            updated = conn.execute(
+                update(Counter).where(Counter.name == name).values(value=Counter.value + size)
+            ).rowcount
+            if updated:
+                last = conn.execute(select(Counter.value).where(Counter.name == name)).scalar_one()
+                return last - size + 1, last
+        try:
+            with db_engine.begin() as conn:
+                start = highest_appointment_number(conn)
+                conn.execute(insert(Counter).values(name=name, value=start + size))
+                logger.info(f"Created counter {name} starting after {start}.")
+                return start + 1, start + size
+        except IntegrityError:
+            # Another process created it first; take a block from its counter
+            continue
+    raise RuntimeError(f"Could not reserve numbers from counter {name}")
+
+class AppointmentNumberAllocator:
+    """
+    Hands out unique appointment numbers from the counters table.
+
+    Numbers are reserved in blocks of `block_size` with one atomic UPDATE
+    per block and handed out from memory until the block runs out, so
+    concurrent bookings (in this process or others) never get the same
+    number and no booking reads the appointments table to find the next one.
+    Numbers of a booking that fails are not reused.
+    """
+
+    def __init__(self, db_engine: Engine, block_size: int = APPOINTMENT_NUMBER_BLOCK_SIZE):
+        self.engine = db_engine
+        self.block_size = max(1, block_size)
+        self._lock = threading.Lock()
+        self._next: Optional[int] = None
+        self._last: Optional[int] = None
+
+    def next_number(self) -> str:
+        with self._lock:
+            if self._next is None or self._next > self._last:
+                self._next, self._last = reserve_block(self.engine, APPOINTMENT_NUMBER_COUNTER, self.block_size)
+            number = self._next
+            self._next += 1
+        return f"{APPOINTMENT_NUMBER_PREFIX}{number}"
+
+appointment_numbers = AppointmentNumberAllocator(engine)
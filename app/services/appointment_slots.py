@@ -0,0 +1,189 @@
+import heapq
+import itertools
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Any, Iterable, Iterator, List, Sequence, Set, Tuple
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.db.date_filters import between_days
+from app.models.appointment import ACTIVE_SLOT_CONSTRAINT, Appointment
+from app.models.hospital_doctor import HospitalDoctor
+
+# Length of an appointment slot
+SLOT_MINUTES = 30
+# Free slots suggested when a booking conflicts, and how many days ahead they are searched for
+NEXT_FREE_SLOTS_COUNT = int(os.getenv("NEXT_FREE_SLOTS_COUNT", "3"))
+NEXT_FREE_SLOTS_DAYS = int(os.getenv("NEXT_FREE_SLOTS_DAYS", "7"))
+# Days searched by the cross-doctor next-available search
+NEXT_AVAILABLE_DAYS = int(os.getenv("NEXT_AVAILABLE_DAYS", "14"))
+# Longest range served by the availability calendar (days)
+CALENDAR_MAX_DAYS = int(os.getenv("CALENDAR_MAX_DAYS", "60"))
+
+# Slot states in the availability calendar
+SLOT_FREE = 0
+SLOT_BOOKED = 1
+SLOT_PAST = 2
+
+def day_slots(start_time: time, end_time: time) -> List[time]:
+    """Start times of the slots between a doctor's availability start and end."""
+    slots = []
+    current = datetime.combine(date.min, start_time)
+    end = datetime.combine(date.min, end_time)
+    while current < end:
+        slots.append(current.time())
+        current += timedelta(minutes=SLOT_MINUTES)
+    return slots
+
+def slot_matrix(
+    first_day: date,
+    days: int,
+    slots: Sequence[time],
+    booked: Sequence[Tuple[datetime, time]],
+    now: datetime
+) -> np.ndarray:
+    """
+    Compute the state of every slot of a date range at once.
+
+    Args:
+        first_day: First day of the range
+        days: Number of days
+        slots: Slot start times of a day (see day_slots)
+        booked: (appointment_date, appointment_time) of the active appointments in the range
+        now: Slots starting at or before this are SLOT_PAST
+
+    Returns:
+        uint8 array of shape (days, len(slots)) holding SLOT_FREE, SLOT_BOOKED or SLOT_PAST
+    """
+    matrix = np.full((days, len(slots)), SLOT_FREE, dtype=np.uint8)
+    if not slots:
+        return matrix
+
+    slot_minutes = np.array([slot.hour * 60 + slot.minute for slot in slots])
+    if booked:
+        day_index = np.array([(appointment_date.date() - first_day).days for appointment_date, _ in booked])
+        offset = np.array([t.hour * 60 + t.minute for _, t in booked]) - slot_minutes[0]
+        slot_index = offset // SLOT_MINUTES
+        # Appointments off the slot grid (outside the availability or at odd times) occupy no slot
+        on_grid = (
+            (day_index >= 0) & (day_index < days)
+            & (offset % SLOT_MINUTES == 0) & (slot_index >= 0) & (slot_index < len(slots))
+        )
+        matrix[day_index[on_grid], slot_index[on_grid]] = SLOT_BOOKED
+
+    # Minutes from the start of the range to each slot, against the current time
+    slot_starts = np.arange(days)[:, None] * 24 * 60 + slot_minutes[None, :]
+    elapsed = (now - datetime.combine(first_day, time.min)).total_seconds() / 60
+    matrix[slot_starts <= elapsed] = SLOT_PAST
+    return matrix
+
+def free_slot_times(
+    first_day: date,
+    days: int,
+    slots: Sequence[time],
+    booked: Set[Tuple[date, time]],
+    earliest: datetime
+) -> Iterator[datetime]:
+    """
+    Yield the start of each free slot of a schedule, earliest first (lazily).
+
+    Args:
+        first_day: First day searched
+        days: Number of days searched
+        slots: Slot start times of a day (see day_slots)
+        booked: (day, time) of the active appointments
+        earliest: Only slots starting later than this are free
+    """
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        for slot in slots:
+            start = datetime.combine(day, slot)
+            if start > earliest and (day, slot) not in booked:
+                yield start
+
+def tag_slots(key: Any, starts: Iterator[datetime]) -> Iterator[Tuple[datetime, Any]]:
+    for start in starts:
+        yield start, key
+
+def earliest_free_slots(schedules: Iterable[Tuple[Any, Iterator[datetime]]], limit: int) -> List[Tuple[datetime, Any]]:
+    """
+    Merge several schedules' free slots and take the earliest.
+
+    Each schedule is only advanced as far as the merge needs (a heap holds
+    one pending slot per schedule), so the work is bounded by `limit` and the
+    number of schedules, not by the length of the search window.
+
+    Args:
+        schedules: (key, free_slot_times(...)) per schedule; keys break ties and must be comparable
+        limit: Number of slots
+
+    Returns:
+        Up to `limit` (start, key) pairs, earliest first
+    """
+    merged = heapq.merge(*(tag_slots(key, starts) for key, starts in schedules))
+    return list(itertools.islice(merged, limit))
+
+def is_slot_conflict(error: IntegrityError) -> bool:
+    """Whether an INSERT/UPDATE failed because the slot already has an active appointment."""
+    # MySQL names the violated key, SQLite lists its columns
+    message = str(error.orig)
+    return ACTIVE_SLOT_CONSTRAINT in message or "appointments.active_slot" in message
+
+def next_free_slots(
+    db: Session,
+    doctor_id: int,
+    hospital_id: int,
+    after: datetime,
+    limit: int = NEXT_FREE_SLOTS_COUNT,
+    days: int = NEXT_FREE_SLOTS_DAYS
+) -> List[dict]:
+    """
+    Find a doctor's first free slots at a hospital after a given time.
+
+    Args:
+        db: Database session
+        doctor_id: Doctor ID
+        hospital_id: Hospital ID
+        after: Only slots starting later than this (and later than now) are returned
+        limit: Maximum number of slots
+        days: Days searched, starting with the day of `after`
+
+    Returns:
+        Up to `limit` slots as {"date": "YYYY-MM-DD", "time": "HH:MM AM/PM"}, earliest first
+    """
+    availability = db.get(HospitalDoctor, (hospital_id, doctor_id))
+    if not availability:
+        return []
+
+    first_day = after.date()
+    booked = {
+        (appointment_date.date(), appointment_time)
+        for appointment_date, appointment_time in db.execute(
+            select(Appointment.appointment_date, Appointment.appointment_time)
+            .where(
+                Appointment.doctor_id == doctor_id,
+                Appointment.hospital_id == hospital_id,
+                Appointment.status != "Cancelled",
+                between_days(Appointment.appointment_date, first_day, first_day + timedelta(days=days - 1))
+            )
+        )
+    }
+
+    slots = day_slots(availability.availability_start_time, availability.availability_end_time)
+    free = free_slot_times(first_day, days, slots, booked, max(after, datetime.now()))
+    return [
+        {"date": start.date().isoformat(), "time": start.strftime("%I:%M %p")}
+        for start in itertools.islice(free, limit)
+    ]
+
+def slot_taken_error(db: Session, doctor_id: int, hospital_id: int, slot: datetime) -> HTTPException:
+    """409 response for a booking whose slot is taken, with the doctor's next free slots."""
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "Selected time slot is already booked",
+            "next_available_slots": next_free_slots(db, doctor_id, hospital_id, slot),
+        }
+    )
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the inference queue is full and a request has to be shed."""
+
+def _worker_id() -> str:
+    return f"pid-{os.getpid()}/{threading.current_thread().name}"
+
+def _timed_call(fn: Callable, *args) -> Tuple[str, float, Any]:
+    # Runs inside the worker: report which worker ran the call and for how long
+    start = time.perf_counter()
+    result = fn(*args)
+    return _worker_id(), (time.perf_counter() - start) * 1000, result
+
+def _noop() -> str:
+    return _worker_id()
+
+class InferenceExecutor:
+    """
+    A dedicated pool for CPU-heavy ML inference, kept off the event loop.
+
+    mode="process" runs inference in worker processes (no GIL contention with
+    the API); mode="thread" uses a thread pool, which suits NumPy-heavy code that
+    releases the GIL. Worker processes are spawned, never forked: forking a
+    process that already runs threads (the event loop's executors, database
+    pools) can deadlock the child on a lock held by another thread. Each
+    process runs initializer(*initargs) (e.g. model loading) once before
+    serving; thread workers share the parent's state and run no initializer.
+    At most max_queue calls may be in flight; beyond that run() raises
+    ExecutorSaturatedError so callers can shed load with a 503.
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: int = 2,
+        max_queue: int = 64,
+        initializer: Optional[Callable] = None,
+        initargs: Tuple = ()
+    ):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown executor mode: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._rejected = 0
+        self._worker_stats: Dict[str, Dict[str, float]] = {}
+
+    def _create_executor(self) -> Executor:
+        if self.mode == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+                initargs=self.initargs
+            )
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._create_executor()
+        return self._executor
+
+    async def warm_up(self) -> None:
+        """Start every worker (running the initializer) before the first request."""
+        loop = asyncio.get_running_loop()
+        workers = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, _noop) for _ in range(self.max_workers))
+        )
+        logger.info(f"Inference executor ({self.mode}) warmed up: {sorted(set(workers))}")
+
+    async def restart(self, initargs: Optional[Tuple] = None) -> None:
+        """
+        Replace the worker pool with a fresh, warmed-up one.
+
+        Calls already queued on the old pool still complete there before it
+        shuts down.
+
+        Args:
+            initargs: New initializer arguments (e.g. the newly activated model version)
+        """
+        if initargs is not None:
+            self.initargs = initargs
+        old_executor, self._executor = self._executor, None
+        await self.warm_up()
+        if old_executor is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, old_executor.shutdown)
+        logger.info(f"Inference executor ({self.mode}) restarted.")
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) on the pool. fn must be picklable in process mode.
+
+        Raises:
+            ExecutorSaturatedError: if max_queue calls are already in flight
+        """
+        if self._in_flight >= self.max_queue:
+            self._rejected += 1
+            raise ExecutorSaturatedError(
+                f"Inference queue is full ({self._in_flight}/{self.max_queue} in flight)"
+            )
+
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            worker, elapsed_ms, result = await loop.run_in_executor(self.executor, _timed_call, fn, *args)
+        finally:
+            self._in_flight -= 1
+        self._record(worker, elapsed_ms)
+        return result
+
+    def _record(self, worker: str, elapsed_ms: float) -> None:
+        stats = self._worker_stats.setdefault(
+            worker, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+        )
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["last_ms"] = elapsed_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and per-worker latency statistics."""
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "rejected": self._rejected,
+            "workers": {
+                worker: {**stats, "avg_ms": stats["total_ms"] / stats["calls"]}
+                for worker, stats in self._worker_stats.items()
+            },
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,535 @@
+from app.schemas.disease_schema import Prediction, PredictionResponse
+from app.utils.ml_utils import clean_symptoms, format_prediction_batch
+from app.utils.forest_compiler import load_compiled_forest
+from app.utils.forest_compactor import load_compact_forest
+from app.utils.disease_index import DiseaseIndex
+from app.utils.symptom_encoder import SymptomEncoder
+from app.utils.symptom_index import SymptomIndex
+from app.utils.symptom_normalizer import get_symptom_normalizer
+import joblib
+import os
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ML_MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'app', 'mlmodels')
+ARTIFACT_FILES = {
+    "model": 'random_forest_model.joblib',
+    "vectorizer": 'tfidf_vectorizer.joblib',
+    "label_encoder": 'label_encoder.joblib',
+    "specialty_map": 'disease_specialty_map.joblib',
+}
+ARTIFACT_PATHS = {name: os.path.join(ML_MODELS_DIR, f) for name, f in ARTIFACT_FILES.items()}
+
+# Additional artifact sets live in app/mlmodels/versions/<version>/ with the same file names;
+# the artifacts in app/mlmodels itself are the "default" version
+DEFAULT_MODEL_VERSION = "default"
+ML_MODEL_VERSIONS_DIR = os.path.join(ML_MODELS_DIR, 'versions')
+# Version activated at startup
+ML_MODEL_VERSION = os.getenv("ML_MODEL_VERSION", DEFAULT_MODEL_VERSION)
+
+# Attempts an inference worker process makes to load the model, waiting BACKOFF * 2^n seconds between them
+ML_WORKER_LOAD_ATTEMPTS = int(os.getenv("ML_WORKER_LOAD_ATTEMPTS", "3"))
+ML_WORKER_LOAD_BACKOFF_SECONDS = float(os.getenv("ML_WORKER_LOAD_BACKOFF_SECONDS", "2"))
+
+# Serve predictions from the forest compiled into flat NumPy node arrays (scripts/export_compiled_forest.py).
+# Memory-mapped, so worker processes share one copy; the sklearn forest is a private copy per process
+ML_COMPILED_FOREST = os.getenv("ML_COMPILED_FOREST", "false").lower() in ("1", "true", "yes")
+# Serve predictions from the pruned, compact export (scripts/export_compact_forest.py)
+ML_COMPACT_FOREST = os.getenv("ML_COMPACT_FOREST", "false").lower() in ("1", "true", "yes")
+
+# Symptom sets used to validate the symptom encoder against the vectorizer
+PROBE_SYMPTOMS = [
+    "fever, cough, headache",
+    "chest pain, shortness of breath",
+    "nausea, vomiting, abdominal pain",
+    "itching, skin rash",
+]
+
+class ModelNotReadyError(RuntimeError):
+    """Raised when a prediction is requested before the ML components have loaded."""
+
+class ModelSwapInProgressError(RuntimeError):
+    """Raised when a model swap is requested while another one is still running."""
+
+def version_artifact_paths(version: str) -> Dict[str, str]:
+    """Get the artifact paths of a model version."""
+    if version == DEFAULT_MODEL_VERSION:
+        return dict(ARTIFACT_PATHS)
+    version_dir = os.path.join(ML_MODEL_VERSIONS_DIR, version)
+    return {name: os.path.join(version_dir, f) for name, f in ARTIFACT_FILES.items()}
+
+def discover_model_versions() -> Dict[str, Dict[str, str]]:
+    """Find the model versions on disk, mapped to their artifact paths."""
+    versions = {DEFAULT_MODEL_VERSION: version_artifact_paths(DEFAULT_MODEL_VERSION)}
+    if os.path.isdir(ML_MODEL_VERSIONS_DIR):
+        for name in sorted(os.listdir(ML_MODEL_VERSIONS_DIR)):
+            if os.path.isdir(os.path.join(ML_MODEL_VERSIONS_DIR, name)):
+                versions[name] = version_artifact_paths(name)
+    return versions
+
+def prepare_symptoms(symptoms_list: List[str]) -> List[str]:
+    """
+    Clean raw symptom strings into model input.
+
+    Symptoms keep the order they were given in, since the vectorizer's bigrams
+    span neighbouring symptoms; canonicalize_symptoms() of the result is the
+    order-insensitive prediction cache key.
+
+    Raises:
+        ValueError: if any item has no valid symptoms after cleaning
+    """
+    cleaned_list = [clean_symptoms(symptoms) for symptoms in symptoms_list]
+    invalid = [str(i) for i, cleaned in enumerate(cleaned_list) if not cleaned]
+    if invalid:
+        raise ValueError(f"No valid symptoms after cleaning (items: {', '.join(invalid)}).")
+    return cleaned_list
+
+class ModelVersion:
+    """
+    One versioned set of ML artifacts (model, vectorizer, label encoder, specialty map).
+
+    Tracks its own loading progress and the number of predictions currently
+    using it, so a retired version can be released once its requests drain.
+    With load_forest=False everything but the forest is loaded (the API
+    process of the process executor mode, whose workers hold the forest).
+    """
+
+    def __init__(self, version: str, paths: Dict[str, str], load_forest: bool = True):
+        self.version = version
+        self.paths = paths
+        self.load_forest = load_forest
+        self.model = None
+        self.vectorizer = None
+        self.symptom_encoder = None
+        self.symptom_index = None
+        self.label_encoder = None
+        self.disease_specialty_map = None
+        self.disease_index = None
+        self.state = "not_loaded"
+        self.loading_component = None
+        self.loaded_components = 0
+        self.load_error = None
+        self.load_started_at = None
+        self.load_finished_at = None
+        self.activated_at = None
+        self._in_flight = 0
+        self._drained = threading.Condition()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == "ready"
+
+    def load_components(self) -> None:
+        """Load ML model components."""
+        self.state = "loading"
+        self.loaded_components = 0
+        self.load_error = None
+        self.load_started_at = time.time()
+        self.load_finished_at = None
+        try:
+            missing_files = [p for p in self.paths.values() if not os.path.exists(p)]
+            if missing_files:
+                raise FileNotFoundError(f"Missing required files: {', '.join(missing_files)}")
+
+            self._start_component("vectorizer")
+            normalizer = get_symptom_normalizer()
+            self.vectorizer = joblib.load(self.paths["vectorizer"])
+            # Autocomplete only needs the vocabulary: serve it before the forest has loaded
+            self.symptom_index = SymptomIndex.build(self.vectorizer.vocabulary_, normalizer)
+            self.symptom_encoder = SymptomEncoder.from_vectorizer(
+                self.vectorizer, probe=prepare_symptoms(PROBE_SYMPTOMS)
+            )
+            self._start_component("label_encoder")
+            self.label_encoder = joblib.load(self.paths["label_encoder"])
+            self._start_component("specialty_map")
+            self.disease_specialty_map = joblib.load(self.paths["specialty_map"])
+            # Fast path for short inputs, and the fallback while the forest is loading
+            try:
+                self.disease_index = DiseaseIndex.from_csv(classes=self.label_encoder.classes_)
+            except OSError as e:
+                logger.warning(f"Disease index unavailable ({str(e)}); all predictions use the forest.")
+            if self.load_forest:
+                self._start_component("model")
+                self.model = self.load_model(self.paths["model"])
+            self._start_component(None)
+
+            self.state = "ready"
+            self.load_finished_at = time.time()
+            logger.info(
+                f"ML components of version {self.version} loaded successfully in "
+                f"{self.load_finished_at - self.load_started_at:.1f}s "
+                f"(forest={self.load_forest}, compiled={ML_COMPILED_FOREST}, compact={ML_COMPACT_FOREST})."
+            )
+        except Exception as e:
+            self.state = "failed"
+            self.load_error = str(e)
+            self.load_finished_at = time.time()
+            logger.error(f"Error loading ML components of version {self.version}: {str(e)}")
+            raise RuntimeError(f"Failed to load ML components: {str(e)}")
+
+    def _start_component(self, name: str) -> None:
+        if self.loading_component is not None:
+            self.loaded_components += 1
+        self.loading_component = name
+
+    def load_model(self, model_path: str):
+        """Load the random forest: compact export, compiled, or sklearn."""
+        if ML_COMPACT_FOREST:
+            try:
+                return load_compact_forest(model_path)
+            except FileNotFoundError as e:
+                logger.warning(f"{str(e)}; loading the full forest instead.")
+
+        if ML_COMPILED_FOREST:
+            try:
+                return load_compiled_forest(model_path)
+            except FileNotFoundError as e:
+                logger.warning(f"{str(e)}; loading the sklearn forest instead.")
+
+        return joblib.load(model_path)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        with self._drained:
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._drained:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._drained.notify_all()
+
+    def wait_drained(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no prediction is using this version; returns False on timeout."""
+        with self._drained:
+            return self._drained.wait_for(lambda: self._in_flight == 0, timeout=timeout)
+
+    def unload(self) -> None:
+        """Drop the loaded components so their memory can be reclaimed."""
+        self.model = None
+        self.vectorizer = None
+        self.symptom_encoder = None
+        self.symptom_index = None
+        self.label_encoder = None
+        self.disease_specialty_map = None
+        self.disease_index = None
+        self.state = "retired"
+
+    def get_components_status(self) -> Dict[str, bool]:
+        """Get the loading status of ML components."""
+        return {
+            "model_loaded": self.model is not None,
+            "model_in_workers": not self.load_forest,
+            "vectorizer_loaded": self.vectorizer is not None,
+            "label_encoder_loaded": self.label_encoder is not None,
+            "specialty_map_loaded": self.disease_specialty_map is not None
+        }
+
+    def get_loading_status(self) -> Dict[str, Any]:
+        """Get the loading state and progress of the ML components."""
+        total = len(ARTIFACT_FILES)
+        if self.load_started_at is None:
+            elapsed = None
+        else:
+            elapsed = round((self.load_finished_at or time.time()) - self.load_started_at, 2)
+        return {
+            "version": self.version,
+            "state": self.state,
+            "progress": self.loaded_components / total,
+            "loaded_components": self.loaded_components,
+            "total_components": total,
+            "loading_component": self.loading_component,
+            "elapsed_seconds": elapsed,
+            "error": self.load_error,
+        }
+
+    def predict_cleaned(self, cleaned_list: List[str]) -> List[List[Prediction]]:
+        """Predict diseases for already cleaned symptom strings with one model call."""
+        if self.symptom_encoder is not None:
+            symptoms_vectors = self.symptom_encoder.transform(cleaned_list)
+        else:
+            symptoms_vectors = self.vectorizer.transform(cleaned_list)
+        probabilities = self.model.predict_proba(symptoms_vectors)
+        return format_prediction_batch(
+            probabilities=probabilities,
+            classes=self.label_encoder.classes_,
+            specialty_map=self.disease_specialty_map
+        )
+
+class ModelLoader:
+    """
+    Process-wide registry of versioned ML artifact sets.
+
+    One version is active at a time. swap_version() loads another version
+    alongside it, switches predictions over atomically and unloads the old
+    version once the predictions still using it have finished.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ModelLoader, cls).__new__(cls)
+            cls._instance.initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self.initialized:
+            self.active: Optional[ModelVersion] = None
+            self.pending: Optional[ModelVersion] = None
+            self.last_swap: Optional[Dict[str, Any]] = None
+            # Bumped on every activation, including a reload of the same version name
+            self.generation = 0
+            # Off in the API process when inference runs in worker processes, which load the forest themselves
+            self.load_forest = True
+            self._load_lock = threading.Lock()
+            self._swap_lock = threading.Lock()
+            self.initialized = True
+
+    @property
+    def is_ready(self) -> bool:
+        active = self.active
+        return active is not None and active.is_ready
+
+    @property
+    def active_version(self) -> Optional[str]:
+        active = self.active
+        return active.version if active is not None else None
+
+    def _load_version(self, version: str) -> ModelVersion:
+        candidate = ModelVersion(version, version_artifact_paths(version), load_forest=self.load_forest)
+        self.pending = candidate
+        candidate.load_components()
+        return candidate
+
+    def ensure_loaded(self, version: Optional[str] = None) -> bool:
+        """Load a version (default: the configured one) unless a version is active; thread-safe."""
+        with self._load_lock:
+            if not self.is_ready:
+                try:
+                    self._activate(self._load_version(version or ML_MODEL_VERSION))
+                except RuntimeError:
+                    pass  # Already logged; get_loading_status() describes the failure
+        return self.is_ready
+
+    def _activate(self, version: ModelVersion) -> Optional[ModelVersion]:
+        # A single reference assignment: predictions see either the old or the new version
+        previous, self.active = self.active, version
+        self.generation += 1
+        version.activated_at = time.time()
+        if self.pending is version:
+            self.pending = None
+        return previous
+
+    def advance_generation(self) -> None:
+        """
+        Start a new model generation without activating a version.
+
+        For when predictions change outside the API process, e.g. once the
+        worker processes have restarted on a newly activated version.
+        """
+        with self._load_lock:
+            self.generation += 1
+
+    def swap_version(self, version: str, drain_timeout: float = 30.0) -> Dict[str, Any]:
+        """
+        Load a version, make it active and retire the previous one.
+
+        The new version loads while the current one keeps serving. After the
+        switch, the old version is unloaded once its in-flight predictions have
+        drained (or drain_timeout seconds have passed).
+
+        Args:
+            version: Name of the version to activate (see list_versions)
+            drain_timeout: Maximum seconds to wait for the old version to drain
+
+        Returns:
+            Summary of the swap
+
+        Raises:
+            ValueError: if the version does not exist
+            ModelSwapInProgressError: if another swap is already running
+            RuntimeError: if the version fails to load (the active version stays in place)
+        """
+        if version not in discover_model_versions():
+            raise ValueError(f"Unknown model version: {version}")
+        if not self._swap_lock.acquire(blocking=False):
+            raise ModelSwapInProgressError("A model swap is already in progress.")
+        try:
+            started_at = time.time()
+            candidate = self._load_version(version)
+            with self._load_lock:
+                previous = self._activate(candidate)
+
+            drained = True
+            if previous is not None and previous is not candidate:
+                drained = previous.wait_drained(timeout=drain_timeout)
+                if not drained:
+                    logger.warning(
+                        f"Model version {previous.version} still had predictions in flight after "
+                        f"{drain_timeout}s; unloading it anyway."
+                    )
+                previous.unload()
+
+            self.last_swap = {
+                "from_version": previous.version if previous is not None else None,
+                "to_version": candidate.version,
+                "drained": drained,
+                "duration_seconds": round(time.time() - started_at, 2),
+                "finished_at": time.time(),
+            }
+            logger.info(f"Swapped ML model version: {self.last_swap}")
+            return self.last_swap
+        finally:
+            self._swap_lock.release()
+
+    @contextmanager
+    def acquire(self) -> Iterator[ModelVersion]:
+        """Pin the active version for the duration of one prediction."""
+        version = self.active
+        if version is None or not version.is_ready:
+            raise ModelNotReadyError(f"ML components are not ready (state: {self.get_loading_status()['state']}).")
+        version.acquire()
+        try:
+            yield version
+        finally:
+            version.release()
+
+    def get_symptom_index(self) -> Optional[SymptomIndex]:
+        """Get the active version's symptom index (or the loading version's, during startup)."""
+        for version in (self.active, self.pending):
+            if version is not None and version.symptom_index is not None:
+                return version.symptom_index
+        return None
+
+    def get_disease_index(self) -> Optional[DiseaseIndex]:
+        """Get the active version's disease index (or the loading version's, during startup)."""
+        for version in (self.active, self.pending):
+            if version is not None and version.disease_index is not None:
+                return version.disease_index
+        return None
+
+    def predict_from_index(
+        self,
+        cleaned_list: List[str],
+        max_symptoms: Optional[int] = None
+    ) -> Dict[str, List[Prediction]]:
+        """
+        Rank diseases with the symptom-to-disease index instead of the forest.
+
+        Args:
+            cleaned_list: Cleaned, canonical symptom strings
+            max_symptoms: Only answer strings with at most this many symptoms, all of
+                them indexed (None answers every string)
+
+        Returns:
+            Predictions per answered string; empty if no version has an index yet
+
+        Raises:
+            ValueError: if max_symptoms is None and a string has no indexed symptom
+        """
+        for version in (self.active, self.pending):
+            if version is None:
+                continue
+            disease_index, specialty_map = version.disease_index, version.disease_specialty_map
+            if disease_index is not None and specialty_map is not None:
+                break
+        else:
+            return {}
+
+        cleaned_list = list(dict.fromkeys(cleaned_list))
+        if max_symptoms is not None:
+            cleaned_list = [cleaned for cleaned in cleaned_list if disease_index.covers(cleaned, max_symptoms)]
+        if not cleaned_list:
+            return {}
+        return dict(zip(cleaned_list, disease_index.predict_cleaned(cleaned_list, specialty_map)))
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """List the versions available on disk with their load state."""
+        active = self.active
+        pending = self.pending
+        versions = []
+        for name, paths in discover_model_versions().items():
+            loaded = active if active is not None and active.version == name else None
+            if loaded is None and pending is not None and pending.version == name:
+                loaded = pending
+            model_path = paths["model"]
+            versions.append({
+                "version": name,
+                "active": loaded is not None and loaded is active,
+                "state": loaded.state if loaded is not None else "not_loaded",
+                "in_flight": loaded.in_flight if loaded is not None else 0,
+                "complete": all(os.path.exists(p) for p in paths.values()),
+                "modified_at": os.path.getmtime(model_path) if os.path.exists(model_path) else None,
+            })
+        return versions
+
+    def get_components_status(self) -> Dict[str, bool]:
+        """Get the loading status of the active version's ML components."""
+        version = self.active or self.pending or ModelVersion(ML_MODEL_VERSION, {})
+        return version.get_components_status()
+
+    def get_loading_status(self) -> Dict[str, Any]:
+        """Get the background loading state and progress of the ML components."""
+        active, pending = self.active, self.pending
+        if active is None:
+            status = (pending or ModelVersion(ML_MODEL_VERSION, {})).get_loading_status()
+        else:
+            status = active.get_loading_status()
+            if pending is not None:
+                status["pending"] = pending.get_loading_status()
+        status["last_swap"] = self.last_swap
+        return status
+
+    def predict_cleaned(self, cleaned_list: List[str]) -> List[List[Prediction]]:
+        """Predict diseases for already cleaned symptom strings with the active version."""
+        with self.acquire() as version:
+            return version.predict_cleaned(cleaned_list)
+
+    def predict_batch(self, symptoms_list: List[str]) -> List[PredictionResponse]:
+        """Predict diseases for several symptom strings with one model call."""
+        cleaned_list = prepare_symptoms(symptoms_list)
+        return [
+            PredictionResponse(predictions=predictions, input_symptoms=symptoms)
+            for symptoms, predictions in zip(symptoms_list, self.predict_cleaned(cleaned_list))
+        ]
+
+    def predict(self, symptoms: str) -> PredictionResponse:
+        """Predict diseases based on symptoms."""
+        try:
+            return self.predict_batch([symptoms])[0]
+        except Exception as e:
+            logger.error(f"Prediction error: {str(e)}")
+            raise RuntimeError(f"Error making prediction: {str(e)}")
+
+def predict_cleaned_in_worker(cleaned_list: List[str]) -> List[List[Prediction]]:
+    """Run a batch prediction with this process's ModelLoader (executor entry point)."""
+    return ModelLoader().predict_cleaned(cleaned_list)
+
+def warm_up_worker(version: Optional[str] = None) -> None:
+    """
+    Load the ML components once in a new inference worker process (executor initializer).
+
+    A failed load is retried with exponential backoff. After the last attempt
+    the worker stays up without a model and its predictions fail with
+    ModelNotReadyError; it never reloads on a request.
+
+    Args:
+        version: Model version to load (default: the configured one)
+    """
+    loader = ModelLoader()
+    for attempt in range(ML_WORKER_LOAD_ATTEMPTS):
+        if loader.ensure_loaded(version):
+            return
+        if attempt + 1 < ML_WORKER_LOAD_ATTEMPTS:
+            delay = ML_WORKER_LOAD_BACKOFF_SECONDS * 2 ** attempt
+            logger.warning(f"Inference worker {os.getpid()} failed to load the model; retrying in {delay:g}s.")
+            time.sleep(delay)
+    logger.error(f"Inference worker {os.getpid()} gave up loading the model after {ML_WORKER_LOAD_ATTEMPTS} attempts.")
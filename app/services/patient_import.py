@@ -0,0 +1,294 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import secrets
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.schemas.patient_schema import (
+    PatientImportReport,
+    PatientImportRow,
+    PatientImportRowResult,
+    PatientImportStatus,
+)
+from app.services.supabase_client import SUPABASE_MAX_CONCURRENCY, SupabaseUnavailableError
+from app.services.supabase_service import SupabaseService
+
+logger = logging.getLogger(__name__)
+
+# Largest file accepted by the bulk import endpoint (rows)
+PATIENT_IMPORT_MAX_ROWS = int(os.getenv("PATIENT_IMPORT_MAX_ROWS", "10000"))
+# Rows per database insert; Supabase accounts of the next batch are created while a batch is inserted
+PATIENT_IMPORT_BATCH_SIZE = int(os.getenv("PATIENT_IMPORT_BATCH_SIZE", "200"))
+# Concurrent Supabase calls of one import (capped below the gateway's pool so logins keep a share)
+PATIENT_IMPORT_CONCURRENCY = int(os.getenv("PATIENT_IMPORT_CONCURRENCY", "4"))
+
+# Values per IN list of the uniqueness query
+UNIQUENESS_CHUNK_SIZE = 1000
+USER_COLUMNS = (
+    "title", "first_name", "last_name", "phone", "emergency_contact",
+    "id_type", "nic_passport", "email", "profile_picture_url",
+)
+UNIQUE_FIELDS = ("email", "phone", "nic_passport")
+UNIQUE_FIELD_LABELS = {"email": "Email", "phone": "Phone number", "nic_passport": "NIC/Passport"}
+
+class PatientImportError(ValueError):
+    """The uploaded file cannot be read as a list of patients."""
+    pass
+
+def parse_patient_file(content: bytes, filename: Optional[str] = None, content_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Read patients from an uploaded CSV or JSON file.
+
+    Args:
+        content: File content (UTF-8)
+        filename: Used to tell JSON from CSV, together with content_type
+        content_type: MIME type of the upload
+
+    Returns:
+        One dict per patient, keyed by PatientCreate field names; blank values become None
+
+    Raises:
+        PatientImportError: if the file cannot be decoded or has the wrong shape
+    """
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise PatientImportError("The file must be UTF-8 encoded.")
+
+    is_json = (filename or "").lower().endswith(".json") or "json" in (content_type or "")
+    if is_json:
+        try:
+            records = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise PatientImportError(f"Invalid JSON: {str(e)}")
+        if isinstance(records, dict):
+            records = records.get("patients")
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise PatientImportError('JSON must be a list of patient objects or {"patients": [...]}.')
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames:
+            raise PatientImportError("The CSV file has no header row.")
+        records = [{key.strip(): value for key, value in row.items() if key} for row in reader]
+
+    return [
+        {key: (value.strip() or None) if isinstance(value, str) else value for key, value in record.items()}
+        for record in records
+    ]
+
+def unique_key(value: str) -> str:
+    # The users table compares these columns case-insensitively
+    return value.strip().lower()
+
+class PatientImporter:
+    """
+    Bulk patient creation with a per-row outcome.
+
+    Rows are validated, checked against each other and against the users
+    table with one set-based query, then created in batches: the Supabase
+    accounts of a batch are created with bounded concurrency while the
+    previous batch is inserted into the database with a single multi-row
+    INSERT. A row whose Supabase account was created but whose database
+    insert failed has the account deleted again (compensation).
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        supabase_service: SupabaseService,
+        batch_size: int = PATIENT_IMPORT_BATCH_SIZE,
+        concurrency: int = PATIENT_IMPORT_CONCURRENCY
+    ):
+        self.db = db
+        self.supabase_service = supabase_service
+        self.batch_size = max(1, batch_size)
+        self._semaphore = asyncio.Semaphore(max(1, min(concurrency, SUPABASE_MAX_CONCURRENCY)))
+        self.results: Dict[int, PatientImportRowResult] = {}
+
+    def _result(self, row: int, status: PatientImportStatus, email: Optional[str] = None, **fields) -> None:
+        self.results[row] = PatientImportRowResult(row=row, email=email, status=status, **fields)
+
+    def _validate(self, records: Sequence[Dict[str, Any]]) -> List[Tuple[int, PatientImportRow]]:
+        """Validate rows and drop repeats within the file; returns the (row, patient) pairs left."""
+        valid = []
+        seen: Dict[str, Set[str]] = {field: set() for field in UNIQUE_FIELDS}
+        for row, record in enumerate(records, start=1):
+            email = record.get("email")
+            try:
+                patient = PatientImportRow(**record)
+            except ValidationError as e:
+                detail = "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                )
+                self._result(row, PatientImportStatus.INVALID, email, detail=detail)
+                continue
+
+            repeated = [field for field in UNIQUE_FIELDS if unique_key(getattr(patient, field)) in seen[field]]
+            if repeated:
+                self._result(
+                    row, PatientImportStatus.DUPLICATE, patient.email,
+                    detail=f"{UNIQUE_FIELD_LABELS[repeated[0]]} repeats an earlier row"
+                )
+                continue
+            for field in UNIQUE_FIELDS:
+                seen[field].add(unique_key(getattr(patient, field)))
+            valid.append((row, patient))
+        return valid
+
+    def _find_registered(self, patients: Sequence[Tuple[int, PatientImportRow]]) -> Dict[str, Set[str]]:
+        """Get the emails, phones and NIC/Passports of `patients` that are already registered."""
+        registered: Dict[str, Set[str]] = {field: set() for field in UNIQUE_FIELDS}
+        for start in range(0, len(patients), UNIQUENESS_CHUNK_SIZE):
+            chunk = [patient for _, patient in patients[start:start + UNIQUENESS_CHUNK_SIZE]]
+            matches = self.db.query(User.email, User.phone, User.nic_passport).filter(or_(
+                User.email.in_([patient.email for patient in chunk]),
+                User.phone.in_([patient.phone for patient in chunk]),
+                User.nic_passport.in_([patient.nic_passport for patient in chunk]),
+            )).all()
+            for match in matches:
+                for field in UNIQUE_FIELDS:
+                    registered[field].add(unique_key(getattr(match, field)))
+        return registered
+
+    async def _create_account(self, row: int, patient: PatientImportRow) -> Optional[str]:
+        user_metadata = {
+            "first_name": patient.first_name,
+            "last_name": patient.last_name,
+            "role": "Patient",
+            "title": patient.title,
+            "phone": patient.phone,
+            "id_type": patient.id_type,
+            "nic_passport": patient.nic_passport,
+        }
+        async with self._semaphore:
+            try:
+                # Imported patients set their own password through the password reset flow
+                response = await self.supabase_service.sign_up(
+                    email=patient.email,
+                    password=secrets.token_urlsafe(24),
+                    user_metadata=user_metadata,
+                )
+                return response["supabase_uid"]
+            except SupabaseUnavailableError as e:
+                self._result(row, PatientImportStatus.FAILED, patient.email, detail=f"Supabase unavailable: {str(e)}")
+            except Exception as e:
+                self._result(row, PatientImportStatus.FAILED, patient.email, detail=str(e))
+        return None
+
+    async def _create_accounts(self, batch: Sequence[Tuple[int, PatientImportRow]]) -> List[Tuple[int, PatientImportRow, str]]:
+        """Create the Supabase accounts of a batch; returns the rows that got one."""
+        uids = await asyncio.gather(*(self._create_account(row, patient) for row, patient in batch))
+        return [(row, patient, uid) for (row, patient), uid in zip(batch, uids) if uid]
+
+    def _insert_batch(self, accounts: Sequence[Tuple[int, PatientImportRow, str]]) -> Tuple[Dict[str, int], Dict[int, str]]:
+        """
+        Insert the users of a batch (blocking; runs off the event loop).
+
+        The batch goes in as one multi-row INSERT; if that fails, rows are
+        retried one by one so a single conflicting row does not sink the batch.
+
+        Returns:
+            The new user ids by Supabase UID, and an error detail per failed row
+        """
+        mappings = [
+            {**patient.model_dump(include=set(USER_COLUMNS)), "supabase_uid": uid, "role": "Patient"}
+            for _, patient, uid in accounts
+        ]
+        failures: Dict[int, str] = {}
+        try:
+            self.db.execute(insert(User), mappings)
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.warning(f"Batch insert of {len(mappings)} patients failed, inserting row by row: {str(e)}")
+            for (row, _, _), mapping in zip(accounts, mappings):
+                try:
+                    self.db.execute(insert(User), [mapping])
+                    self.db.commit()
+                except IntegrityError:
+                    self.db.rollback()
+                    failures[row] = "Email, phone number or NIC/Passport already registered"
+                except SQLAlchemyError as e:
+                    self.db.rollback()
+                    logger.error(f"Database error importing row {row}: {str(e)}")
+                    failures[row] = "Database error occurred"
+
+        inserted_uids = [uid for row, _, uid in accounts if row not in failures]
+        user_ids = dict(
+            self.db.query(User.supabase_uid, User.user_id).filter(User.supabase_uid.in_(inserted_uids)).all()
+        ) if inserted_uids else {}
+        return user_ids, failures
+
+    async def _compensate(self, row: int, patient: PatientImportRow, uid: str, detail: str) -> None:
+        async with self._semaphore:
+            try:
+                await self.supabase_service.delete_user(uid)
+                compensated = True
+            except Exception as e:
+                logger.error(f"Could not delete Supabase user {uid} of failed import row {row}: {str(e)}")
+                compensated = False
+        self._result(row, PatientImportStatus.FAILED, patient.email, detail=detail, compensated=compensated)
+
+    async def _finish_batch(self, accounts: Sequence[Tuple[int, PatientImportRow, str]], insert_future) -> None:
+        try:
+            user_ids, failures = await insert_future
+        except Exception as e:
+            # Not even the row-by-row inserts could run (e.g. the connection is gone)
+            logger.error(f"Database error importing patients: {str(e)}")
+            user_ids, failures = {}, {row: "Database error occurred" for row, _, _ in accounts}
+
+        compensations = []
+        for row, patient, uid in accounts:
+            if uid in user_ids:
+                self._result(row, PatientImportStatus.CREATED, patient.email, user_id=user_ids[uid])
+            else:
+                detail = failures.get(row, "Database error occurred")
+                compensations.append(self._compensate(row, patient, uid, detail))
+        await asyncio.gather(*compensations)
+
+    async def run(self, records: Sequence[Dict[str, Any]]) -> PatientImportReport:
+        """
+        Import patients.
+
+        Args:
+            records: Patient dicts as returned by parse_patient_file
+
+        Returns:
+            The outcome of every row, in file order
+        """
+        patients = self._validate(records)
+        registered = self._find_registered(patients)
+        pending = []
+        for row, patient in patients:
+            taken = [field for field in UNIQUE_FIELDS if unique_key(getattr(patient, field)) in registered[field]]
+            if taken:
+                self._result(
+                    row, PatientImportStatus.CONFLICT, patient.email,
+                    detail=f"{UNIQUE_FIELD_LABELS[taken[0]]} already registered"
+                )
+            else:
+                pending.append((row, patient))
+
+        loop = asyncio.get_running_loop()
+        in_flight = None
+        for start in range(0, len(pending), self.batch_size):
+            accounts = await self._create_accounts(pending[start:start + self.batch_size])
+            if in_flight is not None:
+                await self._finish_batch(*in_flight)
+            in_flight = (accounts, loop.run_in_executor(None, self._insert_batch, accounts)) if accounts else None
+        if in_flight is not None:
+            await self._finish_batch(*in_flight)
+
+        results = [self.results[row] for row in sorted(self.results)]
+        counts = {status.value: 0 for status in PatientImportStatus}
+        for result in results:
+            counts[result.status.value] += 1
+        logger.info(f"Patient import finished: {counts}")
+        return PatientImportReport(total=len(records), counts=counts, results=results)
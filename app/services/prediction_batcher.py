@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class PredictionBatcher:
+    """
+    Gather concurrent single predictions into one model call.
+
+    Requests submitted within max_wait_ms of each other (or until
+    max_batch_size is reached) are passed to predict_batch together, so the
+    vectorizer and forest run once on a multi-row sparse matrix instead of
+    once per request. predict_batch is a coroutine function that runs the
+    batch off the event loop (see InferenceExecutor).
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self._batches = 0
+        self._items = 0
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue one item for the next batch and wait for its result.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._batches += 1
+            self._items += len(batch)
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        try:
+            results = await self.predict_batch(items)
+        except Exception as e:
+            if len(batch) == 1 or not isinstance(e, ValueError):
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            # One bad input must not fail its neighbours: retry the items one by one
+            logger.warning(f"Batch of {len(batch)} predictions failed, retrying individually: {str(e)}")
+            await asyncio.gather(*(self._run([entry]) for entry in batch))
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get batching statistics."""
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "average_batch_size": self._items / self._batches if self._batches else 0.0,
+            "pending": len(self._pending),
+        }
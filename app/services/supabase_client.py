@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import httpx
+from supabase import Client, ClientOptions, create_client
+from supabase_auth.errors import AuthApiError, AuthRetryableError
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+# Per-attempt HTTP timeout, and the overall deadline of a call including retries
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "5"))
+SUPABASE_DEADLINE_SECONDS = float(os.getenv("SUPABASE_DEADLINE_SECONDS", "15"))
+# Retries of idempotent calls after transient failures (exponential backoff with full jitter)
+SUPABASE_MAX_RETRIES = int(os.getenv("SUPABASE_MAX_RETRIES", "2"))
+SUPABASE_RETRY_BASE_DELAY_SECONDS = float(os.getenv("SUPABASE_RETRY_BASE_DELAY_SECONDS", "0.2"))
+# Threads (and pooled connections) dedicated to Supabase calls
+SUPABASE_MAX_CONCURRENCY = int(os.getenv("SUPABASE_MAX_CONCURRENCY", "8"))
+# After this many consecutive transient failures, calls fail fast for SUPABASE_CIRCUIT_RESET_SECONDS
+SUPABASE_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("SUPABASE_CIRCUIT_FAILURE_THRESHOLD", "5"))
+SUPABASE_CIRCUIT_RESET_SECONDS = float(os.getenv("SUPABASE_CIRCUIT_RESET_SECONDS", "30"))
+
+class SupabaseUnavailableError(Exception):
+    """Supabase is unreachable or too slow (the call timed out or the circuit is open)."""
+    pass
+
+def is_transient_error(error: Exception) -> bool:
+    """Network errors, timeouts, 5xx and 429 responses; not client errors such as a wrong OTP."""
+    if isinstance(error, (httpx.TransportError, AuthRetryableError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, AuthApiError):
+        return error.status == 429 or error.status >= 500
+    return False
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls go through. After failure_threshold consecutive transient
+    failures the circuit opens and calls fail fast for reset_seconds; then a
+    single trial call is let through (half-open), which closes the circuit
+    on success or re-opens it on failure.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Supabase circuit opened after {self.failures} consecutive failures.")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
+
+class SupabaseGateway:
+    """
+    Shared Supabase clients behind one connection pool, thread pool and circuit breaker.
+
+    The supabase-py clients are synchronous, so every call runs on a small
+    dedicated thread pool (never on the event loop, and never competing with
+    the default executor). Each call has a deadline; idempotent calls are
+    retried on transient failures with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = SUPABASE_URL,
+        anon_key: Optional[str] = SUPABASE_ANON_KEY,
+        service_role_key: Optional[str] = SUPABASE_SERVICE_ROLE_KEY,
+        timeout_seconds: float = SUPABASE_TIMEOUT_SECONDS,
+        deadline_seconds: float = SUPABASE_DEADLINE_SECONDS,
+        max_retries: int = SUPABASE_MAX_RETRIES,
+        retry_base_delay: float = SUPABASE_RETRY_BASE_DELAY_SECONDS,
+        max_concurrency: int = SUPABASE_MAX_CONCURRENCY
+    ):
+        self.url = url
+        self.anon_key = anon_key
+        self.service_role_key = service_role_key
+        self.timeout_seconds = timeout_seconds
+        self.deadline_seconds = deadline_seconds
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.breaker = CircuitBreaker(SUPABASE_CIRCUIT_FAILURE_THRESHOLD, SUPABASE_CIRCUIT_RESET_SECONDS)
+        self.http_client = httpx.Client(
+            timeout=httpx.Timeout(timeout_seconds),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            follow_redirects=True
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="supabase")
+        self._clients: Dict[str, Client] = {}
+        self._clients_lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "timeouts": 0}
+
+    def _client(self, key: Optional[str]) -> Client:
+        with self._clients_lock:
+            if key not in self._clients:
+                options = ClientOptions(
+                    auto_refresh_token=False,
+                    persist_session=False,
+                    postgrest_client_timeout=self.timeout_seconds,
+                    httpx_client=self.http_client
+                )
+                self._clients[key] = create_client(self.url, key, options)
+            return self._clients[key]
+
+    @property
+    def anon(self) -> Client:
+        """Client with the anon key (end-user auth flows)."""
+        return self._client(self.anon_key)
+
+    @property
+    def admin(self) -> Client:
+        """Client with the service role key (admin API)."""
+        return self._client(self.service_role_key)
+
+    async def run(self, fn: Callable, *args, idempotent: bool = False, **kwargs) -> Any:
+        """
+        Call a blocking supabase-py method on the Supabase thread pool.
+
+        Args:
+            fn: Client method to call
+            idempotent: Retry on transient failures (never set it for calls that
+                create users or send emails)
+
+        Raises:
+            SupabaseUnavailableError: if the circuit is open or the deadline passed
+            Exception: whatever the client raised for a non-transient error
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline_seconds
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        self.stats["calls"] += 1
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise SupabaseUnavailableError("Supabase is unavailable (circuit open); try again shortly.")
+            remaining = deadline - loop.time()
+            try:
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs)),
+                    timeout=max(remaining, 0.001)
+                )
+            except Exception as e:
+                if not is_transient_error(e):
+                    # The service answered; the request itself was rejected
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                self.stats["failures"] += 1
+                if isinstance(e, asyncio.TimeoutError):
+                    self.stats["timeouts"] += 1
+                delay = random.uniform(0, self.retry_base_delay * 2 ** attempt)
+                if attempt + 1 >= attempts or loop.time() + delay >= deadline:
+                    logger.warning(f"Supabase call {getattr(fn, '__name__', fn)} failed: {str(e) or type(e).__name__}")
+                    raise SupabaseUnavailableError(f"Supabase request failed: {str(e) or type(e).__name__}") from e
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "circuit": self.breaker.get_stats()}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.http_client.close()
+
+_gateway: Optional[SupabaseGateway] = None
+_gateway_lock = threading.Lock()
+
+def get_supabase_gateway() -> SupabaseGateway:
+    """Get the process-wide Supabase gateway."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = SupabaseGateway()
+        return _gateway
@@ -1,26 +1,30 @@
-import os
 import logging
-from supabase import create_client, Client
-from dotenv import load_dotenv
+from supabase_auth.errors import AuthApiError
 from typing import List, Dict, Optional
+from app.services.supabase_client import SupabaseGateway, SupabaseUnavailableError, get_supabase_gateway
 
-load_dotenv()
 logger = logging.getLogger(__name__)
 
 class SupabaseService:
-    def __init__(self):
-        # Initialize Supabase client
-        self.supabase = create_client(
-            os.getenv("SUPABASE_URL"),
-            os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        )
+    """
+    Supabase auth operations for the API.
+
+    All instances share the service-role client of the process-wide
+    SupabaseGateway; calls run off the event loop with timeouts, retries
+    (idempotent calls only) and the gateway's circuit breaker.
+    SupabaseUnavailableError is raised as-is so routes can answer 503.
+    """
+
+    def __init__(self, gateway: Optional[SupabaseGateway] = None):
+        self.gateway = gateway or get_supabase_gateway()
+        self.supabase = self.gateway.admin
 
     async def sign_up(self, email: str, password: str, user_metadata: Dict) -> Dict:
         """
         Register a new user with Supabase.
         """
         try:
-            response = self.supabase.auth.admin.create_user({
+            response = await self.gateway.run(self.supabase.auth.admin.create_user, {
                 "email": email,
                 "password": password,
                 "email_confirm": True,
@@ -33,22 +37,26 @@ class SupabaseService:
                 "email": response.user.email,
                 "user_metadata": response.user.user_metadata,
             }
+        except SupabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Error creating user: {str(e)}")
             raise Exception(f"Failed to create user: {str(e)}")
 
-    def sign_in_with_password(self, email: str, password: str):
+    async def sign_in_with_password(self, email: str, password: str):
         """
         Authenticate a user with email and password.
         """
         try:
-            response = self.supabase.auth.sign_in_with_password({
+            response = await self.gateway.run(self.supabase.auth.sign_in_with_password, {
                 "email": email,
                 "password": password
             })
             if not response.session:
                 raise Exception("Authentication failed")
             return response.session
+        except SupabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Sign in error: {str(e)}")
             raise Exception("Invalid credentials")
@@ -59,7 +67,7 @@ class SupabaseService:
         """
         try:
             # Use the `sign_in_with_otp` method with type="email" to send an OTP
-            response = self.supabase.auth.sign_in_with_otp({
+            response = await self.gateway.run(self.supabase.auth.sign_in_with_otp, {
                 "email": email,
                 "options": {
                     "should_create_user": False,  # Do not create a new user
@@ -68,6 +76,8 @@ class SupabaseService:
             })
             logger.info(f"2FA code sent to: {email}")
             return response
+        except SupabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Error sending 2FA code: {str(e)}")
             raise Exception("Failed to send 2FA code")
@@ -77,12 +87,14 @@ class SupabaseService:
         Verify the 2FA code entered by the user.
         """
         try:
-            response = self.supabase.auth.verify_otp({
+            response = await self.gateway.run(self.supabase.auth.verify_otp, {
                 "email": email,
                 "token": token,
                 "type": "email"
             })
             return response
+        except SupabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Error verifying 2FA code: {str(e)}")
             raise Exception("Failed to verify 2FA code")
@@ -92,8 +104,10 @@ class SupabaseService:
         Sign out the current user.
         """
         try:
-            self.supabase.auth.sign_out()
+            await self.gateway.run(self.supabase.auth.sign_out, idempotent=True)
             logger.info("User signed out successfully")
+        except SupabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Sign out error: {str(e)}")
             raise Exception("Failed to sign out")
@@ -103,8 +117,10 @@ class SupabaseService:
         Send a password reset email to the user.
         """
         try:
-            self.supabase.auth.reset_password_for_email(email)
+            await self.gateway.run(self.supabase.auth.reset_password_for_email, email)
             logger.info(f"Password reset email sent to: {email}")
+        except SupabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Password reset error: {str(e)}")
             raise Exception("Failed to send password reset email")
@@ -122,11 +138,13 @@ class SupabaseService:
         """
         try:
             # Use the admin API to update user metadata
-            response = self.supabase.auth.admin.update_user_by_id(
+            response = await self.gateway.run(
+                self.supabase.auth.admin.update_user_by_id,
                 supabase_uid,
                 {
                     "user_metadata": metadata
-                }
+                },
+                idempotent=True
             )
             
             if not response.user:
@@ -138,16 +156,20 @@ class SupabaseService:
                 "email": response.user.email,
                 "user_metadata": response.user.user_metadata,
             }
+        except SupabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Error updating user metadata: {str(e)}")
             raise Exception(f"Failed to update user metadata: {str(e)}")
     
-    def get_active_sessions(self, supabase_uid: str) -> List[Dict[str, Optional[str]]]:
+    async def get_active_sessions(self, supabase_uid: str) -> List[Dict[str, Optional[str]]]:
         """
         Retrieve active sessions for a specific Supabase user.
         """
         try:
-            user_response = self.supabase.auth.admin.get_user_by_id(supabase_uid)
+            user_response = await self.gateway.run(
+                self.supabase.auth.admin.get_user_by_id, supabase_uid, idempotent=True
+            )
             if not user_response or not user_response.user:
                 logger.warning(f"No user found for UID: {supabase_uid}")
                 return []
@@ -168,14 +190,40 @@ class SupabaseService:
             logger.error(f"Error retrieving active sessions: {str(e)}")
             return []
 
-    def revoke_user_sessions(self, supabase_uid: str) -> bool:
+    async def revoke_user_sessions(self, supabase_uid: str) -> bool:
         """
         Revoke all active sessions for a specific Supabase user.
         """
         try:
-            self.supabase.auth.admin.revoke_refresh_tokens(supabase_uid)
+            await self.gateway.run(self.supabase.auth.admin.revoke_refresh_tokens, supabase_uid, idempotent=True)
             logger.info(f"Successfully revoked all sessions for user: {supabase_uid}")
             return True
+        except SupabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Error revoking user sessions: {str(e)}")
-            raise Exception(f"Failed to revoke user sessions: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to revoke user sessions: {str(e)}")
+
+    async def delete_user(self, supabase_uid: str) -> None:
+        """
+        Delete a Supabase user (e.g. to undo a sign-up whose database insert failed).
+
+        A user that no longer exists counts as deleted, so retries are safe.
+        """
+        try:
+            await self.gateway.run(self.supabase.auth.admin.delete_user, supabase_uid, idempotent=True)
+            logger.info(f"Deleted Supabase user: {supabase_uid}")
+        except AuthApiError as e:
+            if e.status != 404:
+                logger.error(f"Error deleting user: {str(e)}")
+                raise Exception(f"Failed to delete user: {str(e)}")
+            logger.info(f"Supabase user already deleted: {supabase_uid}")
+
+_supabase_service: Optional[SupabaseService] = None
+
+def get_supabase_service() -> SupabaseService:
+    """Get the shared SupabaseService (FastAPI dependency)."""
+    global _supabase_service
+    if _supabase_service is None:
+        _supabase_service = SupabaseService()
+    return _supabase_service
\ No newline at end of file
@@ -0,0 +1,130 @@
+import csv
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from app.schemas.disease_schema import Prediction
+from app.utils.ml_utils import clean_symptoms, format_prediction_batch
+from app.utils.symptom_normalizer import SYMPTOMS_CSV_PATH
+
+logger = logging.getLogger(__name__)
+
+class DiseaseIndex:
+    """
+    Inverted index from canonical symptom to the diseases listed with it.
+
+    Postings are stored as sorted NumPy arrays (CSR by symptom). Diseases are
+    ranked by idf-weighted overlap with the query, i.e. the cosine similarity
+    of binary symptom vectors weighted by idf, so a symptom shared by many
+    diseases ("pain", "patients") counts less than a specific one. Scoring a
+    batch is one bincount over the postings of its symptoms.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, Sequence[str]]], classes: Optional[Sequence[str]] = None):
+        """
+        Args:
+            rows: (disease, canonical symptoms) pairs
+            classes: Disease labels in model class order; rows for other diseases are skipped
+        """
+        rows = list(rows)
+        if classes is None:
+            classes = sorted({disease for disease, _ in rows})
+        self.classes = np.asarray(classes)
+        class_ids = {disease: i for i, disease in enumerate(self.classes.tolist())}
+
+        pairs = {
+            (symptom, class_ids[disease])
+            for disease, symptoms in rows if disease in class_ids
+            for symptom in symptoms
+        }
+        pair_symptoms = np.array([symptom for symptom, _ in pairs], dtype=str)
+        pair_diseases = np.array([disease for _, disease in pairs], dtype=np.int32)
+        self.symptoms, symptom_ids = np.unique(pair_symptoms, return_inverse=True)
+        order = np.lexsort((pair_diseases, symptom_ids))
+        symptom_ids = symptom_ids[order]
+        self.postings = pair_diseases[order]
+        self.indptr = np.searchsorted(symptom_ids, np.arange(len(self.symptoms) + 1)).astype(np.int32)
+
+        # Same smoothed idf as the TF-IDF vectorizer
+        n_diseases = len(np.unique(self.postings))
+        self.idf = np.log((1 + n_diseases) / (1 + np.diff(self.indptr))) + 1
+        posting_idf = self.idf[symptom_ids]
+        disease_norms = np.sqrt(np.bincount(self.postings, weights=posting_idf ** 2, minlength=len(self.classes)))
+        self.weights = posting_idf / disease_norms[self.postings]
+
+    @classmethod
+    def from_csv(cls, csv_path: str = SYMPTOMS_CSV_PATH, classes: Optional[Sequence[str]] = None) -> "DiseaseIndex":
+        """Build the index from the training CSV ("Disease" and "Symptoms" columns)."""
+        rows = []
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                cleaned = clean_symptoms(row.get('Symptoms') or '')
+                rows.append((row['Disease'], [s for s in cleaned.split(', ') if s]))
+        index = cls(rows, classes)
+        logger.info(f"Disease index built with {len(index.symptoms)} symptoms and {len(index.postings)} postings.")
+        return index
+
+    def lookup(self, symptoms: Sequence[str]) -> np.ndarray:
+        """Get the ids of the indexed symptoms among `symptoms` (unknown ones are dropped)."""
+        if not len(symptoms) or not len(self.symptoms):
+            return np.zeros(0, dtype=np.int64)
+        symptoms = np.asarray(symptoms, dtype=str)
+        positions = np.minimum(np.searchsorted(self.symptoms, symptoms), len(self.symptoms) - 1)
+        return positions[self.symptoms[positions] == symptoms]
+
+    def covers(self, cleaned: str, max_symptoms: int) -> bool:
+        """Whether a canonical symptom string has at most max_symptoms symptoms, all indexed."""
+        symptoms = cleaned.split(', ')
+        return len(symptoms) <= max_symptoms and len(self.lookup(symptoms)) == len(symptoms)
+
+    def score(self, cleaned_list: Sequence[str]) -> np.ndarray:
+        """
+        Score every disease against canonical symptom strings.
+
+        Args:
+            cleaned_list: Cleaned, canonical symptom strings
+
+        Returns:
+            Array of shape (len(cleaned_list), n_diseases) with cosine scores in [0, 1]
+
+        Raises:
+            ValueError: if a row has no indexed symptom
+        """
+        rows, symptom_ids = [], []
+        for row, cleaned in enumerate(cleaned_list):
+            ids = self.lookup(cleaned.split(', '))
+            if not len(ids):
+                raise ValueError(f"None of the symptoms of item {row} are known.")
+            rows.append(np.full(len(ids), row))
+            symptom_ids.append(ids)
+        rows = np.concatenate(rows)
+        symptom_ids = np.concatenate(symptom_ids)
+
+        query_idf = self.idf[symptom_ids]
+        query_norms = np.sqrt(np.bincount(rows, weights=query_idf ** 2))
+        starts = self.indptr[symptom_ids]
+        counts = self.indptr[symptom_ids + 1] - starts
+        ends = np.cumsum(counts)
+        positions = np.repeat(starts - (ends - counts), counts) + np.arange(int(ends[-1]))
+        posting_rows = np.repeat(rows, counts)
+        weights = self.weights[positions] * np.repeat(query_idf, counts) / query_norms[posting_rows]
+
+        n_classes = len(self.classes)
+        return np.bincount(
+            posting_rows * n_classes + self.postings[positions],
+            weights=weights,
+            minlength=len(cleaned_list) * n_classes
+        ).reshape(len(cleaned_list), n_classes)
+
+    def predict_cleaned(
+        self,
+        cleaned_list: Sequence[str],
+        specialty_map: Dict[str, str],
+        top_k: int = 5
+    ) -> List[List[Prediction]]:
+        """Rank diseases for canonical symptom strings, in the same shape as the model's predictions."""
+        return format_prediction_batch(
+            probabilities=self.score(cleaned_list),
+            classes=self.classes,
+            specialty_map=specialty_map,
+            top_k=top_k
+        )
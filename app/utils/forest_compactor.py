@@ -0,0 +1,224 @@
+import os
+import logging
+import numpy as np
+from typing import Dict, Optional
+from app.utils.forest_compiler import (
+    LEAF_FEATURE, CompiledForest, _arrays_checksum, _build_traversal_index, load_published_forest, publish_forest
+)
+from app.utils.ml_utils import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+COMPACT_SUFFIX = ".compact"
+INDEX_ARRAYS = (
+    "feature", "left", "right", "roots", "chain_id", "chain_pos", "chain_end",
+    "feature_indptr", "feature_nodes", "leaf_index", "leaf_indptr", "leaf_classes",
+)
+
+def compact_forest_path(model_path: str) -> str:
+    """
+    Get the directory holding the compact (pruned) export of a forest artifact.
+    """
+    return f"{os.path.splitext(model_path)[0]}{COMPACT_SUFFIX}"
+
+def floor_float32(values: np.ndarray) -> np.ndarray:
+    """
+    Round float64 thresholds down to float32.
+
+    For any float32 input x, x <= t holds exactly when x <= floor32(t), so
+    splits on float32 features keep their float64 behaviour.
+    """
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+def _node_depths(forest: CompiledForest, n_nodes: int) -> np.ndarray:
+    # Level-order walk from the roots; leaves point to themselves, so stop there
+    depth = np.full(n_nodes, -1, dtype=np.int64)
+    is_leaf = forest.feature == LEAF_FEATURE
+    level = np.asarray(forest.roots, dtype=np.int64)
+    current = 0
+    while level.size:
+        depth[level] = current
+        internal = level[~is_leaf[level]]
+        level = np.concatenate([forest.left[internal], forest.right[internal]]).astype(np.int64)
+        current += 1
+    return depth
+
+def _top_k_entries(forest: CompiledForest, X, top_k: int, batch_size: int) -> np.ndarray:
+    """Mark the leaf class entries that contribute to a top-k class of some reference row."""
+    used = np.zeros(len(forest.leaf_classes), dtype=bool)
+    for start in range(0, X.shape[0], batch_size):
+        batch = X[start:start + batch_size]
+        top_classes = top_k_indices(forest.predict_proba(batch), top_k)
+
+        leaves = forest.leaf_index[forest.apply(batch).ravel()]
+        rows = np.repeat(np.arange(batch.shape[0]), forest.n_trees)
+        starts = forest.leaf_indptr[leaves]
+        counts = forest.leaf_indptr[leaves + 1] - starts
+        ends = np.cumsum(counts)
+        positions = np.repeat(starts - (ends - counts), counts) + np.arange(int(counts.sum()))
+        entry_rows = np.repeat(rows, counts)
+        in_top_k = (top_classes[entry_rows] == forest.leaf_classes[positions][:, np.newaxis]).any(axis=1)
+        used[positions[in_top_k]] = True
+    return used
+
+def prune_forest(forest: CompiledForest, X, top_k: int = 5, batch_size: int = 256) -> CompiledForest:
+    """
+    Prune everything that never reaches the top-k output on the reference rows.
+
+    Leaf class entries that are not among the top_k classes of any reference
+    row reaching the leaf are dropped; subtrees whose leaves all end up empty
+    collapse into one empty leaf, and trees that become empty are removed.
+    Dropped entries only ever lowered classes outside a row's top_k, so the
+    top_k classes and their probabilities are unchanged on the reference rows.
+
+    Args:
+        forest: Full compiled forest
+        X: Reference feature rows (e.g. the training CSV and partial symptom sets)
+        top_k: Number of classes the API returns
+        batch_size: Reference rows evaluated at once
+
+    Returns:
+        The pruned forest with compact dtypes (see to_compact_arrays)
+    """
+    n_nodes = len(forest.feature)
+    is_leaf = forest.feature == LEAF_FEATURE
+    used_entries = _top_k_entries(forest, X, top_k, batch_size)
+
+    # Empty leaves, then internal nodes whose two children are empty, bottom-up by depth
+    entry_leaf = np.repeat(np.arange(len(forest.leaf_indptr) - 1), np.diff(forest.leaf_indptr))
+    leaf_used = np.bincount(entry_leaf[used_entries], minlength=len(forest.leaf_indptr) - 1) > 0
+    empty = np.zeros(n_nodes, dtype=bool)
+    empty[is_leaf] = ~leaf_used[forest.leaf_index[is_leaf]]
+    depth = _node_depths(forest, n_nodes)
+    internal_by_depth = np.flatnonzero(~is_leaf)
+    internal_by_depth = internal_by_depth[np.argsort(-depth[internal_by_depth], kind="stable")]
+    boundaries = np.flatnonzero(np.diff(depth[internal_by_depth])) + 1
+    for level in np.split(internal_by_depth, boundaries):
+        empty[level] = empty[forest.left[level]] & empty[forest.right[level]]
+
+    # Keep non-empty trees, and stop descending at collapsed subtrees
+    keep = np.zeros(n_nodes, dtype=bool)
+    level = np.asarray(forest.roots, dtype=np.int64)
+    level = level[~empty[level]]
+    roots = level
+    while level.size:
+        keep[level] = True
+        expand = level[~is_leaf[level] & ~empty[level]]
+        level = np.concatenate([forest.left[expand], forest.right[expand]]).astype(np.int64)
+
+    old_nodes = np.flatnonzero(keep)
+    new_id = np.full(n_nodes, -1, dtype=np.int64)
+    new_id[old_nodes] = np.arange(len(old_nodes))
+    becomes_leaf = is_leaf[old_nodes] | empty[old_nodes]
+    own = np.arange(len(old_nodes))
+
+    feature = np.where(becomes_leaf, LEAF_FEATURE, forest.feature[old_nodes])
+    left = np.where(becomes_leaf, own, new_id[forest.left[old_nodes]])
+    right = np.where(becomes_leaf, own, new_id[forest.right[old_nodes]])
+
+    # Leaf CSR: kept entries of surviving original leaves, nothing for collapsed subtrees
+    leaf_nodes = old_nodes[becomes_leaf]
+    leaf_index = np.full(len(old_nodes), -1, dtype=np.int64)
+    leaf_index[becomes_leaf] = np.arange(len(leaf_nodes))
+    original_leaf = np.where(is_leaf[leaf_nodes] & ~empty[leaf_nodes], forest.leaf_index[leaf_nodes], -1)
+    starts = np.where(original_leaf >= 0, forest.leaf_indptr[np.maximum(original_leaf, 0)], 0)
+    ends = np.where(original_leaf >= 0, forest.leaf_indptr[np.maximum(original_leaf, 0) + 1], 0)
+    counts = ends - starts
+    positions = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(int(counts.sum()))
+    kept = used_entries[positions]
+    positions = positions[kept]
+    kept_counts = np.bincount(np.repeat(np.arange(len(leaf_nodes)), counts)[kept], minlength=len(leaf_nodes))
+    leaf_indptr = np.zeros(len(leaf_nodes) + 1, dtype=np.int64)
+    np.cumsum(kept_counts, out=leaf_indptr[1:])
+
+    arrays = {
+        "feature": feature,
+        "threshold": forest.threshold[old_nodes],
+        "left": left,
+        "right": right,
+        "roots": new_id[roots],
+        "leaf_index": leaf_index,
+        "leaf_indptr": leaf_indptr,
+        "leaf_classes": forest.leaf_classes[positions],
+        "leaf_values": forest.leaf_values[positions],
+        "classes": np.asarray(forest.classes),
+    }
+    arrays.update(_build_traversal_index(arrays, forest.n_features_in_))
+    arrays = to_compact_arrays(arrays)
+    meta = {
+        "n_features": forest.n_features_in_,
+        "n_nodes": int(len(old_nodes)),
+        "n_leaves": int(len(leaf_nodes)),
+        "n_estimators": forest.n_estimators,
+        "max_chain_length": int(arrays["chain_pos"].max()) + 1 if len(old_nodes) else 1,
+        "source_checksum": forest.meta["source_checksum"],
+        "checksum": _arrays_checksum(arrays),
+        "top_k": top_k,
+        "reference_rows": int(X.shape[0]),
+    }
+    return CompiledForest(arrays, meta)
+
+def to_compact_arrays(arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Store thresholds and leaf values as float32 and node/leaf indices as int32.
+    """
+    compact = dict(arrays)
+    for name in INDEX_ARRAYS:
+        if len(arrays[name]) and int(np.abs(arrays[name]).max()) > np.iinfo(np.int32).max:
+            raise ValueError(f"{name} does not fit in int32")
+        compact[name] = np.ascontiguousarray(arrays[name], dtype=np.int32)
+    compact["threshold"] = np.ascontiguousarray(floor_float32(np.asarray(arrays["threshold"], dtype=np.float64)))
+    compact["leaf_values"] = np.ascontiguousarray(arrays["leaf_values"], dtype=np.float32)
+    return compact
+
+def compare_forests(full: CompiledForest, compact: CompiledForest, X, y: Optional[np.ndarray] = None, top_k: int = 5) -> Dict:
+    """
+    Compare a compact forest with the full one on feature rows.
+
+    Args:
+        full: Full compiled forest
+        compact: Pruned forest
+        X: Feature rows
+        y: Optional class indices, to report accuracy
+        top_k: Number of classes the API returns
+
+    Returns:
+        Top-1/top-k agreement, the largest change of a returned probability,
+        and (with y) top-1 and top-k accuracy of both forests
+    """
+    full_proba = full.predict_proba(X)
+    compact_proba = compact.predict_proba(X)
+    full_top = top_k_indices(full_proba, top_k)
+    compact_top = top_k_indices(compact_proba, top_k)
+    rows = np.arange(X.shape[0])[:, np.newaxis]
+    report = {
+        "rows": int(X.shape[0]),
+        "top1_agreement": float(np.mean(full_top[:, 0] == compact_top[:, 0])),
+        "topk_set_agreement": float(np.mean((np.sort(full_top, axis=1) == np.sort(compact_top, axis=1)).all(axis=1))),
+        "max_topk_probability_change": float(np.abs(full_proba[rows, full_top] - compact_proba[rows, full_top]).max()),
+    }
+    if y is not None:
+        for name, top in (("full", full_top), ("compact", compact_top)):
+            report[f"{name}_top1_accuracy"] = float(np.mean(top[:, 0] == y))
+            report[f"{name}_topk_accuracy"] = float(np.mean((top == y[:, np.newaxis]).any(axis=1)))
+        report["top1_accuracy_delta"] = report["compact_top1_accuracy"] - report["full_top1_accuracy"]
+        report["topk_accuracy_delta"] = report["compact_topk_accuracy"] - report["full_topk_accuracy"]
+    return report
+
+def save_compact_forest(forest: CompiledForest, path: str) -> str:
+    """Publish a compact forest into its export directory (see publish_forest)."""
+    return publish_forest(forest, path)
+
+def load_compact_forest(model_path: str) -> CompiledForest:
+    """
+    Load the compact export of a forest artifact, memory-mapped.
+
+    The export is produced offline (scripts/export_compact_forest.py).
+
+    Raises:
+        FileNotFoundError: if there is no export, or it is older than the artifact
+    """
+    return load_published_forest(compact_forest_path(model_path), model_path)
@@ -0,0 +1,471 @@
+import os
+import json
+import time
+import hashlib
+import shutil
+import logging
+import numpy as np
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent exports are not serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# File naming the published version inside a forest export directory
+CURRENT_POINTER = "CURRENT"
+
+# sklearn marks leaves with feature == TREE_UNDEFINED (-2)
+LEAF_FEATURE = -2
+ARRAY_NAMES = (
+    "feature",
+    "threshold",
+    "left",
+    "right",
+    "roots",
+    "chain_id",
+    "chain_pos",
+    "chain_end",
+    "feature_indptr",
+    "feature_nodes",
+    "leaf_index",
+    "leaf_indptr",
+    "leaf_classes",
+    "leaf_values",
+    "classes",
+)
+
+def forest_checksum(model) -> str:
+    """
+    Compute a SHA-256 checksum over the node arrays of a fitted sklearn forest.
+
+    Args:
+        model: Fitted RandomForestClassifier
+
+    Returns:
+        Hex digest identifying the exact trees of the forest
+    """
+    digest = hashlib.sha256()
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        for array in (tree.feature, tree.threshold, tree.children_left, tree.children_right, tree.value):
+            digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+def _plain_classes(classes) -> np.ndarray:
+    # Object arrays cannot be saved without pickle; labels are ints or strings
+    classes = np.asarray(classes)
+    return classes.astype(str) if classes.dtype == object else classes
+
+def _arrays_checksum(arrays: Dict[str, np.ndarray]) -> str:
+    digest = hashlib.sha256()
+    for name in ARRAY_NAMES:
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()
+
+def _build_traversal_index(arrays: Dict[str, np.ndarray], n_features: int) -> Dict[str, np.ndarray]:
+    """
+    Build the zero-chain and feature-to-node indexes used by CompiledForest.apply.
+
+    A zero chain follows, from a chain head, the child an all-zero input takes
+    (left when threshold >= 0). Every node belongs to exactly one chain, and
+    every chain ends in a leaf.
+    """
+    feature = arrays["feature"]
+    threshold = arrays["threshold"]
+    n_nodes = len(feature)
+    is_leaf = feature == LEAF_FEATURE
+    zero_child = np.where(threshold >= 0, arrays["left"], arrays["right"])
+
+    is_head = np.ones(n_nodes, dtype=bool)
+    is_head[zero_child[~is_leaf]] = False
+    heads = np.flatnonzero(is_head)
+
+    chain_id = np.empty(n_nodes, dtype=np.intp)
+    chain_pos = np.empty(n_nodes, dtype=np.intp)
+    chain_end = np.empty(len(heads), dtype=np.intp)
+    current = heads
+    ids = np.arange(len(heads))
+    position = 0
+    while current.size:
+        chain_id[current] = ids
+        chain_pos[current] = position
+        ended = is_leaf[current]
+        chain_end[ids[ended]] = current[ended]
+        current = zero_child[current[~ended]]
+        ids = ids[~ended]
+        position += 1
+
+    internal = np.flatnonzero(~is_leaf)
+    feature_nodes = internal[np.argsort(feature[internal], kind="stable")]
+    feature_indptr = np.zeros(n_features + 1, dtype=np.intp)
+    np.cumsum(np.bincount(feature[internal], minlength=n_features), out=feature_indptr[1:])
+
+    return {
+        "chain_id": chain_id,
+        "chain_pos": chain_pos,
+        "chain_end": chain_end,
+        "feature_indptr": feature_indptr,
+        "feature_nodes": feature_nodes,
+    }
+
+class CompiledForest:
+    """
+    A random forest flattened into contiguous NumPy node arrays.
+
+    All trees are concatenated into one node table (feature, threshold,
+    left, right) and every leaf's class distribution is stored in CSR form
+    (leaf_indptr, leaf_classes, leaf_values). Inference walks all trees for
+    all rows at once with vectorized NumPy indexing instead of calling into
+    hundreds of Python-level estimator objects.
+
+    TF-IDF rows are very sparse, so traversal is organized around "zero
+    chains": the path a row takes while every tested feature is zero. A row
+    only leaves its current chain at a node testing one of its non-zero
+    features, so each step jumps straight to the next such node with a
+    single searchsorted instead of descending one level at a time.
+
+    Exposes predict_proba and classes_ so it can stand in for the sklearn model.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self.classes_ = self.classes
+        self.n_classes_ = len(self.classes_)
+        self.n_features_in_ = meta["n_features"]
+        self.n_trees = len(self.roots)
+        # Pruned forests may drop whole trees; probabilities still average over the original count
+        self.n_estimators = meta.get("n_estimators", self.n_trees)
+        self.n_chains = len(self.chain_end)
+        self.max_chain_length = meta["max_chain_length"]
+        self.meta = meta
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in ARRAY_NAMES}
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """
+        Compile a fitted RandomForestClassifier (single output) into node arrays.
+        """
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+
+        features, thresholds, lefts, rights, roots = [], [], [], [], []
+        leaf_classes, leaf_values, leaf_counts = [], [], []
+        leaf_index = []
+        offset = 0
+        n_leaves = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, LEAF_FEATURE, tree.feature))
+            thresholds.append(tree.threshold)
+            # Leaves point to themselves rather than -1 so every index stays in range
+            own = np.arange(n_nodes) + offset
+            lefts.append(np.where(is_leaf, own, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own, tree.children_right + offset))
+
+            node_leaf = np.full(n_nodes, -1, dtype=np.intp)
+            node_leaf[is_leaf] = np.arange(is_leaf.sum()) + n_leaves
+            leaf_index.append(node_leaf)
+            n_leaves += int(is_leaf.sum())
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            values = tree.value[is_leaf, 0, :]
+            normalizer = values.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values = values / normalizer
+            rows, cols = np.nonzero(values)
+            leaf_classes.append(cols)
+            leaf_values.append(values[rows, cols])
+            leaf_counts.append(np.bincount(rows, minlength=values.shape[0]))
+
+            offset += n_nodes
+
+        leaf_indptr = np.zeros(n_leaves + 1, dtype=np.intp)
+        np.cumsum(np.concatenate(leaf_counts), out=leaf_indptr[1:])
+
+        arrays = {
+            "feature": np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            "threshold": np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            "left": np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            "right": np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            "roots": np.asarray(roots, dtype=np.intp),
+            "leaf_index": np.concatenate(leaf_index),
+            "leaf_indptr": leaf_indptr,
+            "leaf_classes": np.ascontiguousarray(np.concatenate(leaf_classes), dtype=np.intp),
+            "leaf_values": np.ascontiguousarray(np.concatenate(leaf_values), dtype=np.float64),
+            "classes": _plain_classes(model.classes_),
+        }
+        arrays.update(_build_traversal_index(arrays, int(model.n_features_in_)))
+        meta = {
+            "n_features": int(model.n_features_in_),
+            "n_nodes": int(offset),
+            "n_leaves": int(n_leaves),
+            "max_chain_length": int(arrays["chain_pos"].max()) + 1,
+            "source_checksum": forest_checksum(model),
+            "checksum": _arrays_checksum(arrays),
+        }
+        return cls(arrays, meta)
+
+    def _exit_nodes(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find, for every row, the nodes where a non-zero feature leaves the zero chain.
+
+        Returns:
+            Sorted (row, chain, position) keys and the matching node ids
+        """
+        if hasattr(X, "tocsr"):
+            X = X.tocsr()
+            counts = np.diff(X.indptr)
+            rows = np.repeat(np.arange(X.shape[0]), counts)
+            cols = X.indices
+            # sklearn evaluates splits on float32 inputs
+            values = X.data.astype(np.float32)
+        else:
+            X = np.asarray(X, dtype=np.float32)
+            rows, cols = np.nonzero(X)
+            values = X[rows, cols]
+
+        starts = self.feature_indptr[cols]
+        counts = self.feature_indptr[cols + 1] - starts
+        ends = np.cumsum(counts)
+        positions = np.repeat(starts - (ends - counts), counts) + np.arange(int(counts.sum()))
+        nodes = self.feature_nodes[positions]
+        values = np.repeat(values, counts)
+        rows = np.repeat(rows, counts)
+
+        thresholds = self.threshold[nodes]
+        leaves_chain = np.where(thresholds >= 0, values > thresholds, values <= thresholds)
+        nodes = nodes[leaves_chain]
+        rows = rows[leaves_chain]
+
+        keys = (rows * self.n_chains + self.chain_id[nodes]) * self.max_chain_length + self.chain_pos[nodes]
+        order = np.argsort(keys, kind="stable")
+        return keys[order], nodes[order]
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Find the leaf reached in every tree for every row.
+
+        Args:
+            X: Dense array or scipy sparse matrix of shape (n_rows, n_features)
+
+        Returns:
+            Global node ids of shape (n_rows, n_trees)
+        """
+        n_rows = X.shape[0]
+        keys, exit_nodes = self._exit_nodes(X)
+
+        rows = np.repeat(np.arange(n_rows, dtype=np.int64), self.n_trees)
+        chains = np.tile(self.chain_id[self.roots], n_rows).astype(np.int64)
+        positions = np.zeros(len(rows), dtype=np.int64)
+        leaves = np.empty(len(rows), dtype=np.intp)
+        pending = np.arange(len(rows))
+
+        while pending.size:
+            chain_keys = rows * self.n_chains + chains
+            query = chain_keys * self.max_chain_length + positions
+            idx = np.searchsorted(keys, query)
+            found = idx < len(keys)
+            found[found] = keys[idx[found]] // self.max_chain_length == chain_keys[found]
+
+            # No exit left on this chain: the row ends at the chain's leaf
+            done = ~found
+            leaves[pending[done]] = self.chain_end[chains[done]]
+
+            exits = exit_nodes[idx[found]]
+            following = np.where(self.threshold[exits] >= 0, self.right[exits], self.left[exits])
+            pending = pending[found]
+            rows = rows[found]
+            chains = self.chain_id[following].astype(np.int64)
+            positions = self.chain_pos[following].astype(np.int64)
+
+        return leaves.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Average the leaf class distributions of all trees, like sklearn's predict_proba.
+        """
+        nodes = self.apply(X).ravel()
+        n_rows = len(nodes) // self.n_trees
+        rows = np.repeat(np.arange(n_rows), self.n_trees)
+
+        leaves = self.leaf_index[nodes]
+        starts = self.leaf_indptr[leaves]
+        counts = self.leaf_indptr[leaves + 1] - starts
+        total = int(counts.sum())
+
+        # Expand each (row, leaf) pair into the leaf's non-zero class entries
+        ends = np.cumsum(counts)
+        positions = np.repeat(starts - (ends - counts), counts) + np.arange(total)
+        flat = np.repeat(rows, counts) * self.n_classes_ + self.leaf_classes[positions]
+
+        proba = np.bincount(
+            flat,
+            weights=self.leaf_values[positions],
+            minlength=n_rows * self.n_classes_
+        ).reshape(n_rows, self.n_classes_)
+        return proba / self.n_estimators
+
+    def verify_checksum(self) -> None:
+        """
+        Verify the compiled arrays against the checksum recorded at compile time.
+        """
+        actual = _arrays_checksum(self.arrays)
+        if actual != self.meta["checksum"]:
+            raise ValueError("Compiled forest checksum mismatch; the artifact is corrupted")
+
+    def validate_against(self, model, X=None, atol: float = 1e-6) -> None:
+        """
+        Validate the compiled forest against the sklearn model it was built from.
+
+        Args:
+            model: The original RandomForestClassifier
+            X: Optional probe rows; predictions must match predict_proba within atol
+            atol: Absolute tolerance for probabilities
+        """
+        if forest_checksum(model) != self.meta["source_checksum"]:
+            raise ValueError("Compiled forest was built from a different model")
+        if X is not None:
+            expected = model.predict_proba(X)
+            actual = self.predict_proba(X)
+            if not np.allclose(actual, expected, atol=atol):
+                max_error = float(np.abs(actual - expected).max())
+                raise ValueError(f"Compiled forest deviates from predict_proba (max error {max_error})")
+
+    def save(self, path: str) -> None:
+        """
+        Save as a directory of .npy files (memory-mappable) plus meta.json.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array, allow_pickle=False)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(self.meta, f)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = "r", verify: bool = False) -> "CompiledForest":
+        """
+        Load a compiled forest saved with save().
+
+        Args:
+            path: Directory written by save()
+            mmap_mode: numpy memmap mode, so workers share the arrays via the page cache
+            verify: Check the arrays against the stored checksum. This reads every array,
+                faulting in the whole memmap, so it is done once when publishing, not at runtime
+        """
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+            for name in ARRAY_NAMES
+        }
+        forest = cls(arrays, meta)
+        if verify:
+            forest.verify_checksum()
+        return forest
+
+def compiled_forest_path(model_path: str) -> str:
+    """
+    Get the directory holding the compiled copy of a forest artifact.
+    """
+    return f"{os.path.splitext(model_path)[0]}.compiled"
+
+@contextmanager
+def _export_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive lock on an export directory (no-op where fcntl is unavailable)."""
+    with open(os.path.join(path, ".lock"), "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def publish_forest(forest: CompiledForest, path: str) -> str:
+    """
+    Publish a forest into an export directory without disturbing readers.
+
+    The arrays are saved into a new version subdirectory and verified against
+    their checksum; the CURRENT pointer file is then swapped with os.replace,
+    so a loading worker sees either the previous complete version or the new
+    one. Concurrent exports are serialized with a file lock. Versions older
+    than the previous one are removed (memory-mapped files stay readable
+    after removal).
+
+    Args:
+        forest: The forest to publish
+        path: Export directory
+
+    Returns:
+        The published version directory
+    """
+    os.makedirs(path, exist_ok=True)
+    with _export_lock(path):
+        version = f"v{time.time_ns()}-{os.getpid()}"
+        version_path = os.path.join(path, version)
+        forest.save(version_path)
+        CompiledForest.load(version_path, verify=True)
+
+        pointer = os.path.join(path, CURRENT_POINTER)
+        previous = None
+        if os.path.exists(pointer):
+            with open(pointer) as f:
+                previous = f.read().strip()
+        tmp_pointer = f"{pointer}.tmp-{os.getpid()}"
+        with open(tmp_pointer, "w") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, pointer)
+
+        for entry in os.listdir(path):
+            entry_path = os.path.join(path, entry)
+            if entry not in (version, previous) and os.path.isdir(entry_path):
+                shutil.rmtree(entry_path, ignore_errors=True)
+    return version_path
+
+def load_published_forest(path: str, model_path: str) -> CompiledForest:
+    """
+    Load the current version of an export directory written by publish_forest().
+
+    Args:
+        path: Export directory
+        model_path: Path of the sklearn forest artifact the export was built from
+
+    Raises:
+        FileNotFoundError: if nothing is published, or the export is older than the artifact
+    """
+    pointer = os.path.join(path, CURRENT_POINTER)
+    if not os.path.exists(pointer):
+        raise FileNotFoundError(f"Forest export not found: {path}")
+    if os.path.exists(model_path) and os.path.getmtime(pointer) < os.path.getmtime(model_path):
+        raise FileNotFoundError(f"Forest export {path} is older than {model_path}; re-export it")
+    with open(pointer) as f:
+        version = f.read().strip()
+    return CompiledForest.load(os.path.join(path, version))
+
+def load_compiled_forest(model_path: str) -> CompiledForest:
+    """
+    Load the compiled forest of a model artifact, memory-mapped.
+
+    The forest is compiled and validated offline (scripts/export_compiled_forest.py)
+    and never built here, so workers only ever read a published export.
+
+    Raises:
+        FileNotFoundError: if there is no export, or it is older than the artifact
+    """
+    return load_published_forest(compiled_forest_path(model_path), model_path)
@@ -1,17 +1,51 @@
-import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Tuple
 import ast
 import logging
-from scipy import stats
+import math
 from app.schemas.disease_schema import Prediction
+from app.utils.symptom_normalizer import get_symptom_normalizer
 
 logger = logging.getLogger(__name__)
 
+# Two-sided standard normal quantiles, so the request path needs neither scipy nor pandas
+Z_VALUES = {
+    0.80: 1.2815515655446004,
+    0.85: 1.4395314709384563,
+    0.90: 1.6448536269514722,
+    0.95: 1.959963984540054,
+    0.98: 2.3263478740408408,
+    0.99: 2.5758293035489004,
+    0.995: 2.807033768343811,
+    0.999: 3.2905267314918945,
+}
+
+def z_value(confidence: float) -> float:
+    """
+    Get the two-sided standard normal quantile for a confidence level.
+    
+    Args:
+        confidence: Confidence level in (0, 1)
+        
+    Returns:
+        z such that P(-z < Z < z) == confidence
+    """
+    z = Z_VALUES.get(confidence)
+    if z is None:
+        from statistics import NormalDist  # Uncommon levels only
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return z
+
+def is_missing(value: Any) -> bool:
+    """Null check for raw inputs (None or a float NaN, as read from CSV files)."""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
 def clean_symptoms(symptoms: str) -> str:
     """
     Clean and standardize symptoms text.
     
+    Spelling variants of training symptoms are mapped onto them (see SymptomNormalizer).
+    
     Args:
         symptoms: Raw symptoms string
         
@@ -19,30 +53,34 @@ def clean_symptoms(symptoms: str) -> str:
         Cleaned and standardized symptoms string
     """
     try:
-        if pd.isna(symptoms) or symptoms.strip() == '':
+        if is_missing(symptoms) or symptoms.strip() == '':
             return ''
             
         if isinstance(symptoms, str):
             if symptoms.startswith('[') and symptoms.endswith(']'):
                 symptoms = ast.literal_eval(symptoms)
             else:
-                symptoms = [s.strip() for s in symptoms.split(',')]
-                
-        cleaned_symptoms = []
-        for s in symptoms:
-            if s.strip():
-                s = s.strip().lower()
-                s = s.replace('pain in ', '').replace('severe ', '')
-                s = s.replace('mild ', '').replace('chronic ', '')
-                s = s.replace(' and ', '_').replace(' or ', '_')
-                s = s.replace(' ', '_')
-                cleaned_symptoms.append(s)
-                
+                symptoms = symptoms.split(',')
+
+        cleaned_symptoms = get_symptom_normalizer().normalize(symptoms)
         return ', '.join(cleaned_symptoms)
     except Exception as e:
         logger.error(f"Error processing symptoms: {str(e)}")
         return ''
 
+def canonicalize_symptoms(cleaned_symptoms: str) -> str:
+    """
+    Turn cleaned symptoms into an order-insensitive canonical form.
+    
+    Args:
+        cleaned_symptoms: Output of clean_symptoms
+        
+    Returns:
+        Sorted, de-duplicated symptoms joined with ', '
+    """
+    symptoms = {s.strip() for s in cleaned_symptoms.split(',') if s.strip()}
+    return ', '.join(sorted(symptoms))
+
 def calculate_confidence_interval(
     accuracy: float, 
     n_samples: int, 
@@ -61,8 +99,11 @@ def calculate_confidence_interval(
     """
     try:
         std_err = (accuracy * (1 - accuracy) / n_samples) ** 0.5
-        ci = stats.norm.interval(confidence, accuracy, std_err)
-        return (max(0, ci[0]), min(1, ci[1]))
+        if std_err <= 0:
+            # Degenerate interval: keep the previous (scipy NaN bounds clamped) result
+            return (0, 1)
+        margin = z_value(confidence) * std_err
+        return (max(0, accuracy - margin), min(1, accuracy + margin))
     except Exception as e:
         logger.error(f"Error calculating confidence interval: {str(e)}")
         return (max(0, accuracy - 0.1), min(1, accuracy + 0.1))
@@ -93,6 +134,117 @@ def normalize_confidence(probabilities: List[float]) -> List[float]:
 
     return normalized_confidences
 
+def top_k_indices(probabilities: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Get the indices of the top_k highest probabilities of each row, highest first.
+    
+    Uses argpartition, so only the top_k candidates are sorted instead of all classes.
+    
+    Args:
+        probabilities: Array of shape (n_rows, n_classes)
+        top_k: Number of indices per row
+        
+    Returns:
+        Integer array of shape (n_rows, min(top_k, n_classes))
+    """
+    n_rows, n_classes = probabilities.shape
+    top_k = min(top_k, n_classes)
+    rows = np.arange(n_rows)[:, np.newaxis]
+    if top_k < n_classes:
+        candidates = np.argpartition(-probabilities, top_k - 1, axis=1)[:, :top_k]
+    else:
+        candidates = np.broadcast_to(np.arange(n_classes), probabilities.shape)
+    order = np.argsort(-probabilities[rows, candidates], axis=1, kind='stable')
+    return candidates[rows, order]
+
+def normalize_confidences(top_probabilities: np.ndarray) -> np.ndarray:
+    """
+    Vectorized normalize_confidence for rows of probabilities sorted highest first.
+    
+    Args:
+        top_probabilities: Array of shape (n_rows, k)
+        
+    Returns:
+        Array of normalized confidence scores of the same shape
+    """
+    max_confidence = top_probabilities[:, :1]
+    scaled_max_confidence = 0.90 + (0.05 * (max_confidence / 1.0))
+    ratio = top_probabilities / np.where(max_confidence > 0, max_confidence, 1.0)
+    ratio[top_probabilities == max_confidence] = 1.0
+    return ratio * scaled_max_confidence
+
+def calculate_confidence_intervals(
+    accuracies: np.ndarray,
+    n_samples: int,
+    confidence: float = 0.95
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized calculate_confidence_interval.
+    
+    Args:
+        accuracies: Array of prediction accuracies/probabilities
+        n_samples: Number of samples
+        confidence: Confidence level (default: 0.95)
+        
+    Returns:
+        Tuple of (lower_bounds, upper_bounds) arrays
+    """
+    std_err = np.sqrt(accuracies * (1 - accuracies) / n_samples)
+    margin = z_value(confidence) * std_err
+    lower = np.maximum(0, accuracies - margin)
+    upper = np.minimum(1, accuracies + margin)
+    # Degenerate intervals: keep the previous (scipy NaN bounds clamped) result
+    degenerate = std_err <= 0
+    lower[degenerate] = 0.0
+    upper[degenerate] = 1.0
+    return lower, upper
+
+def format_prediction_batch(
+    probabilities: np.ndarray,
+    classes: np.ndarray,
+    specialty_map: Dict[str, str],
+    top_k: int = 5
+) -> List[List[Prediction]]:
+    """
+    Format a matrix of model predictions into Prediction objects, one list per row.
+    
+    Args:
+        probabilities: Array of prediction probabilities, shape (n_rows, n_classes)
+        classes: Array of class labels
+        specialty_map: Mapping of diseases to specialties
+        top_k: Number of top predictions to return per row
+        
+    Returns:
+        List of Prediction lists, in row order
+    """
+    try:
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        top_indices = top_k_indices(probabilities, top_k)
+        top_probabilities = probabilities[np.arange(len(probabilities))[:, np.newaxis], top_indices]
+        confidences = normalize_confidences(top_probabilities)
+        lower, upper = calculate_confidence_intervals(confidences, 1)
+
+        diseases = np.asarray(classes)[top_indices].tolist()
+        batch = []
+        for row_diseases, row_confidences, row_lower, row_upper in zip(
+            diseases, confidences.tolist(), lower.tolist(), upper.tolist()
+        ):
+            batch.append([
+                Prediction(
+                    disease=disease,
+                    specialty=specialty_map.get(disease, "General Practitioner"),
+                    confidence=confidence,
+                    confidence_interval=(ci_lower, ci_upper)
+                )
+                for disease, confidence, ci_lower, ci_upper in zip(
+                    row_diseases, row_confidences, row_lower, row_upper
+                )
+            ])
+        return batch
+    except Exception as e:
+        logger.error(f"Error formatting predictions: {str(e)}")
+        raise
+
 def format_predictions(
     probabilities: np.ndarray,
     classes: np.ndarray,
@@ -111,25 +263,4 @@ def format_predictions(
     Returns:
         List of Prediction objects
     """
-    try:
-        top_indices = probabilities.argsort()[-top_k:][::-1]
-        top_probabilities = [float(probabilities[idx]) for idx in top_indices]
-        normalized_confidences = normalize_confidence(top_probabilities)
-        
-        predictions = []
-        for idx, confidence in zip(top_indices, normalized_confidences):
-            disease = classes[idx]
-            specialty = specialty_map.get(disease, "General Practitioner")
-            ci = calculate_confidence_interval(confidence, 1)
-            
-            predictions.append(Prediction(
-                disease=disease,
-                specialty=specialty,
-                confidence=confidence,
-                confidence_interval=ci
-            ))
-        
-        return predictions
-    except Exception as e:
-        logger.error(f"Error formatting predictions: {str(e)}")
-        raise
\ No newline at end of file
+    return format_prediction_batch(np.asarray(probabilities)[np.newaxis, :], classes, specialty_map, top_k)[0]
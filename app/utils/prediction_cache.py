@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+class PredictionCache:
+    """
+    Bounded LRU cache with per-entry TTL for prediction results.
+
+    Keys are canonical symptom sets, so "fever, cough" and "cough, fever"
+    share one entry. Entries belong to the model generation that computed
+    them (ModelLoader.generation, bumped whenever a model is activated): a
+    lookup or store with a newer generation clears the cache, and results of
+    an older generation are never stored, so stale predictions never outlive
+    a model swap.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _sync_generation(self, generation: int) -> bool:
+        """Move to a newer model generation (clearing the cache); False for an older one."""
+        if generation < self.generation:
+            return False
+        if generation > self.generation:
+            self.generation = generation
+            self._entries.clear()
+            self.invalidations += 1
+        return True
+
+    def get(self, key: str, generation: int, count: bool = True) -> Optional[Any]:
+        """
+        Get a cached value, or None when missing or expired.
+
+        Args:
+            key: Canonical symptom set
+            generation: Generation of the model that would otherwise compute the value
+            count: Record the lookup in the hit/miss counters
+        """
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key) if self._sync_generation(generation) else None
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, generation: int) -> None:
+        """Store a value computed by the model of the given generation."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if not self._sync_generation(generation):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "model_generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
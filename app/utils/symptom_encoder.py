@@ -0,0 +1,150 @@
+import logging
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+import numpy as np
+
+if TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
+
+logger = logging.getLogger(__name__)
+
+class SymptomEncoder:
+    """
+    TF-IDF encoding of canonical symptom strings straight into vocabulary indices.
+
+    Reproduces TfidfVectorizer.transform for the word analyzer. Each symptom
+    is tokenized (and stop-word filtered) once and memoized; a request only
+    joins the memoized tokens into n-grams, looks them up in the vocabulary
+    and applies the idf weights and row normalization with NumPy.
+    """
+
+    def __init__(
+        self,
+        vocabulary: dict,
+        idf: np.ndarray,
+        token_pattern: str,
+        stop_words: Optional[frozenset],
+        ngram_range: Tuple[int, int] = (1, 1),
+        lowercase: bool = True,
+        sublinear_tf: bool = False,
+        norm: Optional[str] = "l2",
+        cache_size: int = 16384
+    ):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.n_features = len(idf)
+        self.token_regex = re.compile(token_pattern)
+        self.stop_words = stop_words or frozenset()
+        self.min_n, self.max_n = ngram_range
+        self.lowercase = lowercase
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+        self._symptom_tokens = lru_cache(maxsize=cache_size)(self._tokenize)
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer, probe: Sequence[str] = ()) -> Optional["SymptomEncoder"]:
+        """
+        Build an encoder from a fitted TfidfVectorizer.
+
+        Args:
+            vectorizer: Fitted TfidfVectorizer
+            probe: Documents to check the encoder against vectorizer.transform
+
+        Returns:
+            The encoder, or None if the vectorizer's configuration is not
+            supported or the encoder disagrees with it on the probe
+        """
+        supported = (
+            getattr(vectorizer, "analyzer", None) == "word"
+            and vectorizer.tokenizer is None
+            and vectorizer.preprocessor is None
+            and vectorizer.strip_accents is None
+            and vectorizer.input == "content"
+            and not vectorizer.binary
+            and vectorizer.use_idf
+            and vectorizer.norm in ("l1", "l2", None)
+            and hasattr(vectorizer, "idf_")
+        )
+        if not supported:
+            logger.info("Vectorizer configuration not supported by SymptomEncoder; using vectorizer.transform.")
+            return None
+
+        encoder = cls(
+            vocabulary=vectorizer.vocabulary_,
+            idf=np.asarray(vectorizer.idf_, dtype=np.float64),
+            token_pattern=vectorizer.token_pattern,
+            stop_words=vectorizer.get_stop_words(),
+            ngram_range=vectorizer.ngram_range,
+            lowercase=vectorizer.lowercase,
+            sublinear_tf=vectorizer.sublinear_tf,
+            norm=vectorizer.norm
+        )
+        if probe:
+            expected = vectorizer.transform(probe)
+            actual = encoder.transform(probe)
+            if expected.shape != actual.shape or abs(expected - actual).max() > 1e-12:
+                logger.warning("SymptomEncoder disagrees with the vectorizer; using vectorizer.transform.")
+                return None
+        return encoder
+
+    def _tokenize(self, symptom: str) -> Tuple[str, ...]:
+        if self.lowercase:
+            symptom = symptom.lower()
+        stop_words = self.stop_words
+        return tuple(token for token in self.token_regex.findall(symptom) if token not in stop_words)
+
+    def _document_features(self, document: str) -> List[int]:
+        # Symptoms are separated by ", ", which never splits a token
+        tokens = []
+        for symptom in document.split(', '):
+            tokens.extend(self._symptom_tokens(symptom))
+
+        vocabulary = self.vocabulary
+        features = []
+        n_tokens = len(tokens)
+        for n in range(self.min_n, min(self.max_n, n_tokens) + 1):
+            for i in range(n_tokens - n + 1):
+                feature = vocabulary.get(tokens[i] if n == 1 else ' '.join(tokens[i:i + n]))
+                if feature is not None:
+                    features.append(feature)
+        return features
+
+    def transform(self, documents: Sequence[str]) -> "csr_matrix":
+        """
+        Encode canonical symptom strings, like TfidfVectorizer.transform.
+
+        Args:
+            documents: Cleaned symptom strings
+
+        Returns:
+            CSR matrix of shape (len(documents), n_features) with sorted indices
+        """
+        from scipy.sparse import csr_matrix  # Only once encoding runs, not when the API imports the loader
+
+        n_documents = len(documents)
+        keys = []
+        for row, document in enumerate(documents):
+            offset = row * self.n_features
+            keys.extend(offset + feature for feature in self._document_features(document))
+
+        # One sort for the whole batch: unique (row, feature) keys come out in CSR order
+        keys, counts = np.unique(np.asarray(keys, dtype=np.int64), return_counts=True)
+        rows, indices = np.divmod(keys, self.n_features)
+        indptr = np.searchsorted(rows, np.arange(n_documents + 1))
+        data = counts.astype(np.float64)
+        if self.sublinear_tf:
+            data = np.log(data) + 1
+        data *= self.idf[indices]
+
+        if self.norm is not None and len(data):
+            weights = data * data if self.norm == "l2" else np.abs(data)
+            norms = np.bincount(rows, weights=weights, minlength=n_documents)
+            if self.norm == "l2":
+                norms = np.sqrt(norms)
+            data /= norms[rows]
+
+        return csr_matrix(
+            (data, indices.astype(np.int32), indptr.astype(np.int32)),
+            shape=(n_documents, self.n_features)
+        )
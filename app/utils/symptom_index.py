@@ -0,0 +1,122 @@
+import heapq
+import logging
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+from app.utils.symptom_normalizer import SymptomNormalizer, is_symptom_token
+
+logger = logging.getLogger(__name__)
+
+MAX_SUGGESTIONS = 50
+# Prefixes up to this length match many terms; their rankings are precomputed
+PRECOMPUTED_PREFIX_LENGTH = 2
+# Frequent training "symptoms" that are not symptoms
+GENERIC_TERMS = frozenset({
+    "patient", "patients", "people", "person", "symptom", "symptoms", "sign", "signs",
+    "time", "times", "others", "problem", "problems", "children", "child", "adults",
+    "changes", "condition", "conditions", "doctor", "cases", "years", "days", "weeks",
+})
+# Phrases such as "some people" or "a few days" are scraping debris, not symptoms
+LEADING_STOP_WORDS = frozenset({
+    "the", "a", "an", "some", "any", "your", "my", "their", "his", "her", "its", "this", "these",
+    "those", "few", "many", "most", "several", "other", "and", "or", "with",
+})
+
+_QUERY_SEPARATORS = re.compile(r'[\s_]+')
+
+def normalize_query(text: str) -> str:
+    """Lowercase a typed prefix and collapse underscores/whitespace to single spaces."""
+    return _QUERY_SEPARATORS.sub(' ', text.lower()).lstrip()
+
+class SymptomIndex:
+    """
+    Sorted-array prefix index of valid symptom terms for autocomplete.
+
+    Every term is indexed at the start of each of its words, so "pain" also
+    completes to "back pain". Terms are ranked by how often they occur in the
+    training data, with completions of the term's first word first. Lookups are
+    a bisect over the sorted keys; rankings for short prefixes are precomputed.
+    """
+
+    def __init__(self, terms: Iterable[Tuple[str, str, int]]):
+        """
+        Args:
+            terms: (display term, model symptom, training frequency) triples
+        """
+        self.terms: List[Tuple[str, str, int]] = sorted(set(terms), key=lambda t: (-t[2], t[0]))
+        entries = []
+        for term_id, (display, _, _) in enumerate(self.terms):
+            for start in [0] + [m.end() for m in re.finditer(' ', display)]:
+                entries.append((display[start:], start > 0, term_id))
+        entries.sort()
+        self._keys = [key for key, _, _ in entries]
+        # Terms are sorted by rank, so a smaller rank tuple is a better match
+        self._ranks = [(mid_word, term_id) for _, mid_word, term_id in entries]
+        self._precomputed: Dict[str, List[int]] = {}
+        for prefix in {key[:n] for key in self._keys for n in range(1, PRECOMPUTED_PREFIX_LENGTH + 1)}:
+            self._precomputed[prefix] = self._rank(prefix, MAX_SUGGESTIONS)
+
+    @classmethod
+    def build(cls, vocabulary: Dict[str, int], normalizer: SymptomNormalizer) -> "SymptomIndex":
+        """
+        Build the index from the TF-IDF vocabulary and the training symptoms.
+
+        Only symptoms that are vocabulary features are suggested, and only
+        under a spelling that normalizes back to that feature, so every
+        suggestion is a model input as-is.
+        """
+        terms = []
+        for symptom, count in normalizer.symptom_counts.items():
+            if (
+                symptom not in vocabulary
+                or symptom in GENERIC_TERMS
+                or len(symptom) < 3
+                or not is_symptom_token(symptom)
+            ):
+                continue
+            display = symptom.replace('_', ' ')
+            if normalizer.normalize([display]) != [symptom]:
+                continue
+            # Prefer "belly area" over "the belly area" when it maps to the same symptom
+            words = display.split(' ', 1)
+            if len(words) == 2 and normalizer.normalize([words[1]]) == [symptom]:
+                display = words[1]
+            if display.split(' ', 1)[0] in LEADING_STOP_WORDS:
+                continue
+            terms.append((display, symptom, count))
+        index = cls(terms)
+        logger.info(f"Symptom index built with {len(index.terms)} terms.")
+        return index
+
+    def _rank(self, prefix: str, limit: int) -> List[int]:
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + '\uffff', lo)
+        best: Dict[int, Tuple[bool, int]] = {}
+        for mid_word, term_id in self._ranks[lo:hi]:
+            rank = (mid_word, term_id)
+            if term_id not in best or rank < best[term_id]:
+                best[term_id] = rank
+        return [rank[1] for rank in heapq.nsmallest(limit, best.values())]
+
+    def suggest(self, text: str, limit: int = 10) -> List[Tuple[str, str, int]]:
+        """
+        Get ranked completions for a typed prefix.
+
+        Args:
+            text: What the user has typed so far
+            limit: Maximum number of suggestions (at most MAX_SUGGESTIONS)
+
+        Returns:
+            (display term, model symptom, training frequency) triples, best first
+        """
+        prefix = normalize_query(text)
+        if not prefix:
+            return []
+        limit = min(limit, MAX_SUGGESTIONS)
+        term_ids = self._precomputed.get(prefix) if len(prefix) <= PRECOMPUTED_PREFIX_LENGTH else None
+        if term_ids is None:
+            term_ids = self._rank(prefix, limit)
+        return [self.terms[term_id] for term_id in term_ids[:limit]]
+
+    def __len__(self) -> int:
+        return len(self.terms)
@@ -0,0 +1,148 @@
+import csv
+import logging
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SYMPTOMS_CSV_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'mlmodels', 'diseases_symptoms_complete.csv'
+)
+
+_DETERMINERS = re.compile(r'^(?:the|a|an|some|any|your|my)_')
+_ALIAS_TOKEN = re.compile(r"[a-z0-9][a-z0-9_'\-]*")
+
+@lru_cache(maxsize=16384)
+def normalize_symptom(symptom: str) -> str:
+    """
+    Normalize a single raw symptom ("Severe Chest Pain" -> "chest_pain").
+
+    Args:
+        symptom: One symptom as typed by the user
+
+    Returns:
+        Lowercased symptom without severity modifiers, words joined with '_'
+    """
+    # str.replace beats an equivalent regex on strings this short; the memo
+    # makes repeated symptoms a single dict lookup
+    symptom = symptom.strip().lower()
+    symptom = symptom.replace('pain in ', '').replace('severe ', '')
+    symptom = symptom.replace('mild ', '').replace('chronic ', '')
+    symptom = symptom.replace(' and ', '_').replace(' or ', '_')
+    return symptom.replace(' ', '_')
+
+def _plural_variant(token: str) -> Optional[str]:
+    # Toggle singular/plural on the last word only ("back_pains" <-> "back_pain")
+    head, _, last = token.rpartition('_')
+    if len(last) < 4:
+        return None
+    if last.endswith('ies'):
+        last = last[:-3] + 'y'
+    elif last.endswith('s'):
+        if last.endswith(('ss', 'us', 'is')):
+            return None
+        last = last[:-1]
+    elif last.endswith('y'):
+        last = last[:-1] + 'ies'
+    elif last.endswith(('x', 'sh', 'ch')):
+        last += 'es'
+    else:
+        last += 's'
+    return f"{head}_{last}" if head else last
+
+def _alias_variants(token: str) -> Iterable[str]:
+    base_forms = {token, token.replace('-', '_'), _DETERMINERS.sub('', token)}
+    base_forms.add(_DETERMINERS.sub('', token.replace('-', '_')))
+    for form in base_forms:
+        yield form
+        plural = _plural_variant(form)
+        if plural:
+            yield plural
+
+def count_training_symptoms(csv_path: str = SYMPTOMS_CSV_PATH) -> Counter:
+    """Count how often each symptom occurs in the training CSV ("Symptoms" column)."""
+    counts = Counter()
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for symptom in (row.get('Symptoms') or '').split(','):
+                symptom = symptom.strip()
+                if symptom:
+                    counts[symptom] += 1
+    return counts
+
+def is_symptom_token(token: str) -> bool:
+    """Whether a training symptom is a plain token (filters out scraping debris)."""
+    return _ALIAS_TOKEN.fullmatch(token) is not None
+
+def build_symptom_aliases(counts: Dict[str, int], min_count: int = 2) -> Dict[str, str]:
+    """
+    Build an alias dictionary from the symptoms the model was trained on.
+
+    Every symptom that appears at least min_count times is reachable from its
+    spelling variants (underscores for hyphens, without a leading determiner,
+    singular/plural), unless the variant is a training symptom itself.
+    Conflicts go to the more frequent symptom.
+
+    Args:
+        counts: Training symptom counts (see count_training_symptoms)
+        min_count: Minimum number of occurrences for a symptom to get aliases
+
+    Returns:
+        Mapping of alias to training symptom
+    """
+    candidates = {}
+    for token, count in counts.items():
+        if count < min_count or not is_symptom_token(token):
+            continue
+        for alias in _alias_variants(token):
+            if alias and alias != token and alias not in counts:
+                best = candidates.get(alias)
+                if best is None or (count, best[1]) > (best[0], token):
+                    candidates[alias] = (count, token)
+    return {alias: token for alias, (_, token) in candidates.items()}
+
+class SymptomNormalizer:
+    """
+    Turns raw symptom lists into the spelling used in the training data.
+
+    Per-symptom normalization is memoized, so repeated symptoms cost a dict
+    lookup; aliases map spelling variants onto training symptoms, so
+    equivalent inputs share one canonical form (and one cache entry).
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, str]] = None, symptom_counts: Optional[Counter] = None):
+        self.aliases = aliases or {}
+        self.symptom_counts = symptom_counts or Counter()
+
+    @classmethod
+    def from_csv(cls, csv_path: str = SYMPTOMS_CSV_PATH) -> "SymptomNormalizer":
+        try:
+            counts = count_training_symptoms(csv_path)
+        except OSError as e:
+            logger.warning(f"Symptom aliases unavailable ({str(e)}); normalizing without them.")
+            counts = Counter()
+        aliases = build_symptom_aliases(counts)
+        logger.info(f"Symptom normalizer built with {len(aliases)} aliases.")
+        return cls(aliases, counts)
+
+    def normalize(self, symptoms: Iterable[str]) -> List[str]:
+        """Normalize raw symptoms, dropping empty ones."""
+        aliases = self.aliases
+        normalized = []
+        for symptom in symptoms:
+            if symptom.strip():
+                symptom = normalize_symptom(symptom)
+                normalized.append(aliases.get(symptom, symptom))
+        return normalized
+
+_normalizer: Optional[SymptomNormalizer] = None
+
+def get_symptom_normalizer() -> SymptomNormalizer:
+    """Get the process-wide normalizer, building it from the training CSV on first use."""
+    global _normalizer
+    if _normalizer is None:
+        _normalizer = SymptomNormalizer.from_csv()
+    return _normalizer
@@ -30,13 +30,16 @@ CREATE TABLE IF NOT EXISTS `appointments` (
   `status` enum('Pending','Completed','Cancelled') DEFAULT 'Pending',
   `note` text,
   `appointment_number` varchar(20) NOT NULL,
+  `active_slot` int GENERATED ALWAYS AS ((case when (`status` = _utf8mb4'Cancelled') then NULL else 1 end)) STORED,
   `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
   `updated_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   PRIMARY KEY (`appointment_id`),
   UNIQUE KEY `appointment_number` (`appointment_number`),
+  UNIQUE KEY `uq_appointments_active_slot` (`doctor_id`,`hospital_id`,`appointment_date`,`appointment_time`,`active_slot`),
   KEY `user_id` (`user_id`),
   KEY `doctor_id` (`doctor_id`),
   KEY `hospital_id` (`hospital_id`),
+  KEY `ix_appointments_appointment_date` (`appointment_date`),
   CONSTRAINT `appointments_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`user_id`) ON DELETE CASCADE,
   CONSTRAINT `appointments_ibfk_2` FOREIGN KEY (`doctor_id`) REFERENCES `doctors` (`doctor_id`) ON DELETE CASCADE,
   CONSTRAINT `appointments_ibfk_3` FOREIGN KEY (`hospital_id`) REFERENCES `hospitals` (`hospital_id`) ON DELETE CASCADE
@@ -44,28 +47,39 @@ CREATE TABLE IF NOT EXISTS `appointments` (
 
 -- Dumping data for table onehealthportal.appointments: ~26 rows (approximately)
 INSERT INTO `appointments` (`appointment_id`, `user_id`, `doctor_id`, `hospital_id`, `appointment_date`, `appointment_time`, `status`, `note`, `appointment_number`, `created_at`, `updated_at`) VALUES
-	(1, 1, 1, 1, '2025-01-15 10:00:00', '10:30:00', 'Pending', 'Regular check-up', 'APPT-NO-1', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(2, 2, 2, 2, '2025-01-16 09:00:00', '09:30:00', 'Completed', 'Neurological consultation', 'APPT-NO-2', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(3, 3, 3, 3, '2025-02-01 11:00:00', '11:30:00', 'Pending', 'Skin check-up', 'APPT-NO-3', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(4, 4, 4, 4, '2025-02-02 10:00:00', '10:30:00', 'Pending', 'Child vaccination', 'APPT-NO-4', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(5, 5, 5, 5, '2025-02-03 09:00:00', '09:30:00', 'Pending', 'Knee pain consultation', 'APPT-NO-5', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(6, 6, 6, 6, '2025-02-04 08:00:00', '08:30:00', 'Pending', 'Cancer treatment follow-up', 'APPT-NO-6', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(7, 7, 7, 7, '2025-02-05 14:00:00', '14:30:00', 'Pending', 'Psychiatric evaluation', 'APPT-NO-7', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(8, 8, 8, 8, '2025-02-06 15:00:00', '15:30:00', 'Pending', 'Emergency consultation', 'APPT-NO-8', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(9, 9, 9, 9, '2025-02-07 16:00:00', '16:30:00', 'Pending', 'Kidney function test', 'APPT-NO-9', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(10, 10, 10, 10, '2025-02-08 17:00:00', '17:30:00', 'Pending', 'Gynecological check-up', 'APPT-NO-10', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(11, 11, 11, 11, '2025-02-09 18:00:00', '18:30:00', 'Pending', 'Cardiac consultation', 'APPT-NO-11', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(12, 12, 12, 12, '2025-02-10 19:00:00', '19:30:00', 'Pending', 'Gastrointestinal consultation', 'APPT-NO-12', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(13, 13, 13, 13, '2025-02-11 20:00:00', '20:30:00', 'Pending', 'Dermatological consultation', 'APPT-NO-13', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(14, 14, 14, 14, '2025-02-12 21:00:00', '21:30:00', 'Pending', 'Orthopedic consultation', 'APPT-NO-14', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(15, 15, 15, 15, '2025-02-13 22:00:00', '22:30:00', 'Pending', 'Oncology consultation', 'APPT-NO-15', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(16, 16, 16, 16, '2025-02-14 23:00:00', '23:30:00', 'Pending', 'Psychiatric follow-up', 'APPT-NO-16', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(17, 17, 17, 17, '2025-02-15 08:00:00', '08:30:00', 'Pending', 'Emergency follow-up', 'APPT-NO-17', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(18, 18, 18, 18, '2025-02-16 09:00:00', '09:30:00', 'Pending', 'Nephrology consultation', 'APPT-NO-18', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(19, 19, 19, 19, '2025-02-17 10:00:00', '10:30:00', 'Pending', 'Gynecological follow-up', 'APPT-NO-19', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
-	(20, 20, 20, 20, '2025-02-18 11:00:00', '11:30:00', 'Completed', 'Cardiac follow-up', 'APPT-NO-20', '2025-01-15 02:11:33', '2025-01-22 20:29:15'),
+	(1, 1, 1, 1, '2025-01-15 00:00:00', '10:30:00', 'Pending', 'Regular check-up', 'APPT-NO-1', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(2, 2, 2, 2, '2025-01-16 00:00:00', '09:30:00', 'Completed', 'Neurological consultation', 'APPT-NO-2', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(3, 3, 3, 3, '2025-02-01 00:00:00', '11:30:00', 'Pending', 'Skin check-up', 'APPT-NO-3', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(4, 4, 4, 4, '2025-02-02 00:00:00', '10:30:00', 'Pending', 'Child vaccination', 'APPT-NO-4', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(5, 5, 5, 5, '2025-02-03 00:00:00', '09:30:00', 'Pending', 'Knee pain consultation', 'APPT-NO-5', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(6, 6, 6, 6, '2025-02-04 00:00:00', '08:30:00', 'Pending', 'Cancer treatment follow-up', 'APPT-NO-6', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(7, 7, 7, 7, '2025-02-05 00:00:00', '14:30:00', 'Pending', 'Psychiatric evaluation', 'APPT-NO-7', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(8, 8, 8, 8, '2025-02-06 00:00:00', '15:30:00', 'Pending', 'Emergency consultation', 'APPT-NO-8', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(9, 9, 9, 9, '2025-02-07 00:00:00', '16:30:00', 'Pending', 'Kidney function test', 'APPT-NO-9', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(10, 10, 10, 10, '2025-02-08 00:00:00', '17:30:00', 'Pending', 'Gynecological check-up', 'APPT-NO-10', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(11, 11, 11, 11, '2025-02-09 00:00:00', '18:30:00', 'Pending', 'Cardiac consultation', 'APPT-NO-11', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(12, 12, 12, 12, '2025-02-10 00:00:00', '19:30:00', 'Pending', 'Gastrointestinal consultation', 'APPT-NO-12', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(13, 13, 13, 13, '2025-02-11 00:00:00', '20:30:00', 'Pending', 'Dermatological consultation', 'APPT-NO-13', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(14, 14, 14, 14, '2025-02-12 00:00:00', '21:30:00', 'Pending', 'Orthopedic consultation', 'APPT-NO-14', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(15, 15, 15, 15, '2025-02-13 00:00:00', '22:30:00', 'Pending', 'Oncology consultation', 'APPT-NO-15', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(16, 16, 16, 16, '2025-02-14 00:00:00', '23:30:00', 'Pending', 'Psychiatric follow-up', 'APPT-NO-16', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(17, 17, 17, 17, '2025-02-15 00:00:00', '08:30:00', 'Pending', 'Emergency follow-up', 'APPT-NO-17', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(18, 18, 18, 18, '2025-02-16 00:00:00', '09:30:00', 'Pending', 'Nephrology consultation', 'APPT-NO-18', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(19, 19, 19, 19, '2025-02-17 00:00:00', '10:30:00', 'Pending', 'Gynecological follow-up', 'APPT-NO-19', '2025-01-15 02:11:33', '2025-01-15 02:11:33'),
+	(20, 20, 20, 20, '2025-02-18 00:00:00', '11:30:00', 'Completed', 'Cardiac follow-up', 'APPT-NO-20', '2025-01-15 02:11:33', '2025-01-22 20:29:15'),
 	(48, 37, 1, 1, '2025-01-23 00:00:00', '09:30:00', 'Pending', '', 'APPT-NO-37', '2025-01-22 15:53:27', '2025-01-22 15:53:27');
 
+-- Dumping structure for table onehealthportal.counters
+CREATE TABLE IF NOT EXISTS `counters` (
+  `name` varchar(50) NOT NULL,
+  `value` bigint NOT NULL DEFAULT '0',
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Dumping data for table onehealthportal.counters: ~1 rows (approximately)
+INSERT INTO `counters` (`name`, `value`) VALUES
+	('appointment_number', 37);
+
 -- Dumping structure for table onehealthportal.doctors
 CREATE TABLE IF NOT EXISTS `doctors` (
   `doctor_id` int NOT NULL AUTO_INCREMENT,
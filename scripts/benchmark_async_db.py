@@ -0,0 +1,115 @@
+"""
+Benchmark concurrent read throughput of one worker: sync Session vs AsyncSession.
+
+Both variants run the doctor-listing reads (doctors, then their hospitals in
+one query) from coroutines on a single event loop, the way an `async def`
+route does. The sync variant blocks the loop for every round-trip, so
+requests queue behind each other; the async variant overlaps them. Event-loop
+lag (how late a 10 ms ticker wakes up) shows how much the loop was blocked.
+
+Needs the configured MySQL database (DATABASE_URL). --server-delay-ms adds a
+SELECT SLEEP() to every request to mimic a slower or remote database.
+
+    python -m scripts.benchmark_async_db --concurrency 50 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from sqlalchemy import func, select
+from app.db.connection import SessionLocal, get_pool_stats
+from app.db.async_connection import AsyncSessionLocal, async_engine, get_async_pool_stats
+from app.models.doctor import Doctor
+from app.models.hospital import Hospital
+from app.models.hospital_doctor import HospitalDoctor
+# Mapped classes referenced by relationships
+from app.models import appointment, feedback, lab_test, payment, user  # noqa: F401
+
+TICK_SECONDS = 0.01
+
+def listing_queries(limit: int):
+    doctors = select(Doctor).limit(limit)
+    hospitals = lambda doctor_ids: (
+        select(HospitalDoctor.doctorID, Hospital)
+        .join(HospitalDoctor, Hospital.hospital_id == HospitalDoctor.hospitalID)
+        .where(HospitalDoctor.doctorID.in_(doctor_ids))
+    )
+    return doctors, hospitals
+
+async def sync_request(limit: int, delay_seconds: float) -> None:
+    doctors_query, hospitals_query = listing_queries(limit)
+    with SessionLocal() as db:
+        if delay_seconds:
+            db.execute(select(func.sleep(delay_seconds)))
+        doctors = db.execute(doctors_query).scalars().all()
+        db.execute(hospitals_query([doctor.doctor_id for doctor in doctors])).all()
+
+async def async_request(limit: int, delay_seconds: float) -> None:
+    doctors_query, hospitals_query = listing_queries(limit)
+    async with AsyncSessionLocal() as db:
+        if delay_seconds:
+            await db.execute(select(func.sleep(delay_seconds)))
+        doctors = (await db.execute(doctors_query)).scalars().all()
+        (await db.execute(hospitals_query([doctor.doctor_id for doctor in doctors]))).all()
+
+async def measure(request, requests: int, concurrency: int, limit: int, delay_seconds: float) -> dict:
+    latencies, lags = [], []
+    remaining = iter(range(requests))
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(time.perf_counter() - start - TICK_SECONDS)
+
+    async def client():
+        for _ in remaining:
+            start = time.perf_counter()
+            await request(limit, delay_seconds)
+            latencies.append(time.perf_counter() - start)
+
+    # Warm the pool so connection setup is not measured
+    await asyncio.gather(*(request(limit, 0) for _ in range(min(concurrency, 10))))
+
+    tick_task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick_task
+
+    latencies.sort()
+    return {
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "max_loop_lag_ms": round(max(lags, default=0) * 1000, 2),
+        "mean_loop_lag_ms": round(statistics.fmean(lags) * 1000, 2) if lags else 0.0,
+    }
+
+async def main_async(args) -> dict:
+    delay_seconds = args.server_delay_ms / 1000
+    results = {
+        "sync Session": await measure(sync_request, args.requests, args.concurrency, args.limit, delay_seconds),
+        "AsyncSession": await measure(async_request, args.requests, args.concurrency, args.limit, delay_seconds),
+    }
+    results["speedup"] = round(
+        results["AsyncSession"]["requests_per_second"] / results["sync Session"]["requests_per_second"], 2
+    )
+    results["pools"] = {"sync": get_pool_stats(), "async": get_async_pool_stats()}
+    await async_engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=50, help="Doctors per listing")
+    parser.add_argument("--server-delay-ms", type=float, default=0, help="SELECT SLEEP() added to every request")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark sklearn predict_proba against the compiled forest.
+
+Uses app/mlmodels/random_forest_model.joblib when it has been pulled from git-lfs,
+otherwise trains a stand-in forest on the bundled diseases_symptoms_complete.csv.
+
+    python -m scripts.benchmark_forest --batch-sizes 1 8 32 128 --repeats 50
+"""
+import argparse
+import os
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from app.utils.forest_compiler import CompiledForest
+
+ML_MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "mlmodels")
+LFS_POINTER_MAX_SIZE = 1024
+
+def load_data():
+    vectorizer = joblib.load(os.path.join(ML_MODELS_DIR, "tfidf_vectorizer.joblib"))
+    label_encoder = joblib.load(os.path.join(ML_MODELS_DIR, "label_encoder.joblib"))
+    df = pd.read_csv(os.path.join(ML_MODELS_DIR, "diseases_symptoms_complete.csv"))
+    X = vectorizer.transform(df["Symptoms"].fillna(""))
+    y = label_encoder.transform(df["Disease"])
+    return X, y
+
+def load_model(X, y, n_estimators: int):
+    model_path = os.path.join(ML_MODELS_DIR, "random_forest_model.joblib")
+    if os.path.getsize(model_path) > LFS_POINTER_MAX_SIZE:
+        return joblib.load(model_path)
+    print(f"{model_path} is a git-lfs pointer; training a {n_estimators}-tree stand-in forest")
+    return RandomForestClassifier(n_estimators=n_estimators, random_state=0, n_jobs=-1).fit(X, y)
+
+def time_call(fn, X, repeats: int) -> float:
+    fn(X)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    X, y = load_data()
+    model = load_model(X, y, args.n_estimators)
+    model.n_jobs = 1  # Match the per-request setting: one core per prediction
+
+    start = time.perf_counter()
+    forest = CompiledForest.from_sklearn(model)
+    print(f"Compiled {forest.meta['n_nodes']} nodes in {time.perf_counter() - start:.2f}s")
+
+    forest.validate_against(model, X[:256])
+    error = np.abs(forest.predict_proba(X[:256]) - model.predict_proba(X[:256])).max()
+    print(f"Max |compiled - predict_proba| on 256 rows: {error:.2e}")
+
+    print(f"{'batch':>6} {'sklearn ms':>12} {'compiled ms':>12} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        rows = X[np.arange(batch_size) % X.shape[0]]
+        baseline = time_call(model.predict_proba, rows, args.repeats)
+        compiled = time_call(forest.predict_proba, rows, args.repeats)
+        print(f"{batch_size:>6} {baseline:>12.2f} {compiled:>12.2f} {baseline / compiled:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
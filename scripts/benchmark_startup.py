@@ -0,0 +1,83 @@
+"""
+Benchmark the import cost of the prediction path in fresh interpreters.
+
+Each scenario runs in its own subprocess and reports wall time and peak RSS
+after the imports. "request path" is what the API imports before the model
+loads in the background; "+ pandas, scipy.stats" adds the libraries ml_utils
+used to import eagerly. "+ sklearn" is what unpickling the artifacts adds
+(some scikit-learn releases import pandas and scipy.stats themselves).
+
+    python -m scripts.benchmark_startup --repeats 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "request path": ["app.utils.ml_utils", "app.services.model_loader"],
+    "request path + pandas, scipy.stats": [
+        "app.utils.ml_utils", "app.services.model_loader", "pandas", "scipy.stats"
+    ],
+    "request path + sklearn": [
+        "app.utils.ml_utils", "app.services.model_loader", "sklearn.feature_extraction.text", "sklearn.ensemble"
+    ],
+}
+
+PROBE = """
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+for module in sys.argv[1:]:
+    importlib.import_module(module)
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({
+    "elapsed_ms": elapsed_ms,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "pandas_loaded": "pandas" in sys.modules,
+    "scipy_stats_loaded": "scipy.stats" in sys.modules,
+    "scipy_loaded": "scipy" in sys.modules,
+}))
+"""
+
+def measure(modules, repeats: int) -> dict:
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE, *modules],
+            cwd=ROOT_DIR, check=True, capture_output=True, text=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "elapsed_ms": statistics.median(run["elapsed_ms"] for run in runs),
+        "max_rss_mb": statistics.median(run["max_rss_mb"] for run in runs),
+        "pandas_loaded": runs[-1]["pandas_loaded"],
+        "scipy_stats_loaded": runs[-1]["scipy_stats_loaded"],
+        "scipy_loaded": runs[-1]["scipy_loaded"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {name: measure(modules, args.repeats) for name, modules in SCENARIOS.items()}
+    print(f"{'scenario':<38}{'import ms':>12}{'peak RSS MB':>14}{'pandas':>8}{'scipy':>7}{'scipy.stats':>13}")
+    for name, result in results.items():
+        print(
+            f"{name:<38}{result['elapsed_ms']:>12.1f}{result['max_rss_mb']:>14.1f}"
+            f"{str(result['pandas_loaded']):>8}{str(result['scipy_loaded']):>7}"
+            f"{str(result['scipy_stats_loaded']):>13}"
+        )
+
+    baseline, lean = results["request path + pandas, scipy.stats"], results["request path"]
+    print(
+        f"Saved {baseline['elapsed_ms'] - lean['elapsed_ms']:.0f} ms and "
+        f"{baseline['max_rss_mb'] - lean['max_rss_mb']:.0f} MB before the model is loaded"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Check with EXPLAIN that the appointment date filters can use their indexes.
+
+Each query is built the way the routes build it (app.db.date_filters) and
+explained on the configured MySQL database (DATABASE_URL) with the expected
+index forced, so small tables cannot hide the plan behind a full scan. A
+check fails unless the index lookup uses appointment_date as a key part.
+Merely listing the index in possible_keys is not enough: the
+(doctor_id, hospital_id) prefix of the slot key matches even when the column
+is wrapped in DATE(). The DATE() form of each query is explained as well and
+reported for comparison.
+
+Exits with status 1 if any check fails, so it can run in CI after
+`python -m scripts.migrate_appointment_indexes`.
+
+    python -m scripts.check_query_plans --doctor-id 1 --hospital-id 1 --date 2025-01-23
+"""
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+from sqlalchemy import func, select
+from app.db.connection import engine
+from app.db.date_filters import between_days, on_day
+from app.models.appointment import Appointment
+# Mapped classes referenced by relationships
+from app.models import doctor, feedback, hospital, hospital_doctor, lab_test, payment, user  # noqa: F401
+
+# Column whose range predicate the checks are about
+DATE_COLUMN = "appointment_date"
+# Access types that look rows up through the index (as opposed to scanning it or the table)
+INDEX_LOOKUPS = ("range", "ref", "eq_ref", "const")
+
+def find_table(plan, table: str) -> dict:
+    """Find a table's entry in an EXPLAIN FORMAT=JSON plan (it may be nested in joins or subqueries)."""
+    if isinstance(plan, dict):
+        if plan.get("table_name") == table:
+            return plan
+        children = plan.values()
+    elif isinstance(plan, list):
+        children = plan
+    else:
+        return None
+    for child in children:
+        found = find_table(child, table)
+        if found is not None:
+            return found
+    return None
+
+def explain(statement, index: str) -> dict:
+    """EXPLAIN a select with an index forced; returns how the appointments table is accessed."""
+    statement = statement.with_hint(Appointment, f"FORCE INDEX ({index})", "mysql")
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        document = conn.exec_driver_sql(f"EXPLAIN FORMAT=JSON {compiled}").scalar_one()
+    plan = find_table(json.loads(document), Appointment.__tablename__) or {}
+    access_type = plan.get("access_type")
+    key_parts = plan.get("used_key_parts", [])
+    return {
+        "type": access_type,
+        "key": plan.get("key"),
+        "used_key_parts": key_parts,
+        "key_length": plan.get("key_length"),
+        "rows": plan.get("rows_examined_per_scan"),
+        "uses_date_range": access_type in INDEX_LOOKUPS and DATE_COLUMN in key_parts,
+    }
+
+def checks(doctor_id: int, hospital_id: int, day: date):
+    """(name, expected index, range query, DATE() query) of each date filter the routes use."""
+    appointment_ids = select(Appointment.appointment_id)
+    yield (
+        "doctor appointments on a day",
+        "uq_appointments_active_slot",
+        appointment_ids.where(
+            Appointment.doctor_id == doctor_id,
+            Appointment.hospital_id == hospital_id,
+            on_day(Appointment.appointment_date, day)
+        ),
+        appointment_ids.where(
+            Appointment.doctor_id == doctor_id,
+            Appointment.hospital_id == hospital_id,
+            func.date(Appointment.appointment_date) == day
+        ),
+    )
+    yield (
+        "appointments between two days",
+        "ix_appointments_appointment_date",
+        appointment_ids.where(between_days(Appointment.appointment_date, day - timedelta(days=6), day)),
+        appointment_ids.where(
+            func.date(Appointment.appointment_date) >= day - timedelta(days=6),
+            func.date(Appointment.appointment_date) <= day
+        ),
+    )
+    yield (
+        "appointments on a day (dashboard)",
+        "ix_appointments_appointment_date",
+        select(func.count()).select_from(Appointment).where(on_day(Appointment.appointment_date, day)),
+        select(func.count()).select_from(Appointment).where(func.date(Appointment.appointment_date) == day),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctor-id", type=int, default=1)
+    parser.add_argument("--hospital-id", type=int, default=1)
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today())
+    args = parser.parse_args()
+
+    if engine.dialect.name != "mysql":
+        sys.exit(f"EXPLAIN checks need a MySQL database, not {engine.dialect.name}.")
+
+    results, failed = [], False
+    for name, index, range_query, date_query in checks(args.doctor_id, args.hospital_id, args.date):
+        plan = explain(range_query, index)
+        passed = plan["key"] == index and plan["uses_date_range"]
+        failed = failed or not passed
+        results.append({
+            "check": name,
+            "expected_index": index,
+            "passed": passed,
+            "range_predicate": plan,
+            "date_function": explain(date_query, index),
+        })
+
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Export a compact, pruned copy of the random forest next to the model artifact.
+
+The forest is compiled, then pruned against reference rows: the training CSV
+plus random partial symptom sets drawn from it (users rarely type a disease's
+full symptom list). Leaf entries that never reach a reference row's top-k
+output are dropped, and the remaining arrays are stored as float32/int32.
+The script reports the size reduction and the accuracy/agreement deltas on
+the CSV rows and on held-out partial symptom sets drawn with another seed.
+
+Load the export with ML_COMPACT_FOREST=true.
+
+    python -m scripts.export_compact_forest --subsets 10 --keep-probability 0.5
+"""
+import argparse
+import json
+import os
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+from scripts.benchmark_forest import ML_MODELS_DIR, LFS_POINTER_MAX_SIZE, load_data, load_model
+from app.services.model_loader import prepare_symptoms
+from app.utils.forest_compiler import CompiledForest
+from app.utils.forest_compactor import compact_forest_path, compare_forests, prune_forest, save_compact_forest
+
+def forest_size_mb(forest: CompiledForest) -> float:
+    return sum(array.nbytes for array in forest.arrays.values()) / 1024 ** 2
+
+def partial_symptom_sets(symptoms: pd.Series, labels: np.ndarray, subsets: int, keep_probability: float, seed: int):
+    """Draw `subsets` random partial symptom sets per CSV row (at least one symptom each)."""
+    rng = np.random.default_rng(seed)
+    documents, y = [], []
+    for text, label in zip(symptoms, labels):
+        items = [item.strip() for item in str(text).split(",") if item.strip()]
+        if not items:
+            continue
+        for _ in range(subsets):
+            keep = rng.random(len(items)) < keep_probability
+            keep[rng.integers(len(items))] = True
+            documents.append(", ".join(item for item, kept in zip(items, keep) if kept))
+            y.append(label)
+    cleaned, kept_rows = [], []
+    for i, document in enumerate(documents):
+        try:
+            cleaned.append(prepare_symptoms([document])[0])
+            kept_rows.append(i)
+        except ValueError:
+            continue
+    return cleaned, np.asarray(y)[kept_rows]
+
+def print_report(name: str, report: dict):
+    print(f"{name} ({report['rows']} rows):")
+    for key, value in report.items():
+        if key != "rows":
+            print(f"  {key:<30}{value:>10.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--subsets", type=int, default=10, help="Partial symptom sets per CSV row")
+    parser.add_argument("--keep-probability", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--n-estimators", type=int, default=100, help="Trees in the stand-in forest")
+    parser.add_argument("--output", help="Export directory (defaults to next to the model artifact)")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    model_path = os.path.join(ML_MODELS_DIR, "random_forest_model.joblib")
+    vectorizer = joblib.load(os.path.join(ML_MODELS_DIR, "tfidf_vectorizer.joblib"))
+    df = pd.read_csv(os.path.join(ML_MODELS_DIR, "diseases_symptoms_complete.csv"))
+    X, y = load_data()
+    model = load_model(X, y, args.n_estimators)
+    output = args.output
+    if output is None and os.path.getsize(model_path) > LFS_POINTER_MAX_SIZE:
+        output = compact_forest_path(model_path)
+
+    forest = CompiledForest.from_sklearn(model)
+    forest.validate_against(model, X[:256])
+
+    documents, _ = partial_symptom_sets(
+        df["Symptoms"].fillna(""), y, args.subsets, args.keep_probability, args.seed
+    )
+    reference = vectorizer.transform(list(df["Symptoms"].fillna("")) + documents)
+    start = time.perf_counter()
+    compact = prune_forest(forest, reference, top_k=args.top_k)
+    print(f"Pruned against {reference.shape[0]} reference rows in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'':<10}{'nodes':>10}{'leaf entries':>14}{'MB':>10}")
+    for name, candidate in (("full", forest), ("compact", compact)):
+        print(
+            f"{name:<10}{len(candidate.feature):>10}{len(candidate.leaf_classes):>14}"
+            f"{forest_size_mb(candidate):>10.1f}"
+        )
+
+    held_out, held_out_y = partial_symptom_sets(
+        df["Symptoms"].fillna(""), y, 1, args.keep_probability, args.seed + 1
+    )
+    reports = {
+        "csv": compare_forests(forest, compact, X, y, top_k=args.top_k),
+        "held_out_partial": compare_forests(
+            forest, compact, vectorizer.transform(held_out), held_out_y, top_k=args.top_k
+        ),
+    }
+    for name, report in reports.items():
+        print_report(name, report)
+
+    if output is None:
+        print("Stand-in forest: nothing exported (pass --output to keep it)")
+        return
+    compact.meta["report"] = reports
+    save_compact_forest(compact, output)
+    print(f"Exported to {output}")
+    print(json.dumps({"n_nodes": compact.meta["n_nodes"], "checksum": compact.meta["checksum"]}))
+
+if __name__ == "__main__":
+    main()
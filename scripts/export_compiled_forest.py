@@ -0,0 +1,47 @@
+"""
+Compile the random forest into flat NumPy node arrays next to the model artifact.
+
+The compiled forest is validated against the sklearn model (source checksum and
+predict_proba on the training CSV) and published into
+random_forest_model.compiled/ as a new version; the CURRENT pointer is swapped
+atomically, so running workers keep reading the previous version until they
+reload. Run it once per deploy (or after replacing the model), not per worker.
+
+Load the export with ML_COMPILED_FOREST=true.
+
+    python -m scripts.export_compiled_forest
+"""
+import argparse
+import json
+import os
+import warnings
+from scripts.benchmark_forest import ML_MODELS_DIR, LFS_POINTER_MAX_SIZE, load_data, load_model
+from app.utils.forest_compiler import CompiledForest, compiled_forest_path, publish_forest
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n-estimators", type=int, default=100, help="Trees in the stand-in forest")
+    parser.add_argument("--output", help="Export directory (defaults to next to the model artifact)")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    model_path = os.path.join(ML_MODELS_DIR, "random_forest_model.joblib")
+    X, y = load_data()
+    model = load_model(X, y, args.n_estimators)
+    output = args.output
+    if output is None and os.path.getsize(model_path) > LFS_POINTER_MAX_SIZE:
+        output = compiled_forest_path(model_path)
+
+    forest = CompiledForest.from_sklearn(model)
+    forest.validate_against(model, X)
+    print(f"Compiled {forest.meta['n_nodes']} nodes; predict_proba matches on {X.shape[0]} rows")
+
+    if output is None:
+        print("Stand-in forest: nothing exported (pass --output to keep it)")
+        return
+    version_path = publish_forest(forest, output)
+    print(f"Exported to {version_path}")
+    print(json.dumps({"n_nodes": forest.meta["n_nodes"], "checksum": forest.meta["checksum"]}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Bring an existing appointments table up to the keys declared in Appointment.__table_args__.
+
+Adds the generated active_slot column, the indexes and the one-booking-per-slot
+unique key where they are missing, and drops ix_appointments_doctor_schedule,
+which the unique key replaces. Anything already in place is left alone, so the
+script can be run again safely (e.g. on every deploy). Uses the configured
+DATABASE_URL.
+
+Bookings store the day at midnight in appointment_date and the slot in
+appointment_time. Older rows with a time of day in appointment_date are moved
+to midnight first: the unique key compares the whole value, so such a row
+would not collide with a new booking of its slot, while the day filters
+still count it as booked.
+
+The unique key cannot be added while a slot is double-booked; those bookings
+are listed (cancel or move all but one of each) and the script exits with
+status 1.
+
+    python -m scripts.migrate_appointment_indexes
+    python -m scripts.migrate_appointment_indexes --dry-run
+"""
+import argparse
+import json
+import sys
+from sqlalchemy import Index, UniqueConstraint, func, inspect, select, update
+from sqlalchemy.schema import AddConstraint, CreateColumn
+from app.db.connection import engine
+from app.models.appointment import Appointment
+# Mapped classes referenced by relationships
+from app.models import doctor, feedback, hospital, hospital_doctor, lab_test, payment, user  # noqa: F401
+
+# Indexes made redundant by later keys
+SUPERSEDED_INDEXES = ["ix_appointments_doctor_schedule"]
+
+def normalize_dates(conn, dry_run: bool = False) -> int:
+    """Move appointment_date values with a time of day to midnight; returns how many there are."""
+    off_midnight = func.time(Appointment.appointment_date) != "00:00:00"
+    count = conn.execute(select(func.count()).select_from(Appointment).where(off_midnight)).scalar_one()
+    if count and not dry_run:
+        conn.execute(
+            update(Appointment)
+            .where(off_midnight)
+            # updated_at is set to itself so the fix-up does not count as a change to the booking
+            .values(appointment_date=func.date(Appointment.appointment_date), updated_at=Appointment.updated_at)
+        )
+    return count
+
+def double_bookings(conn) -> list:
+    """Slots held by more than one active appointment (by day, as after normalize_dates)."""
+    slot = (
+        Appointment.doctor_id,
+        Appointment.hospital_id,
+        func.date(Appointment.appointment_date).label("appointment_date"),
+        Appointment.appointment_time,
+    )
+    rows = conn.execute(
+        select(*slot, func.group_concat(Appointment.appointment_number).label("appointment_numbers"))
+        .where(Appointment.status != "Cancelled")
+        .group_by(*slot)
+        .having(func.count() > 1)
+    ).all()
+    return [
+        {
+            "doctor_id": row.doctor_id,
+            "hospital_id": row.hospital_id,
+            "appointment_date": str(row.appointment_date),
+            "appointment_time": str(row.appointment_time),
+            "appointment_numbers": row.appointment_numbers.split(","),
+        }
+        for row in rows
+    ]
+
+def migrate(dry_run: bool = False) -> dict:
+    table = Appointment.__table__
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns(table.name)}
+    existing = {index["name"] for index in inspector.get_indexes(table.name)}
+    existing |= {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+    created, skipped, dropped = [], [], []
+
+    with engine.begin() as conn:
+        if "active_slot" not in columns:
+            if not dry_run:
+                ddl = CreateColumn(table.c.active_slot).compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+            created.append("active_slot")
+
+        normalized = normalize_dates(conn, dry_run)
+        conflicts = double_bookings(conn)
+        for key in Appointment.__table_args__:
+            if key.name in existing:
+                skipped.append(key.name)
+                continue
+            if isinstance(key, UniqueConstraint):
+                if conflicts:
+                    continue
+                if not dry_run:
+                    conn.execute(AddConstraint(key))
+            elif isinstance(key, Index) and not dry_run:
+                key.create(conn)
+            created.append(key.name)
+
+        if not conflicts:
+            for name in SUPERSEDED_INDEXES:
+                if name in existing:
+                    if not dry_run:
+                        conn.exec_driver_sql(f"DROP INDEX {name} ON {table.name}")
+                    dropped.append(name)
+
+    return {
+        "created": created,
+        "already_present": skipped,
+        "dropped": dropped,
+        "dates_moved_to_midnight": normalized,
+        "double_bookings": conflicts,
+        "dry_run": dry_run,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only list the changes that would be made")
+    args = parser.parse_args()
+    result = migrate(args.dry_run)
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["double_bookings"] else 0)
+
+if __name__ == "__main__":
+    main()